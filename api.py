@@ -0,0 +1,61 @@
+"""本地 HTTP 任务接口，供 CI 流水线提交 JMX 处理任务，不导入任何 GUI 框架
+
+用法示例:
+    python -m api --port 8765 -j 4
+    curl -T plan.jmx -H "X-File-Name: plan.jmx" "http://127.0.0.1:8765/jobs?length=2&replace=/old/=>/new/"
+    tar czf plans.tgz plans/ && curl -T plans.tgz "http://127.0.0.1:8765/jobs?remove_header=1"
+    curl http://127.0.0.1:8765/jobs/<id>
+    curl -o out.zip http://127.0.0.1:8765/jobs/<id>/archive
+
+接口说明见 business/http_api.py。
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="python -m api", description="JMX 处理任务的本地 HTTP 接口")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口（默认 8765）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="常驻工作进程数（默认 CPU 核数）")
+    parser.add_argument("--concurrency", type=int, default=2, help="同时运行的任务数（默认 2）")
+    parser.add_argument("--data-dir", default=None, help="上传文件与输出的存放目录（默认临时目录，退出时删除）")
+    parser.add_argument("--max-body-mb", type=float, default=200, help="单个请求体的大小上限，单位 MB（默认 200）")
+    parser.add_argument("--job-ttl", type=int, default=3600, help="已结束的任务保留多少秒（默认 3600）")
+    return parser
+
+
+async def serve(args):
+    from business.http_api import JobServer
+
+    server = JobServer(args.data_dir, args.workers, args.concurrency, int(args.max_body_mb * 1024 * 1024),
+                       args.job_ttl)
+    try:
+        await server.start(args.host, args.port)
+        print(f"已启动 {server.queue.workers} 个工作进程，监听 http://{args.host}:{server.port}", file=sys.stderr)
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    # 被 kill 或容器停止时与 Ctrl+C 一样退出，关闭工作进程并删除临时目录
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"错误：无法启动服务: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+# 工作进程以 spawn 方式启动，会重新导入主模块，入口必须放在这个判断之后
+if __name__ == "__main__":
+    sys.exit(main())
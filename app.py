@@ -1,12 +1,13 @@
 import tkinter as tk
-import importlib
+import multiprocessing
+import os
 import sys
 import argparse
 from tkinter import ttk
-import pywinstyles
-import webview
 from typing import Any, Tuple
 
+from ui import load_backend, resolve_backend_name
+
 
 # 创建选择窗口
 class UISelector(tk.Tk):
@@ -14,6 +15,7 @@ class UISelector(tk.Tk):
         super().__init__()
         self.title("选择UI框架")
         self.geometry("300x185")
+        import pywinstyles
         pywinstyles.apply_style(self, "mica")
 
         self.selection = None
@@ -28,21 +30,7 @@ class UISelector(tk.Tk):
 # 动态导入UI模块
 def load_ui_module(ui_type: str) -> Tuple[Any, Any]:
     try:
-        if ui_type == 'pyside6':
-            from PySide6.QtWidgets import QApplication
-            return importlib.import_module('ui.pyside6_main_window'), QApplication
-        elif ui_type == 'wx':
-            import wx
-            return importlib.import_module('ui.wx_main_window'), wx.App
-        elif ui_type == 'nicegui':
-            from nicegui import ui
-            return importlib.import_module('ui.nicegui_main_window'), ui
-        elif ui_type == 'flet':
-            import flet as ft
-            return importlib.import_module('ui.flet_main_window'), ft.app
-        else:  # Default to Tkinter
-            import tkinter as tk
-            return importlib.import_module('ui.main_window'), tk.Tk
+        return load_backend(ui_type)
     except ImportError as e:
         print(f"错误：未找到 {ui_type} 库，请先安装。详细信息：{e}")
         sys.exit(1)
@@ -60,24 +48,34 @@ def run_application(ui_type: str, ui_module: Any, app_class: Any) -> None:
         window = ui_module.App()
         app.MainLoop()
     elif ui_type == 'nicegui':
-        from nicegui import ui
+        from nicegui import app, ui
+        from utils.helpers import wait_for_server
+
+        port = 8080
 
         @ui.page('/')
         def main_page():
             window = ui_module.App()
             ui.add_body_html('<script>window.resizeTo(800, 600)</script>')
 
+        @app.get('/healthz')
+        def healthz():
+            return 'ok'
+
         def start_nicegui():
-            ui.run(port=8080, show=False, reload=False, title="PyJMeter")
+            ui.run(port=port, show=False, reload=False, title="PyJMeter")
 
         import threading
         server_thread = threading.Thread(target=start_nicegui, daemon=True)
         server_thread.start()
 
-        import time
-        time.sleep(1)
+        # 服务真正开始响应后再打开窗口，不依赖固定的等待时间
+        if not wait_for_server(f"http://127.0.0.1:{port}/healthz", alive=server_thread.is_alive):
+            print(f"错误：NiceGUI 服务未能在端口 {port} 上启动")
+            sys.exit(1)
 
-        webview.create_window("PyJMeter", "http://localhost:8080", width=800, height=600)
+        import webview
+        webview.create_window("PyJMeter", f"http://localhost:{port}", width=800, height=600)
         webview.start()
     elif ui_type == 'flet':
         app_class(target=lambda page: ui_module.App(page))
@@ -89,11 +87,30 @@ def run_application(ui_type: str, ui_module: Any, app_class: Any) -> None:
 
 # 主程序入口
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后批量解析的工作进程需要
     parser = argparse.ArgumentParser(description='JMeter JMX Parser')
     parser.add_argument('--ui', type=str, default=None,
                         choices=['tk', 'pyside6', 'wx', 'nicegui', 'flet'],
                         help='选择UI类型 (tk, pyside6, wx, nicegui, flet)')
+    parser.add_argument('--serve', action='store_true', help='以 NiceGUI 多用户服务方式运行，不打开桌面窗口')
+    parser.add_argument('--host', default='0.0.0.0', help='服务监听地址（--serve）')
+    parser.add_argument('--port', type=int, default=8080, help='服务端口（--serve）')
+    parser.add_argument('--workers', type=int, default=None, help='解析工作进程数，默认使用全部 CPU 核心（--serve）')
+    parser.add_argument('--concurrency', type=int, default=4, help='同时运行的任务数（--serve）')
+    parser.add_argument('--data-dir', default=None, help='上传文件与结果的存放目录，默认使用临时目录（--serve）')
+    parser.add_argument('--max-upload-mb', type=int, default=200, help='单个上传文件的大小上限（--serve）')
+    parser.add_argument('--cache-dir', default=None,
+                        help='启用解析结果磁盘缓存并指定目录，未变化的文件不再重复解析（默认关闭）')
     args = parser.parse_args()
+    if args.cache_dir:
+        # 界面在 BaseApp 中按该环境变量决定是否启用缓存
+        os.environ['PYJMETER_CACHE_DIR'] = args.cache_dir
+
+    if args.serve:
+        from ui.nicegui_service import run_service
+        run_service(args.host, args.port, args.data_dir, args.workers, args.concurrency,
+                    args.max_upload_mb * 1024 * 1024)
+        sys.exit(0)
 
     if args.ui:
         ui_type = args.ui
@@ -105,6 +122,7 @@ if __name__ == "__main__":
     if not ui_type:
         print("错误：未选择任何UI框架。")
         sys.exit(1)
+    ui_type = resolve_backend_name(ui_type)
 
     ui_module, app_class = load_ui_module(ui_type)
     run_application(ui_type, ui_module, app_class)
@@ -0,0 +1 @@
+# 性能基准测试，使用 python -m benchmarks.<模块> 运行
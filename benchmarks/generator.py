@@ -0,0 +1,222 @@
+"""以 Sampler.jmx 中的元素为模板生成任意规模的合成测试计划
+
+用法: python -m benchmarks.generator out.jmx --thread-groups 2 --transactions 100 --samplers 10 \
+          --depth 1 --headers 3 --body-size 512
+      python -m benchmarks.generator out.jmx --target-size 100MB
+
+生成过程逐段写入文件，1 GB 的计划也不会占用大量内存。同时写出 out.jmx.json 记录元素数量。
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import re
+
+from lxml import etree
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_FILE = os.path.join(PROJECT_DIR, "Sampler.jmx")
+
+INDENT = "  "
+# 模板中的占位符，渲染后再用 str.replace 填入实际内容，避免逐个元素序列化
+NAME = "@@NAME@@"
+PATH = "@@PATH@@"
+BODY = "@@BODY@@"
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text):
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*", text.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"无效的大小: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def _strip(element):
+    for node in element.iter():
+        node.text = node.text if node.text and node.text.strip() else None
+        node.tail = None
+    return element
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+class Templates:
+    """从 Sampler.jmx 中取出各类元素的第一个实例作为模板"""
+
+    def __init__(self, template_file=TEMPLATE_FILE):
+        root = etree.parse(template_file).getroot()
+        self.root_attrib = dict(root.attrib)
+        found = {}
+        for tag in ("TestPlan", "ThreadGroup", "TransactionController", "HTTPSamplerProxy", "IfController",
+                    "LoopController"):
+            for element in root.iter(tag):
+                # ThreadGroup 内嵌的 LoopController 是 elementProp，跳过
+                if element.getparent() is not None and element.getparent().tag == "hashTree":
+                    found[tag] = _strip(copy.deepcopy(element))
+                    break
+        self.elements = found
+        self._rendered = {}
+
+        sampler = found["HTTPSamplerProxy"]
+        sampler.set("testname", NAME)
+        for prop in sampler.findall("boolProp[@name='HTTPSampler.postBodyRaw']"):
+            prop.text = "true"
+        anchor = sampler.find("stringProp[@name='HTTPSampler.method']")
+        for offset, (name, text) in enumerate([("HTTPSampler.domain", "test.example.com"),
+                                               ("HTTPSampler.protocol", "https"),
+                                               ("HTTPSampler.path", PATH)]):
+            prop = etree.Element("stringProp", name=name)
+            prop.text = text
+            anchor.addprevious(prop)
+        collection = sampler.find("elementProp/collectionProp")
+        argument = etree.SubElement(collection, "elementProp", name="", elementType="HTTPArgument")
+        etree.SubElement(argument, "boolProp", name="HTTPArgument.always_encode").text = "false"
+        etree.SubElement(argument, "stringProp", name="Argument.value").text = BODY
+        etree.SubElement(argument, "stringProp", name="Argument.metadata").text = "="
+
+        for tag in ("TransactionController", "IfController", "LoopController", "ThreadGroup", "TestPlan"):
+            found[tag].set("testname", NAME)
+
+    def header_manager(self, count):
+        manager = etree.Element("HeaderManager", guiclass="HeaderPanel", testclass="HeaderManager",
+                                testname="HTTP信息头管理器")
+        headers = etree.SubElement(manager, "collectionProp", name="HeaderManager.headers")
+        for index in range(count):
+            header = etree.SubElement(headers, "elementProp", name="", elementType="Header")
+            etree.SubElement(header, "stringProp", name="Header.name").text = f"X-Header-{index}"
+            etree.SubElement(header, "stringProp", name="Header.value").text = f"value-{index}"
+        return manager
+
+    def render(self, key, level, element=None):
+        """按 JMeter 的缩进格式渲染模板，同一模板和层级只渲染一次"""
+        cache_key = (key, level)
+        if cache_key not in self._rendered:
+            element = copy.deepcopy(element if element is not None else self.elements[key])
+            etree.indent(element, space=INDENT, level=level)
+            text = INDENT * level + etree.tostring(element, encoding="unicode").rstrip() + "\n"
+            self._rendered[cache_key] = (text, sum(1 for _ in element.iter()))
+        return self._rendered[cache_key]
+
+
+class PlanWriter:
+    def __init__(self, out, templates, headers, body_size):
+        self.out = out
+        self.templates = templates
+        self.headers = headers
+        self.body = ('{"payload":"' + "x" * max(body_size - 14, 0) + '"}')[:body_size] if body_size else ""
+        self.stats = {"bytes": 0, "elements": 0, "thread_groups": 0, "transactions": 0, "samplers": 0,
+                      "headers": 0}
+
+    def write(self, text, elements=0):
+        self.out.write(text)
+        self.stats["bytes"] += len(text.encode("utf-8")) if not text.isascii() else len(text)
+        self.stats["elements"] += elements
+
+    def open_tree(self, level):
+        self.write(f"{INDENT * level}<hashTree>\n", 1)
+
+    def close_tree(self, level):
+        self.write(f"{INDENT * level}</hashTree>\n")
+
+    def element(self, key, level, name, **replacements):
+        text, count = self.templates.render(key, level)
+        text = text.replace(NAME, _escape(name))
+        for placeholder, value in replacements.items():
+            text = text.replace(placeholder, _escape(value))
+        self.write(text, count)
+
+    def sampler(self, level, thread_group, transaction, index):
+        self.element("HTTPSamplerProxy", level, f"http://10.0.0.{thread_group % 255}/app#请求{index}?id={index}",
+                     **{PATH: f"/app/api/tg{thread_group}/tx{transaction}/item/{index}?id={index}",
+                        BODY: self.body})
+        self.stats["samplers"] += 1
+        if self.headers:
+            self.open_tree(level)
+            text, count = self.templates.render("HeaderManager", level + 1,
+                                                self.templates.header_manager(self.headers))
+            self.write(text, count)
+            self.write(f"{INDENT * (level + 1)}<hashTree/>\n", 1)
+            self.close_tree(level)
+            self.stats["headers"] += 1
+        else:
+            self.write(f"{INDENT * level}<hashTree/>\n", 1)
+
+    def transaction(self, level, thread_group, transaction, samplers, depth):
+        self.element("TransactionController", level, f"事务#tg{thread_group}-tx{transaction}")
+        self.stats["transactions"] += 1
+        self.open_tree(level)
+        self._nested(level + 1, thread_group, transaction, samplers, depth)
+        self.close_tree(level)
+
+    def _nested(self, level, thread_group, transaction, samplers, depth):
+        if depth == 0:
+            for index in range(samplers):
+                self.sampler(level, thread_group, transaction, index)
+            return
+        key = "IfController" if depth % 2 else "LoopController"
+        self.element(key, level, f"{key}-{depth}")
+        self.open_tree(level)
+        self._nested(level + 1, thread_group, transaction, samplers, depth - 1)
+        self.close_tree(level)
+
+
+def generate(output_file, thread_groups=1, transactions=10, samplers=5, depth=0, headers=0, body_size=0,
+             target_size=None, template_file=TEMPLATE_FILE):
+    """写出合成计划并返回统计信息；指定 target_size 时按单个事务的大小推算事务数量"""
+    templates = Templates(template_file)
+
+    if target_size:
+        with open(os.devnull, "w", encoding="utf-8") as null:
+            probe = PlanWriter(null, templates, headers, body_size)
+            probe.transaction(3, 0, 0, samplers, depth)
+        transactions = max(1, math.ceil(target_size / (probe.stats["bytes"] * thread_groups)))
+
+    with open(output_file, "w", encoding="utf-8", buffering=1024 * 1024) as out:
+        writer = PlanWriter(out, templates, headers, body_size)
+        attributes = " ".join(f'{key}="{_escape(value)}"' for key, value in templates.root_attrib.items())
+        writer.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<jmeterTestPlan {attributes}>\n', 1)
+        writer.open_tree(1)
+        writer.element("TestPlan", 2, "测试计划")
+        writer.open_tree(2)
+        for thread_group in range(thread_groups):
+            writer.element("ThreadGroup", 3, f"线程组-{thread_group}")
+            writer.stats["thread_groups"] += 1
+            writer.open_tree(3)
+            for transaction in range(transactions):
+                writer.transaction(4, thread_group, transaction, samplers, depth)
+            writer.close_tree(3)
+        writer.close_tree(2)
+        writer.close_tree(1)
+        writer.write("</jmeterTestPlan>\n")
+
+    stats = dict(writer.stats, depth=depth, body_size=body_size)
+    with open(output_file + ".json", "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成 JMX 测试计划")
+    parser.add_argument("output", help="输出文件")
+    parser.add_argument("--thread-groups", type=int, default=1)
+    parser.add_argument("--transactions", type=int, default=10, help="每个线程组的事务数")
+    parser.add_argument("--samplers", type=int, default=5, help="每个事务的 HTTP 请求数")
+    parser.add_argument("--depth", type=int, default=0, help="HTTP 请求外层嵌套的逻辑控制器层数")
+    parser.add_argument("--headers", type=int, default=0, help="每个请求的信息头数量，0 表示不生成 HeaderManager")
+    parser.add_argument("--body-size", type=parse_size, default=0, help="每个请求的请求体大小，如 512、4KB")
+    parser.add_argument("--target-size", type=parse_size, default=None,
+                        help="目标文件大小（1KB 到 1GB），指定后忽略 --transactions")
+    args = parser.parse_args(argv)
+
+    stats = generate(args.output, args.thread_groups, args.transactions, args.samplers, args.depth, args.headers,
+                     args.body_size, args.target_size)
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
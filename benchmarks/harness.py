@@ -0,0 +1,233 @@
+"""可重复的性能基准：JMeterParser.load_jmx、save_jmx、流式解析与 BaseApp.parse_directory
+
+用法: python -m benchmarks.harness --sizes 1MB 10MB 100MB --output results.json
+      python -m benchmarks.harness --sizes 10MB --compare results.json
+
+每个用例都在新的解释器中运行，以便分别统计峰值内存。结果记录耗时、峰值 RSS、
+元素/秒和 MB/秒，并附带当前提交号，方便在不同提交之间比较。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import generate, parse_size
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = ["load", "save", "save_preserve", "save_compact", "stream", "directory"]
+OPTIONS = (2, True, r"http://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}", [("/app/", "/svc/")])
+
+
+def peak_rss():
+    """本进程及其子进程的峰值常驻内存（字节），不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+def run_case(case, jmx_file, workers):
+    """在当前进程中执行一个用例，返回耗时（秒）"""
+    from business.parser import JMeterParser
+
+    if case == "load":
+        start = time.perf_counter()
+        JMeterParser(jmx_file, *OPTIONS)
+        return time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if case.startswith("save"):
+            mode = case.partition("_")[2] or "pretty"
+            parser = JMeterParser(jmx_file, *OPTIONS)
+            start = time.perf_counter()
+            if not parser.save_jmx(os.path.join(tmp, "out.jmx"), mode):
+                raise RuntimeError(f"保存失败: {jmx_file}")
+            return time.perf_counter() - start
+
+        if case == "stream":
+            from business.stream_parser import StreamingJMeterParser
+
+            start = time.perf_counter()
+            StreamingJMeterParser(jmx_file, *OPTIONS, output_file=os.path.join(tmp, "out.jmx"))
+            return time.perf_counter() - start
+
+        if case == "directory":
+            app = headless_app(workers)
+            start = time.perf_counter()
+            app.parse_directory(jmx_file, OPTIONS[0], OPTIONS[1], OPTIONS[2])
+            app.jobs.wait()
+            return time.perf_counter() - start
+
+    raise ValueError(f"未知的用例: {case}")
+
+
+def headless_app(workers):
+    """不显示界面的 BaseApp，用于测量批量解析目录的耗时；只在子进程中导入界面基类"""
+    from ui.base_app import BaseApp
+
+    class _HeadlessApp(BaseApp):
+        def __init__(self):
+            super().__init__()
+            self.workers = workers
+            self.result_cache = None
+
+        def get_replacement_entries(self):
+            return OPTIONS[3]
+
+        def add_result_item(self, jmx_file, title):
+            pass
+
+        def show_rows(self, rows, page):
+            pass
+
+        def set_progress(self, value, maximum):
+            pass
+
+        def update_status(self, message):
+            pass
+
+        def show_error(self, message):
+            print(message, file=sys.stderr)
+
+    return _HeadlessApp()
+
+
+def measure(case, target, elements, size_bytes, workers):
+    """启动子进程运行用例并汇总指标"""
+    output = subprocess.run([sys.executable, "-m", "benchmarks.harness", "--worker", case, target,
+                             "--workers", str(workers or 0)],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    seconds = result["seconds"]
+    return {
+        "case": case,
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(result["peak_rss"] / 1024 / 1024, 1) if result["peak_rss"] else None,
+        "elements_per_s": round(elements / seconds) if seconds else None,
+        "mb_per_s": round(size_bytes / 1024 / 1024 / seconds, 2) if seconds else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    import lxml.etree
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="pyjmeter-bench-")
+    results = []
+    try:
+        for size in args.sizes:
+            plan = os.path.join(work_dir, f"plan-{size}.jmx")
+            stats = generate(plan, args.thread_groups, samplers=args.samplers, depth=args.depth,
+                             headers=args.headers, body_size=args.body_size, target_size=size)
+            directory = os.path.join(work_dir, f"dir-{size}")
+            os.makedirs(directory, exist_ok=True)
+            for index in range(args.copies):
+                shutil.copyfile(plan, os.path.join(directory, f"plan-{index}.jmx"))
+
+            for case in args.cases:
+                repeats = []
+                for _ in range(args.repeat):
+                    if case == "directory":
+                        repeats.append(measure(case, directory, stats["elements"] * args.copies,
+                                               stats["bytes"] * args.copies, args.workers))
+                    else:
+                        repeats.append(measure(case, plan, stats["elements"], stats["bytes"], args.workers))
+                best = min(repeats, key=lambda item: item["seconds"])
+                best.update(size=size, bytes=stats["bytes"], elements=stats["elements"],
+                            files=args.copies if case == "directory" else 1)
+                results.append(best)
+                print(format_row(best), file=sys.stderr)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "lxml": ".".join(map(str, lxml.etree.LXML_VERSION)),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": {key: value for key, value in vars(args).items()
+                        if key not in ("output", "compare", "work_dir", "worker")},
+        },
+        "results": results,
+    }
+
+
+def format_row(result):
+    rss = f"{result['peak_rss_mb']:8.1f} MB" if result["peak_rss_mb"] is not None else "       n/a"
+    return (f"{result['case']:<14} {result['bytes'] / 1024 / 1024:9.1f} MB  {result['seconds']:9.3f} s  {rss}  "
+            f"{result['elements_per_s']:>12,} 元素/秒  {result['mb_per_s']:8.2f} MB/秒")
+
+
+def compare(current, baseline_file):
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(item["case"], item["size"]): item for item in baseline["results"]}
+    print(f"对比基线 {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    for item in current["results"]:
+        old = previous.get((item["case"], item["size"]))
+        if old is None:
+            continue
+        ratio = old["seconds"] / item["seconds"] if item["seconds"] else float("inf")
+        rss = ""
+        if old.get("peak_rss_mb") and item.get("peak_rss_mb"):
+            rss = f"  内存 {old['peak_rss_mb']:.1f} -> {item['peak_rss_mb']:.1f} MB"
+        print(f"{item['case']:<14} {item['size']:>12} B  {old['seconds']:.3f}s -> {item['seconds']:.3f}s "
+              f"({ratio:.2f}x){rss}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JMX 解析性能基准")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[parse_size("1MB"), parse_size("10MB")],
+                        help="合成计划的大小，如 1KB 10MB 1GB")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--thread-groups", type=int, default=1)
+    parser.add_argument("--samplers", type=int, default=10)
+    parser.add_argument("--depth", type=int, default=0)
+    parser.add_argument("--headers", type=int, default=3)
+    parser.add_argument("--body-size", type=parse_size, default=parse_size("1KB"))
+    parser.add_argument("--copies", type=int, default=8, help="directory 用例中的文件数")
+    parser.add_argument("--workers", type=int, default=None, help="directory 用例的工作进程数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数，取最快一次")
+    parser.add_argument("--work-dir", default=None, help="保留生成的计划文件的目录")
+    parser.add_argument("--output", default=None, help="结果 JSON 文件")
+    parser.add_argument("--compare", default=None, help="与之前保存的结果 JSON 对比")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        case, target = args.worker
+        seconds = run_case(case, target, args.workers or None)
+        print(json.dumps({"seconds": seconds, "peak_rss": peak_rss()}))
+        return
+
+    report = run_suite(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
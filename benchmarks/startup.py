@@ -0,0 +1,71 @@
+"""统计每个 UI 后端的导入耗时，并检查是否误导入了其他 GUI 框架
+
+用法: python -m benchmarks.startup [--repeat 3] [--json]
+每次测量都在新的解释器中进行，避免模块缓存影响结果。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from ui import BACKENDS
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各 GUI 框架的顶层模块
+TOOLKIT_MODULES = ['tkinter', 'PySide6', 'wx', 'nicegui', 'flet', 'webview']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    from ui import load_backend
+    load_backend(sys.argv[1])
+    error = None
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - start
+toolkits = [name for name in sys.argv[2:] if name in sys.modules]
+print(json.dumps({"seconds": elapsed, "error": error, "toolkits": toolkits}))
+"""
+
+
+def measure_backend(name, repeat=3):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE, name, *TOOLKIT_MODULES], cwd=PROJECT_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        if result["error"]:
+            break
+        samples.append(result["seconds"])
+    return {
+        "backend": name,
+        "import_ms": round(min(samples) * 1000, 1) if samples else None,
+        "error": result["error"],
+        "toolkits_loaded": result["toolkits"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UI 后端启动耗时")
+    parser.add_argument("--repeat", type=int, default=3, help="每个后端测量次数，取最小值")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args(argv)
+
+    results = [measure_backend(name, args.repeat) for name in BACKENDS]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    for result in results:
+        if result["error"]:
+            print(f"{result['backend']:<8} 不可用  {result['error']}")
+        else:
+            print(f"{result['backend']:<8} {result['import_ms']:>8.1f} ms  已加载: {', '.join(result['toolkits_loaded'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""对比逐控制器 XPath 实现与当前单次遍历实现的转换耗时
+
+用法: python -m benchmarks.traversal [--transactions 2000] [--samplers 10] [--depth 0] [--repeat 5]
+--depth 指定 HTTP 请求外层嵌套的 IfController/LoopController 层数。旧的 XPath 实现只处理事务
+hashTree 的直接子元素，嵌套时会漏掉请求；另一种 XPath 实现按后代查找，输出与单次遍历一致。
+输出应当一致的实现会先做逐字节比对，结果不一致时直接报错。
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from lxml import etree
+
+from business.parser import JMeterParser
+from utils.helpers import keep_after_regex, keep_before_question_mark, keep_after_hash
+
+SAMPLER = """          <HTTPSamplerProxy guiclass="HttpTestSampleGui" testclass="HTTPSamplerProxy" testname="http://10.0.0.1/app#请求{index}?q=1">
+            <stringProp name="HTTPSampler.domain">10.0.0.1</stringProp>
+            <stringProp name="HTTPSampler.path">/app/api/v1/item/{index}?id={index}</stringProp>
+            <stringProp name="HTTPSampler.method">GET</stringProp>
+          </HTTPSamplerProxy>
+          <hashTree>
+            <HeaderManager guiclass="HeaderPanel" testclass="HeaderManager" testname="HTTP信息头管理器">
+              <collectionProp name="HeaderManager.headers"/>
+            </HeaderManager>
+            <hashTree/>
+          </hashTree>
+"""
+
+
+def build_plan(transactions, samplers, depth=0):
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<jmeterTestPlan version="1.2" properties="5.0">\n'
+             '  <hashTree>\n    <TestPlan testname="测试计划"/>\n    <hashTree>\n'
+             '      <ThreadGroup testname="线程组"/>\n      <hashTree>\n']
+    for transaction in range(transactions):
+        parts.append(f'        <TransactionController testname="事务#tx{transaction}">\n'
+                     '          <boolProp name="TransactionController.includeTimers">false</boolProp>\n'
+                     '        </TransactionController>\n        <hashTree>\n')
+        # 每层逻辑控制器下放一个请求，其余请求放在最内层
+        for level in range(depth):
+            parts.append(SAMPLER.format(index=level))
+            tag = "IfController" if level % 2 else "LoopController"
+            parts.append(f'          <{tag} testname="{tag}-{level}"/>\n          <hashTree>\n')
+        parts.extend(SAMPLER.format(index=index) for index in range(depth, max(samplers, depth)))
+        parts.append('          </hashTree>\n' * depth)
+        parts.append('        </hashTree>\n')
+    parts.append('      </hashTree>\n    </hashTree>\n  </hashTree>\n</jmeterTestPlan>\n')
+    return "".join(parts)
+
+
+def legacy_transform(root, length, remove_header, pattern, replacement_frames,
+                     sampler_xpath="./following-sibling::hashTree[1]/HTTPSamplerProxy"):
+    """引入单次遍历之前的实现，仅用于对比
+
+    默认只查找事务 hashTree 的直接子元素；sampler_xpath 改为后代查找时也处理嵌套在逻辑控制器
+    中的请求（前提是事务之间没有嵌套，build_plan 生成的计划满足这一点）。
+    """
+    from business.naming import AlphabetNameAllocator
+
+    transaction_names = AlphabetNameAllocator(length)
+    transaction_counter = 0
+    for transaction_controller in root.xpath(".//TransactionController"):
+        name = transaction_controller.get("testname")
+        transaction_counter += 1
+        transaction_name = transaction_names[transaction_counter - 1]
+        transaction_controller.set("testname", f"事务_{transaction_name}#{keep_after_hash(name)}")
+
+        http_counter = 1
+        for http_element in transaction_controller.xpath(sampler_xpath):
+            if remove_header:
+                for hash_tree in http_element.xpath("./following-sibling::hashTree[1]"):
+                    for header in hash_tree.xpath("./HeaderManager"):
+                        if len(header):
+                            hash_tree.remove(header.getnext())
+                            hash_tree.remove(header)
+
+            if "receiveHeartBeat.do" in http_element.xpath("./stringProp[@name='HTTPSampler.path']"):
+                http_element.getparent().remove(http_element)
+            else:
+                http_name = http_element.get("testname")
+                if pattern:
+                    http_name = keep_after_regex(pattern, http_name)
+                http_element.set("testname", f"{transaction_name}_{http_counter}#"
+                                             f"{keep_before_question_mark(keep_after_hash(http_name))}")
+                url_prop_element = http_element.xpath("./stringProp[@name='HTTPSampler.path']")[0]
+                for old_value, new_value in replacement_frames:
+                    url_prop_element.text = url_prop_element.text.replace(old_value, new_value)
+            http_counter += 1
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XPath 与单次遍历实现的耗时对比")
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--samplers", type=int, default=10, help="每个事务下的 HTTP 请求数")
+    parser.add_argument("--depth", type=int, default=0, help="HTTP 请求外层嵌套的逻辑控制器层数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    options = (3, True, r"http://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}", [("/app/", "/svc/"), ("v1", "v2")])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jmx_file = os.path.join(tmp, "plan.jmx")
+        with open(jmx_file, "w", encoding="utf-8") as f:
+            f.write(build_plan(args.transactions, args.samplers, args.depth))
+        size_mb = os.path.getsize(jmx_file) / 1024 / 1024
+
+        def run_legacy(sampler_xpath=None):
+            root = etree.parse(jmx_file).getroot()
+            if sampler_xpath is None:
+                legacy_transform(root, *options)
+            else:
+                legacy_transform(root, *options, sampler_xpath=sampler_xpath)
+            return root
+
+        def run_nested():
+            return run_legacy("./following-sibling::hashTree[1]//HTTPSamplerProxy")
+
+        def run_current():
+            return JMeterParser(jmx_file, *options).root
+
+        current = etree.tostring(run_current())
+        if etree.tostring(run_nested()) != current:
+            raise SystemExit("后代 XPath 实现与单次遍历的输出不一致")
+        if args.depth == 0 and etree.tostring(run_legacy()) != current:
+            raise SystemExit("直接子元素 XPath 实现与单次遍历的输出不一致")
+
+        def renamed(root):
+            return sum(1 for element in root.iter("HTTPSamplerProxy") if not element.get("testname").startswith("http"))
+
+        legacy_renamed, current_renamed = renamed(run_legacy()), renamed(run_current())
+
+        # 解析 XML 本身的耗时各实现相同，单独扣除后再比较转换部分
+        parse_time = best_of(args.repeat, lambda: etree.parse(jmx_file))
+        legacy_time = best_of(args.repeat, run_legacy)
+        nested_time = best_of(args.repeat, run_nested)
+        current_time = best_of(args.repeat, run_current)
+
+    total = args.transactions * max(args.samplers, args.depth)
+    elements = args.transactions * (max(args.samplers, args.depth) + args.depth + 1)
+    print(f"文件大小 {size_mb:.1f} MB，事务 {args.transactions}，HTTP 请求 {total}，嵌套 {args.depth} 层")
+    print(f"XML 解析          {parse_time * 1000:9.1f} ms")
+    print(f"XPath 直接子元素  {legacy_time * 1000:9.1f} ms  (转换 {(legacy_time - parse_time) * 1000:.1f} ms，"
+          f"处理请求 {legacy_renamed}/{total})")
+    print(f"XPath 后代        {nested_time * 1000:9.1f} ms  (转换 {(nested_time - parse_time) * 1000:.1f} ms)")
+    print(f"单次遍历实现      {current_time * 1000:9.1f} ms  (转换 {(current_time - parse_time) * 1000:.1f} ms，"
+          f"处理请求 {current_renamed}/{total})")
+    print(f"转换部分加速      {(nested_time - parse_time) / max(current_time - parse_time, 1e-9):.2f}x（相对后代 XPath），"
+          f"{elements / current_time:,.0f} 元素/秒")
+
+
+if __name__ == "__main__":
+    main()
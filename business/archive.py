@@ -0,0 +1,145 @@
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1024 * 1024
+
+ZIP = "zip"
+# 扩展名与 tar 包的压缩方式，格式写作 tar、tar:gz 等，与 tarfile 的模式后缀一致
+TAR_SUFFIXES = {".tar": "tar", ".tar.gz": "tar:gz", ".tgz": "tar:gz", ".tar.bz2": "tar:bz2", ".tbz2": "tar:bz2",
+                ".tar.xz": "tar:xz", ".txz": "tar:xz"}
+
+# tar 成员需要先知道大小才能写入，转换后的内容不超过这个大小时暂存在内存中，否则写到临时文件
+SPOOL_SIZE = 16 * 1024 * 1024
+
+
+class _ChunkSink:
+    """只能追加写入的输出，zipfile 写入的数据先暂存在这里，由生成器逐块取走"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip(entries, chunk_size=CHUNK_SIZE, compression=zipfile.ZIP_DEFLATED):
+    """边压缩边产出 ZIP 内容，entries 为 (压缩包内名称, 文件路径)
+
+    输出不可回退，每个文件的大小与 CRC 写在数据之后；内存中只保留一个块，适合作为 HTTP
+    响应体直接流式返回，不需要先在磁盘上生成完整的压缩包。
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression) as archive:
+        for name, path in entries:
+            force_zip64 = os.path.getsize(path) >= zipfile.ZIP64_LIMIT
+            with open(path, "rb") as source, archive.open(name, "w", force_zip64=force_zip64) as target:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    target.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def archive_format(path):
+    """按扩展名判断压缩包格式：zip、tar、tar:gz 等；不是压缩包时返回 None"""
+    lower = path.lower()
+    if lower.endswith(".zip"):
+        return ZIP
+    for suffix, archive_type in TAR_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return archive_type
+    return None
+
+
+def iter_members(path):
+    """按压缩包中的顺序逐个产出 (成员名称, 可读的文件对象)，只包含普通文件，不会解压到磁盘
+
+    文件对象只在取下一个成员之前有效。tar 包以流模式顺序读取，压缩的 tar 包也不需要回退。
+    """
+    if archive_format(path) == ZIP:
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member
+    else:
+        with tarfile.open(path, "r|*") as archive:
+            for info in archive:
+                if info.isfile():
+                    yield info.name, archive.extractfile(info)
+
+
+def count_members(path, suffix=""):
+    """zip 包中以 suffix 结尾的成员数；tar 包要读完整个流才能知道，返回 0 表示未知"""
+    if archive_format(path) != ZIP:
+        return 0
+    with zipfile.ZipFile(path) as archive:
+        return sum(1 for info in archive.infolist() if not info.is_dir() and info.filename.lower().endswith(suffix))
+
+
+class ArchiveWriter:
+    """逐个写入成员的 zip 或 tar 包，archive_type 见 archive_format"""
+
+    def __init__(self, path, archive_type, compression=zipfile.ZIP_DEFLATED):
+        self.archive_type = archive_type
+        if archive_type == ZIP:
+            self.archive = zipfile.ZipFile(path, "w", compression)
+        else:
+            self.archive = tarfile.open(path, archive_type.replace("tar", "w", 1))
+
+    @contextmanager
+    def open(self, name):
+        """返回可写的文件对象，写入的内容在退出时成为名为 name 的成员"""
+        if self.archive_type == ZIP:
+            # 转换后的大小事先未知，预留 ZIP64 扩展字段，超过 4 GB 的成员也能写入
+            with self.archive.open(name, "w", force_zip64=True) as target:
+                yield target
+            return
+        with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as buffer:
+            yield buffer
+            info = tarfile.TarInfo(name)
+            info.size = buffer.tell()
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            buffer.seek(0)
+            self.archive.addfile(info, buffer)
+
+    def copy(self, name, source):
+        """原样写入一个成员，source 为可读的文件对象"""
+        with self.open(name) as target:
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
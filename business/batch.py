@@ -0,0 +1,294 @@
+import logging
+import os
+
+from business.archive import ArchiveWriter, archive_format, count_members, iter_members
+from business.metrics import ParseMetrics
+from business.parser import JMeterParser
+from business.stream_parser import StreamingJMeterParser
+from business.writer import (PATCH, PRETTY, PRESERVE, atomic_path, fsync_file, save_atomic, verify_jmx,
+                             write_serialized, write_tree)
+
+
+class ParsedJMX:
+    """工作进程返回的解析结果：转换后的 JMX 内容（或已写出的文件）及元素摘要，可直接保存"""
+
+    def __init__(self, jmx_file, test_elements, content=None, output_file=None, error=None, metrics=None):
+        self.jmx_file = jmx_file
+        self.test_elements = test_elements
+        self.content = content
+        self.output_file = output_file
+        self.error = error
+        # 工作进程中的统计结果，汇总后即清空
+        self.metrics = metrics
+
+    def to_bytes(self):
+        if self.content is not None:
+            return self.content
+        with open(self.output_file, "rb") as f:
+            return f.read()
+
+    def write_jmx(self, output_file, mode=PRETTY, verify=False, fsync=False):
+        source = self.content if self.content is not None else self.output_file
+        # 内容是按解析时的格式序列化的，不知道是否符合 preserve，只有 pretty 与 patch 可以跳过重写
+        if mode in (PRETTY, PATCH) and self._already_saved(output_file):
+            if verify:
+                verify_jmx(output_file)
+            if fsync:
+                fsync_file(output_file)
+        else:
+            save_atomic(lambda path: write_serialized(source, path, mode), output_file, verify, fsync)
+
+    def save_jmx(self, output_file, mode=PRETTY, verify=False, fsync=False):
+        try:
+            self.write_jmx(output_file, mode, verify, fsync)
+            return True
+        except Exception as e:
+            logging.error(f"Error saving JMX file: {e}")
+            return False
+
+    def _already_saved(self, output_file):
+        if self.content is not None:
+            return _same_content(output_file, self.content)
+        return os.path.abspath(output_file) == os.path.abspath(self.output_file)
+
+
+def _same_content(path, content):
+    """目标文件已存在且内容相同时无需重写"""
+    try:
+        if os.path.getsize(path) != len(content):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == content
+    except OSError:
+        return False
+
+
+def parse_file_task(jmx_file, length, remove_header, pattern, replacement_frames, with_metrics=False,
+                    mode=PRETTY, rules=None):
+    """在工作进程中解析单个文件；lxml 树无法跨进程传递，因此返回序列化后的内容
+
+    mode 为保存时的格式：patch 时内容为 patch 格式（原文件只替换修改处），preserve 时保留原文件
+    的空白，其余为 pretty 格式（compact 在写出时再去掉空白）。
+    rules 为 business.rules.RuleSet，传给工作进程时每个进程只编译一次。
+    """
+    metrics = ParseMetrics() if with_metrics else None
+    parser = JMeterParser(jmx_file, length, remove_header, pattern, replacement_frames, metrics=metrics,
+                          track_edits=mode == PATCH, rules=rules)
+    if parser.root is None:
+        raise ValueError(parser.error)
+    content = parser.to_patched_bytes() if mode == PATCH else parser.to_bytes(pretty=mode != PRESERVE)
+    return ParsedJMX(jmx_file, parser.test_elements, content=content, error=parser.error, metrics=metrics)
+
+
+def convert_file_task(jmx_file, output_file, length, remove_header, pattern, replacement_frames, mode=PRETTY):
+    """在工作进程中解析单个文件并直接写出到 output_file，转换后的内容不经进程间传递"""
+    parser = JMeterParser(jmx_file, length, remove_header, pattern, replacement_frames, track_edits=mode == PATCH)
+    if parser.root is None:
+        raise ValueError(parser.error)
+    parser.write_jmx(output_file, mode)
+    return ParsedJMX(jmx_file, parser.test_elements, output_file=output_file, error=parser.error)
+
+
+def stream_file_task(jmx_file, output_file, length, remove_header, pattern, replacement_frames,
+                     with_metrics=False):
+    """在工作进程中以流式模式解析单个文件，结果直接写入 output_file"""
+    metrics = ParseMetrics() if with_metrics else None
+    parser = StreamingJMeterParser(jmx_file, length, remove_header, pattern, replacement_frames, output_file,
+                                   metrics=metrics)
+    if not os.path.exists(output_file):
+        raise ValueError(parser.error)
+    return ParsedJMX(jmx_file, parser.test_elements, output_file=output_file, error=parser.error,
+                     metrics=metrics)
+
+
+def merge_metrics(results, metrics):
+    """把各工作进程的统计结果汇总到 metrics"""
+    for _, parsed, _ in results:
+        if parsed is not None and parsed.metrics is not None:
+            metrics.merge(parsed.metrics)
+            parsed.metrics = None
+
+
+def parse_files(jmx_files, length, remove_header, pattern, replacement_frames, workers=None, progress=None,
+                cache=None, checkpoint=None, metrics=None, mode=PRETTY, rules=None):
+    """并行解析多个 JMX 文件
+
+    返回与 jmx_files 顺序一致的 (jmx_file, ParsedJMX 或 None, 错误或 None) 列表，单个文件
+    出错不影响其他文件。progress(done, total) 在每个文件完成时于调用线程中回调。
+    传入 cache（ResultCache）时，内容和选项都未变化的文件直接取缓存结果，不再解析。
+    checkpoint 见 run_tasks。传入 metrics（ParseMetrics）时汇总实际解析的文件的分阶段统计。
+    mode 为保存时的格式，决定结果内容的格式；rules 为转换规则，见 parse_file_task。
+    """
+    options = (length, remove_header, pattern, replacement_frames)
+    total = len(jmx_files)
+    results = [None] * total
+    keys = [None] * total
+
+    if cache is not None:
+        for index, jmx_file in enumerate(jmx_files):
+            if checkpoint:
+                checkpoint()
+            try:
+                keys[index] = cache.key(jmx_file, *options, mode=mode, rules=rules)
+            except OSError as e:
+                results[index] = (jmx_file, None, e)
+                continue
+            parsed = cache.get(keys[index], jmx_file)
+            if parsed is not None:
+                results[index] = (jmx_file, parsed, None)
+
+    pending = [index for index in range(total) if results[index] is None]
+    cached = total - len(pending)
+    if progress and cached:
+        progress(cached, total)
+
+    def report(done, _):
+        progress(cached + done, total)
+
+    parsed_results = run_tasks(parse_file_task,
+                               [(jmx_files[index], *options, metrics is not None, mode, rules)
+                                for index in pending],
+                               workers, report if progress else None, checkpoint)
+    if metrics is not None:
+        merge_metrics(parsed_results, metrics)
+    for index, result in zip(pending, parsed_results):
+        results[index] = result
+        if cache is not None and keys[index] is not None and result[1] is not None:
+            cache.put(keys[index], result[1])
+    return results
+
+
+def stream_files(jmx_files, output_files, length, remove_header, pattern, replacement_frames, workers=None,
+                 progress=None, checkpoint=None, metrics=None):
+    """与 parse_files 相同，但以流式模式直接写出到 output_files，适合超大文件"""
+    options = (length, remove_header, pattern, replacement_frames, metrics is not None)
+    task_args = [(jmx_file, output_file, *options) for jmx_file, output_file in zip(jmx_files, output_files)]
+    results = run_tasks(stream_file_task, task_args, workers, progress, checkpoint)
+    if metrics is not None:
+        merge_metrics(results, metrics)
+    return results
+
+
+def iter_archive(archive_file, length, remove_header, pattern, replacement_frames, rules=None, progress=None,
+                 checkpoint=None):
+    """逐个解析压缩包中的 .jmx 成员，不解压到磁盘
+
+    产出 (成员名称, 成员文件对象, JMeterParser 或 None, 错误或 None)；不是 .jmx 的成员解析器与
+    错误都为 None。成员的数据流直接交给解析器，取下一个成员时上一个成员的树即可释放，内存中
+    同时只有一个成员的树。progress(done, total) 在每个 .jmx 成员解析后回调，tar 包的 total 为 0。
+    """
+    total = count_members(archive_file, ".jmx")
+    done = 0
+    for name, member in iter_members(archive_file):
+        if checkpoint:
+            checkpoint()
+        if not name.lower().endswith(".jmx"):
+            yield name, member, None, None
+            continue
+        parser = JMeterParser(member, length, remove_header, pattern, replacement_frames, rules=rules)
+        done += 1
+        if progress:
+            progress(done, total)
+        if parser.root is None:
+            yield name, member, None, ValueError(parser.error)
+        else:
+            yield name, member, parser, None
+        parser = None
+
+
+def parse_archive(archive_file, length, remove_header, pattern, replacement_frames, rules=None, progress=None,
+                  checkpoint=None):
+    """解析压缩包中的全部 .jmx 成员，返回 (成员名称, ParsedJMX 或 None, 错误或 None) 列表，与 parse_files 一致"""
+    results = []
+    for name, _, parser, error in iter_archive(archive_file, length, remove_header, pattern, replacement_frames,
+                                               rules, progress, checkpoint):
+        if parser is not None:
+            results.append((name, ParsedJMX(name, parser.test_elements, content=parser.to_bytes(),
+                                            error=parser.error), None))
+        elif error is not None:
+            results.append((name, None, error))
+    return results
+
+
+def convert_archive(archive_file, output_file, length, remove_header, pattern, replacement_frames, mode=PRETTY,
+                    rules=None, progress=None, checkpoint=None):
+    """把压缩包中的 .jmx 成员转换后写入新的压缩包 output_file，格式按其扩展名决定
+
+    转换后的树直接写入新压缩包，不经过中间文件；其他成员原样复制，解析失败的成员不写入。
+    新压缩包先写到临时文件，全部完成后才替换 output_file。返回值与 parse_archive 相同，
+    ParsedJMX 不带内容。patch 格式需要原文件的字节，不支持。
+    """
+    if mode == PATCH:
+        raise ValueError("压缩包输出不支持 patch 格式")
+    archive_type = archive_format(output_file)
+    if archive_type is None:
+        raise ValueError(f"无法按扩展名确定压缩包格式: {output_file}")
+    results = []
+    with atomic_path(output_file) as tmp_path, ArchiveWriter(tmp_path, archive_type) as archive:
+        for name, member, parser, error in iter_archive(archive_file, length, remove_header, pattern,
+                                                        replacement_frames, rules, progress, checkpoint):
+            if parser is not None:
+                with archive.open(name) as target:
+                    write_tree(parser.root, target, mode)
+                results.append((name, ParsedJMX(name, parser.test_elements, error=parser.error), None))
+                # 解析下一个成员之前释放这棵树
+                parser = None
+            elif error is not None:
+                results.append((name, None, error))
+            else:
+                archive.copy(name, member)
+    return results
+
+
+def run_tasks(task, task_args, workers=None, progress=None, checkpoint=None):
+    """按 task_args 顺序返回 (第一个参数, 结果, 错误) 列表；只有一个工作进程时直接在当前进程执行
+
+    checkpoint() 在每个任务提交前调用，可在其中阻塞（暂停）或抛出异常（取消）；取消时
+    尚未开始的任务不再执行，已在运行的任务等待其结束后异常继续向上抛出。
+    """
+    total = len(task_args)
+    results = [None] * total
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or total <= 1:
+        for index, args in enumerate(task_args):
+            if checkpoint:
+                checkpoint()
+            try:
+                results[index] = (args[0], task(*args), None)
+            except Exception as e:
+                results[index] = (args[0], None, e)
+            if progress:
+                progress(index + 1, total)
+        return results
+
+    # 进程池模块导入较慢，只在确实需要并行时加载
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    workers = min(workers, total)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 只保持少量任务在队列中，暂停或取消能及时生效
+        futures = {}
+        submitted = done = 0
+        while done < total:
+            while submitted < total and len(futures) < workers * 2:
+                if checkpoint:
+                    try:
+                        checkpoint()
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+                futures[executor.submit(task, *task_args[submitted])] = submitted
+                submitted += 1
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = futures.pop(future)
+                try:
+                    results[index] = (task_args[index][0], future.result(), None)
+                except Exception as e:
+                    results[index] = (task_args[index][0], None, e)
+                done += 1
+                if progress:
+                    progress(done, total)
+    return results
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from business.batch import ParsedJMX
+from business.elements import ElementTable
+from business.rewriter import PathRewriter
+from business.writer import PATCH, PRESERVE, PRETTY
+
+# 转换逻辑变化时递增，使旧的缓存条目全部失效
+CACHE_VERSION = 2
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def default_cache_dir():
+    base = os.environ.get("PYJMETER_CACHE_DIR")
+    if base:
+        return base
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pyjmeter")
+
+
+def options_fingerprint(length, remove_header, pattern, replacement_frames, mode=PRETTY, rules=None):
+    if isinstance(replacement_frames, PathRewriter):
+        replacements = [replacement_frames.mode, replacement_frames.rules]
+    else:
+        replacements = [list(frame) for frame in replacement_frames]
+    options = [CACHE_VERSION, length, bool(remove_header), pattern or "", replacements]
+    if mode in (PATCH, PRESERVE):
+        # patch 与 preserve 的内容与 pretty 不同，分开缓存；pretty（compact 写出时再去空白）的键保持不变
+        options.append(mode)
+    if rules:
+        options.append(["rules", rules.source])
+    return json.dumps(options, ensure_ascii=False)
+
+
+class ResultCache:
+    """以文件内容和解析选项的哈希为键的磁盘缓存
+
+    每个条目保存转换后的 JMX 与 test_elements 摘要；总大小超过 max_bytes 时按最近使用时间
+    淘汰。缓存读写失败只记录警告，不影响解析。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._index = None
+
+    def key(self, jmx_file, length, remove_header, pattern, replacement_frames, mode=PRETTY, rules=None):
+        digest = hashlib.sha256()
+        fingerprint = options_fingerprint(length, remove_header, pattern, replacement_frames, mode, rules)
+        digest.update(fingerprint.encode("utf-8"))
+        digest.update(b"\0")
+        with open(jmx_file, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key, jmx_file):
+        content_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(content_path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"读取缓存 {key} 失败: {e}")
+            return None
+        self._touch(key, content_path, meta_path)
+        return ParsedJMX(jmx_file, ElementTable.from_dicts(meta["test_elements"]), content=content, error=meta.get("error"))
+
+    def put(self, key, parsed):
+        content_path, meta_path = self._paths(key)
+        try:
+            os.makedirs(os.path.dirname(content_path), exist_ok=True)
+            content = parsed.to_bytes()
+            self._write_atomic(content_path, content)
+        except OSError as e:
+            logging.warning(f"写入缓存 {key} 失败: {e}")
+            return
+        try:
+            meta = json.dumps({"test_elements": parsed.test_elements.to_dicts(), "error": parsed.error},
+                              ensure_ascii=False).encode("utf-8")
+            self._write_atomic(meta_path, meta)
+        except OSError as e:
+            # 只有内容没有元数据的条目读不到却占用空间，写失败时把已写出的内容一并删除
+            logging.warning(f"写入缓存 {key} 失败: {e}")
+            self._remove(key)
+            return
+        index = self._load_index()
+        index[key] = (len(content) + len(meta), os.path.getmtime(meta_path))
+        self._evict()
+
+    def clear(self):
+        for key in list(self._load_index()):
+            self._remove(key)
+
+    def _paths(self, key):
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, key + ".jmx"), os.path.join(directory, key + ".json")
+
+    def _write_atomic(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _touch(self, key, *paths):
+        try:
+            for path in paths:
+                os.utime(path)
+        except OSError:
+            return
+        index = self._load_index()
+        if key in index:
+            index[key] = (index[key][0], os.path.getmtime(paths[-1]))
+
+    def _load_index(self):
+        """首次使用时扫描缓存目录，之后在内存中维护 键 -> (大小, 最近使用时间)"""
+        if self._index is None:
+            self._index = {}
+            if os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.is_dir():
+                        self._scan_bucket(entry.path)
+        return self._index
+
+    def _scan_bucket(self, bucket):
+        sizes = {}
+        for entry in os.scandir(bucket):
+            key, ext = os.path.splitext(entry.name)
+            if ext not in (".jmx", ".json"):
+                continue
+            stat = entry.stat()
+            size, used = sizes.get(key, (0, 0))
+            sizes[key] = (size + stat.st_size, max(used, stat.st_mtime))
+        self._index.update(sizes)
+
+    def _evict(self):
+        index = self._index
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(index, key=lambda k: index[k][1]):
+            if total <= self.max_bytes:
+                break
+            total -= index[key][0]
+            self._remove(key)
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"删除缓存 {path} 失败: {e}")
+        self._load_index().pop(key, None)
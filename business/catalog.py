@@ -0,0 +1,303 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+from functools import lru_cache
+
+from business.batch import run_tasks
+from business.cache import default_cache_dir, options_fingerprint
+from business.parser import JMeterParser, iter_element_pairs, owners
+from utils.helpers import keep_before_question_mark
+
+# 表结构变化时递增，旧的索引库会被清空重建
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS thread_groups (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT,
+    PRIMARY KEY (file_id, position)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    thread_group INTEGER,
+    name TEXT,
+    formatted_name TEXT,
+    PRIMARY KEY (file_id, position)
+);
+CREATE TABLE IF NOT EXISTS samplers (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    thread_group INTEGER,
+    transaction_position INTEGER,
+    name TEXT,
+    formatted_name TEXT,
+    method TEXT,
+    host TEXT,
+    path TEXT,
+    route TEXT,
+    PRIMARY KEY (file_id, position)
+);
+CREATE INDEX IF NOT EXISTS samplers_route ON samplers (route);
+CREATE INDEX IF NOT EXISTS samplers_host ON samplers (host);
+CREATE INDEX IF NOT EXISTS samplers_path ON samplers (path);
+"""
+
+# 查询结果的列，与 SELECT_SAMPLERS 的顺序一致
+RESULT_COLUMNS = ("file", "thread_group", "transaction", "transaction_formatted", "sampler", "formatted_name",
+                  "method", "host", "path")
+
+SELECT_SAMPLERS = """
+SELECT f.path, g.name, t.name, t.formatted_name, s.name, s.formatted_name, s.method, s.host, s.path
+FROM samplers s
+JOIN files f ON f.id = s.file_id
+LEFT JOIN thread_groups g ON g.file_id = s.file_id AND g.position = s.thread_group
+LEFT JOIN transactions t ON t.file_id = s.file_id AND t.position = s.transaction_position
+"""
+ORDER_BY = " ORDER BY f.path, s.position"
+
+
+def default_catalog_path():
+    return os.path.join(default_cache_dir(), "catalog.sqlite")
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _CatalogParser(JMeterParser):
+    """在转换前记下事务控制器与 HTTP 请求的原始名称，转换后两种名称都写入索引"""
+
+    def transform_tree(self, container, transaction=None):
+        self.original_names = {element: element.get("testname")
+                               for element in container.iter("TransactionController", "HTTPSamplerProxy")}
+        super().transform_tree(container, transaction)
+
+
+def is_thread_group(element):
+    # ThreadGroup、SetupThreadGroup、PostThreadGroup 以及各种插件线程组
+    return element.tag.endswith("ThreadGroup")
+
+
+def _string_prop(element, name):
+    for prop in element.iterchildren("stringProp"):
+        if prop.get("name") == name:
+            return prop.text
+    return None
+
+
+def index_file_task(jmx_file, known_digest, length, pattern):
+    """在工作进程中为单个文件生成索引行；内容与 known_digest 相同时只返回摘要"""
+    digest = file_digest(jmx_file)
+    if digest == known_digest:
+        return digest, None
+
+    parser = _CatalogParser(jmx_file, length, False, pattern, [])
+    if parser.root is None:
+        raise ValueError(parser.error)
+    original_names = getattr(parser, "original_names", {})
+    thread_groups, transactions, samplers = [], [], []
+    positions = {}
+
+    def enclosing(element):
+        thread_group = transaction = None
+        for owner in owners(element):
+            if transaction is None and owner.tag == "TransactionController":
+                transaction = positions.get(owner)
+            elif is_thread_group(owner):
+                thread_group = positions.get(owner)
+                break
+        return thread_group, transaction
+
+    for element, _ in iter_element_pairs(parser.root):
+        if is_thread_group(element):
+            positions[element] = len(thread_groups)
+            thread_groups.append((positions[element], element.get("testname")))
+        elif element.tag == "TransactionController":
+            thread_group, _ = enclosing(element)
+            positions[element] = len(transactions)
+            transactions.append((positions[element], thread_group,
+                                 original_names.get(element, element.get("testname")), element.get("testname")))
+        elif element.tag == "HTTPSamplerProxy":
+            thread_group, transaction = enclosing(element)
+            path = _string_prop(element, "HTTPSampler.path")
+            samplers.append((len(samplers), thread_group, transaction,
+                             original_names.get(element, element.get("testname")), element.get("testname"),
+                             _string_prop(element, "HTTPSampler.method"), _string_prop(element, "HTTPSampler.domain"),
+                             path, keep_before_question_mark(path) if path else path))
+    return digest, {"error": parser.error, "thread_groups": thread_groups, "transactions": transactions,
+                    "samplers": samplers}
+
+
+@lru_cache(maxsize=64)
+def _compile(pattern):
+    return re.compile(pattern)
+
+
+def _like_pattern(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class Catalog:
+    """JMX 文件集合的 SQLite 索引：文件、线程组、事务、HTTP 请求及其方法、主机、路径和格式化后的名称
+
+    refresh 按文件的修改时间与大小判断是否需要重新检查，内容哈希未变时不重新解析；解析选项
+    变化时全部重建。路径与主机查询走索引，正则只匹配去重后的路径，名称查询在 SQLite 内部扫描，
+    都不需要重新解析文件。
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_catalog_path()
+        directory = os.path.dirname(os.path.abspath(self.db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self._create_schema()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _create_schema(self):
+        version = None
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            version = row and row[0]
+        except sqlite3.OperationalError:
+            pass
+        if version is not None and version != str(SCHEMA_VERSION):
+            with self.conn:
+                for table in ("samplers", "transactions", "thread_groups", "files", "meta"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row and row[0]
+
+    def refresh(self, jmx_files, length=2, pattern="", workers=None, progress=None):
+        """把 jmx_files 同步到索引，并删除磁盘上已不存在的文件；返回 (重新索引数, 未变化数, 失败数)"""
+        fingerprint = options_fingerprint(length, False, pattern, [])
+        if self._get_meta("options") != fingerprint:
+            with self.conn:
+                self.conn.execute("DELETE FROM files")
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('options', ?)", (fingerprint,))
+
+        known = {path: (file_id, mtime_ns, size, digest) for file_id, path, mtime_ns, size, digest
+                 in self.conn.execute("SELECT id, path, mtime_ns, size, sha256 FROM files")}
+        with self.conn:
+            for path, (file_id, *_) in known.items():
+                if not os.path.exists(path):
+                    self.conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+        task_args = []
+        stats = {}
+        unchanged = 0
+        for jmx_file in dict.fromkeys(os.path.abspath(jmx_file) for jmx_file in jmx_files):
+            try:
+                stat = os.stat(jmx_file)
+            except OSError as e:
+                logging.warning(f"无法读取 {jmx_file}: {e}")
+                continue
+            stats[jmx_file] = (stat.st_mtime_ns, stat.st_size)
+            entry = known.get(jmx_file)
+            if entry is not None and entry[1:3] == stats[jmx_file]:
+                unchanged += 1
+                continue
+            task_args.append((jmx_file, entry[3] if entry else None, length, pattern))
+
+        results = run_tasks(index_file_task, task_args, workers, progress)
+        indexed = failed = 0
+        with self.conn:
+            for jmx_file, result, error in results:
+                mtime_ns, size = stats[jmx_file]
+                if error is not None:
+                    logging.error(f"索引 {jmx_file} 时出错: {error}")
+                    failed += 1
+                    # 记下失败的文件，未修改前不再重试
+                    self._replace_file(jmx_file, mtime_ns, size, "", str(error))
+                    continue
+                digest, rows = result
+                if rows is None:
+                    self.conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                                      (mtime_ns, size, jmx_file))
+                    unchanged += 1
+                    continue
+                file_id = self._replace_file(jmx_file, mtime_ns, size, digest, rows["error"])
+                self.conn.executemany("INSERT INTO thread_groups VALUES (?, ?, ?)",
+                                      [(file_id, *row) for row in rows["thread_groups"]])
+                self.conn.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)",
+                                      [(file_id, *row) for row in rows["transactions"]])
+                self.conn.executemany("INSERT INTO samplers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                      [(file_id, *row) for row in rows["samplers"]])
+                indexed += 1
+        return indexed, unchanged, failed
+
+    def _replace_file(self, path, mtime_ns, size, digest, error):
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        cursor = self.conn.execute("INSERT INTO files (path, mtime_ns, size, sha256, error) VALUES (?, ?, ?, ?, ?)",
+                                   (path, mtime_ns, size, digest, error))
+        return cursor.lastrowid
+
+    def _query(self, where, params):
+        cursor = self.conn.execute(SELECT_SAMPLERS + " WHERE " + where + ORDER_BY, params)
+        return [dict(zip(RESULT_COLUMNS, row)) for row in cursor]
+
+    def find_path(self, path):
+        """请求路径（忽略查询字符串）完全相同的 HTTP 请求"""
+        return self._query("s.route = ?", (keep_before_question_mark(path),))
+
+    def find_path_regex(self, pattern):
+        """请求路径匹配正则表达式（search 语义）的 HTTP 请求
+
+        不同计划中的路径大量重复，只对去重后的路径（走 samplers_path 索引）做正则匹配，
+        再按匹配到的路径查回对应的请求。
+        """
+        regex = _compile(pattern)
+        matched = [(path,) for (path,) in self.conn.execute("SELECT DISTINCT path FROM samplers WHERE path IS NOT NULL")
+                   if regex.search(path)]
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS matched_paths (path TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM temp.matched_paths")
+        self.conn.executemany("INSERT INTO temp.matched_paths VALUES (?)", matched)
+        return self._query("s.path IN (SELECT path FROM temp.matched_paths)", ())
+
+    def find_host(self, host):
+        return self._query("s.host = ?", (host,))
+
+    def find_name(self, text):
+        """原始名称或格式化后的名称中包含 text 的 HTTP 请求，以及名称包含 text 的事务下的全部请求"""
+        like = _like_pattern(text)
+        return self._query("s.name LIKE ?1 ESCAPE '\\' OR s.formatted_name LIKE ?1 ESCAPE '\\' "
+                           "OR t.name LIKE ?1 ESCAPE '\\' OR t.formatted_name LIKE ?1 ESCAPE '\\'", (like,))
+
+    def stats(self):
+        counts = {}
+        for table in ("files", "thread_groups", "transactions", "samplers"):
+            counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        counts["errors"] = self.conn.execute("SELECT COUNT(*) FROM files WHERE error IS NOT NULL").fetchone()[0]
+        return counts
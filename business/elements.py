@@ -0,0 +1,176 @@
+import csv
+import json
+import sys
+from array import array
+from contextlib import contextmanager
+
+TRANSACTION_CONTROLLER = "Transaction Controller"
+HTTP_REQUEST = "HTTP Request"
+
+# 元素类型只保存一个字节的类型码
+ELEMENT_TYPES = (TRANSACTION_CONTROLLER, HTTP_REQUEST)
+TYPE_CODES = {name: code for code, name in enumerate(ELEMENT_TYPES)}
+
+FIELDS = ("type", "number", "formatted_name")
+
+
+class TestElement:
+    """ElementTable 中的一行，迭代或下标访问时按需生成
+
+    仍支持 element["type"] 这样的字典式访问，兼容旧代码。
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, type, number, formatted_name):
+        self.type = type
+        self.number = number
+        self.formatted_name = formatted_name
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if isinstance(other, TestElement):
+            return self.as_tuple() == other.as_tuple()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TestElement({self.type!r}, {self.number}, {self.formatted_name!r})"
+
+    def as_tuple(self):
+        return self.type, self.number, self.formatted_name
+
+    def as_dict(self):
+        return {"type": self.type, "number": self.number, "formatted_name": self.formatted_name}
+
+    def format(self):
+        return f"{self.type} #{self.number}: {self.formatted_name}"
+
+
+class ElementTable:
+    """按列存储的解析结果：类型码、序号和 UTF-8 编码后首尾相接的名称
+
+    每个元素约占 9 字节加名称的 UTF-8 长度，而原来的字典列表每个元素需要字典、整数和字符串
+    三个对象。对象可以直接 pickle，在工作进程与主进程之间传递。
+    """
+
+    __slots__ = ("types", "numbers", "offsets", "names")
+
+    def __init__(self):
+        self.types = array("B")
+        self.numbers = array("I")
+        # 第 i 个名称为 names[offsets[i]:offsets[i + 1]]
+        self.offsets = array("I", [0])
+        self.names = bytearray()
+
+    @classmethod
+    def from_dicts(cls, elements):
+        table = cls()
+        for element in elements:
+            table.add(element["type"], element["number"], element["formatted_name"])
+        return table
+
+    def add(self, element_type, number, formatted_name):
+        self.types.append(TYPE_CODES[element_type])
+        self.numbers.append(number)
+        self.names += formatted_name.encode("utf-8")
+        self.offsets.append(len(self.names))
+
+    # 兼容列表接口
+    def append(self, element):
+        self.add(element["type"], element["number"], element["formatted_name"])
+
+    def __len__(self):
+        return len(self.types)
+
+    def __bool__(self):
+        return len(self.types) > 0
+
+    def _row(self, index):
+        name = self.names[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+        return TestElement(ELEMENT_TYPES[self.types[index]], self.numbers[index], name)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ElementTable index out of range")
+        return self._row(index)
+
+    def _slice(self, index):
+        start, stop, step = index.indices(len(self))
+        table = ElementTable()
+        if step == 1:
+            stop = max(start, stop)
+            base = self.offsets[start]
+            table.types = self.types[start:stop]
+            table.numbers = self.numbers[start:stop]
+            table.offsets = array("I", (offset - base for offset in self.offsets[start:stop + 1]))
+            table.names = self.names[base:self.offsets[stop]]
+            return table
+        for position in range(start, stop, step):
+            table.add(*self._row(position).as_tuple())
+        return table
+
+    def __iter__(self):
+        names = self.names.decode("utf-8") if self.names.isascii() else None
+        offsets = self.offsets
+        for index, (code, number) in enumerate(zip(self.types, self.numbers)):
+            start, end = offsets[index], offsets[index + 1]
+            name = names[start:end] if names is not None else self.names[start:end].decode("utf-8")
+            yield TestElement(ELEMENT_TYPES[code], number, name)
+
+    def __eq__(self, other):
+        if isinstance(other, ElementTable):
+            return (self.types == other.types and self.numbers == other.numbers
+                    and self.offsets == other.offsets and self.names == other.names)
+        if isinstance(other, list):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"<ElementTable {len(self)} elements>"
+
+    def count(self, element_type):
+        return self.types.count(TYPE_CODES[element_type])
+
+    def nbytes(self):
+        """各列占用的内存（字节）"""
+        return sum(sys.getsizeof(column) for column in (self.types, self.numbers, self.offsets, self.names))
+
+    def to_dicts(self):
+        return [element.as_dict() for element in self]
+
+    def format_lines(self):
+        return "\n".join(element.format() for element in self)
+
+    def to_csv(self, file):
+        """导出为 CSV，file 为路径或已打开的文本文件"""
+        with _open_text(file) as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(element.as_tuple() for element in self)
+
+    def to_jsonl(self, file):
+        """导出为 JSON Lines，每行一个元素"""
+        with _open_text(file) as f:
+            for element in self:
+                f.write(json.dumps(element.as_dict(), ensure_ascii=False))
+                f.write("\n")
+
+
+@contextmanager
+def _open_text(file):
+    """传入路径时打开并在结束时关闭，已打开的文件对象原样使用"""
+    if hasattr(file, "write"):
+        yield file
+        return
+    with open(file, "w", encoding="utf-8", newline="") as f:
+        yield f
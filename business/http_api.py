@@ -0,0 +1,322 @@
+"""本地 HTTP 任务接口，只依赖标准库的 asyncio
+
+    POST   /jobs?length=2&regex=...&remove_header=1&replace=OLD=>NEW&format=pretty
+           请求体为单个 JMX 文件或 tar 包（可压缩），X-File-Name 指定文件名；返回 202 与任务信息
+    GET    /jobs/<id>                    状态、进度、失败的文件与输出文件列表
+    GET    /jobs/<id>/outputs/<name>     单个输出文件
+    GET    /jobs/<id>/archive            全部输出打包为 ZIP，边压缩边返回
+    DELETE /jobs/<id>                    取消任务并删除其文件
+    GET    /healthz                      工作进程全部启动后返回 200
+
+replace 可重复指定，按顺序替换请求路径。上传也可以用 PUT（curl -T）。每个连接只处理一个请求。
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from business.archive import iter_zip
+from business.job_queue import DONE, JobQueue, QueueFull, ServiceJob
+from business.sessions import UploadTooLarge, receive_stream, safe_name, unique_path
+from business.writer import PRETTY, SAVE_MODES
+from utils.helpers import parse_replacements
+
+DEFAULT_MAX_BODY_BYTES = 200 * 1024 * 1024
+
+# tar 包解压后的总大小上限为请求体上限的倍数，防止压缩炸弹
+EXTRACT_RATIO = 10
+
+# 已结束的任务保留多久（秒），到期后连同文件一起删除
+DEFAULT_JOB_TTL = 3600
+EXPIRE_INTERVAL = 60
+
+READ_CHUNK = 64 * 1024
+MAX_HEADER_LINES = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def parse_options(query):
+    """把查询参数转换为 (length, remove_header, pattern, replacement_frames, mode)"""
+    def single(name, default):
+        values = query.get(name)
+        return values[-1] if values else default
+
+    try:
+        length = int(single("length", "2"))
+        if length < 1:
+            raise ValueError
+    except ValueError:
+        raise HTTPError(400, "length 应为大于 0 的整数")
+    remove_header = single("remove_header", "0").lower() in ("1", "true", "yes", "on")
+    pattern = single("regex", "")
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise HTTPError(400, f"无效的正则表达式: {e}")
+    mode = single("format", PRETTY)
+    if mode not in SAVE_MODES:
+        raise HTTPError(400, f"format 应为 {'、'.join(SAVE_MODES)} 之一")
+    try:
+        replacements = parse_replacements("\n".join(query.get("replace", [])))
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    return length, remove_header, pattern, replacements, mode
+
+
+def extract_jmx(tar_path, directory, limit):
+    """取出 tar 包中的全部 .jmx 文件，目录结构展开为同一层；只处理普通文件，不会写到 directory 之外"""
+    paths = []
+    total = 0
+    with tarfile.open(tar_path) as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.lower().endswith(".jmx"):
+                continue
+            total += member.size
+            if total > limit:
+                raise UploadTooLarge(f"tar 包解压后超过 {limit / 1024 / 1024:g} MB 的上限")
+            path = unique_path(directory, member.name)
+            with archive.extractfile(member) as source, open(path, "wb") as target:
+                shutil.copyfileobj(source, target)
+            paths.append(path)
+    return paths
+
+
+async def read_request_head(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("连接已关闭")
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "无效的请求行")
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return method.upper(), target, headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    raise HTTPError(431, "请求头过多")
+
+
+async def read_body(reader, length):
+    remaining = length
+    while remaining:
+        chunk = await reader.read(min(READ_CHUNK, remaining))
+        if not chunk:
+            raise HTTPError(400, "请求体不完整")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def response_head(status, headers):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer, status, body, headers=None):
+    data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    writer.write(response_head(status, {"Content-Type": "application/json; charset=utf-8",
+                                        "Content-Length": len(data), **(headers or {})}) + data)
+    await writer.drain()
+
+
+def attachment(name):
+    return f"attachment; filename*=UTF-8''{quote(name)}"
+
+
+class JobServer:
+    """接收任务的 HTTP 服务：上传边收边写到磁盘，任务交给 JobQueue 在常驻的工作进程中执行"""
+
+    def __init__(self, data_dir=None, workers=None, concurrency=2, max_body_bytes=DEFAULT_MAX_BODY_BYTES,
+                 job_ttl=DEFAULT_JOB_TTL):
+        self._own_dir = data_dir is None
+        self.data_dir = data_dir or tempfile.mkdtemp(prefix="pyjmeter-api-")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.queue = JobQueue(workers, concurrency)
+        self.max_body_bytes = max_body_bytes
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        self.server = None
+        self._janitor = None
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self, host="127.0.0.1", port=8765):
+        await self.queue.start()
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self._janitor = asyncio.create_task(self._expire_jobs())
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def close(self):
+        if self._janitor is not None:
+            self._janitor.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.queue.close()
+        if self._own_dir:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, target, headers = await read_request_head(reader)
+                await self.dispatch(method, target, headers, reader, writer)
+            except HTTPError as e:
+                await send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logging.error(f"处理请求时出错: {e}")
+            try:
+                await send_json(writer, 500, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def dispatch(self, method, target, headers, reader, writer):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        if parts == ["healthz"] and method == "GET":
+            if not self.queue.ready:
+                raise HTTPError(503, "工作进程尚未就绪")
+            await send_json(writer, 200, {"status": "ok", "queued": self.queue.queued})
+            return
+        if parts == ["jobs"]:
+            if method not in ("POST", "PUT"):
+                raise HTTPError(405, "只支持 POST 或 PUT")
+            await self.create_job(parse_qs(url.query, keep_blank_values=True), headers, reader, writer)
+            return
+        if len(parts) < 2 or parts[0] != "jobs" or parts[1] not in self.jobs:
+            raise HTTPError(404, "不存在")
+
+        job = self.jobs[parts[1]]
+        if len(parts) == 2 and method == "GET":
+            await send_json(writer, 200, self.describe(job))
+        elif len(parts) == 2 and method == "DELETE":
+            self.discard(job)
+            await send_json(writer, 200, {"id": job.id, "status": job.status})
+        elif len(parts) == 3 and parts[2] == "archive" and method == "GET":
+            await self.send_archive(job, writer)
+        elif len(parts) == 4 and parts[2] == "outputs" and method == "GET":
+            await self.send_output(job, parts[3], writer)
+        else:
+            raise HTTPError(404, "不存在")
+
+    async def create_job(self, query, headers, reader, writer):
+        try:
+            size = int(headers["content-length"])
+        except KeyError:
+            raise HTTPError(411, "需要 Content-Length")
+        except ValueError:
+            raise HTTPError(400, "无效的 Content-Length")
+        if size > self.max_body_bytes:
+            raise HTTPError(413, f"请求体超过 {self.max_body_bytes / 1024 / 1024:g} MB 的上限")
+        options = parse_options(query)
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+        job = ServiceJob([], None, *options)
+        job_dir = os.path.join(self.data_dir, job.id)
+        input_dir, job.output_dir = os.path.join(job_dir, "input"), os.path.join(job_dir, "output")
+        os.makedirs(input_dir)
+        os.makedirs(job.output_dir)
+        try:
+            upload = unique_path(job_dir, unquote(headers.get("x-file-name", "upload.jmx")))
+            try:
+                await receive_stream(read_body(reader, size), upload, self.max_body_bytes)
+                if await asyncio.to_thread(tarfile.is_tarfile, upload):
+                    job.jmx_files = await asyncio.to_thread(extract_jmx, upload, input_dir,
+                                                            self.max_body_bytes * EXTRACT_RATIO)
+                    os.remove(upload)
+                else:
+                    path = os.path.join(input_dir, safe_name(os.path.basename(upload)))
+                    os.replace(upload, path)
+                    job.jmx_files = [path]
+            except (UploadTooLarge, tarfile.TarError) as e:
+                raise HTTPError(413 if isinstance(e, UploadTooLarge) else 400, str(e))
+            if not job.jmx_files:
+                raise HTTPError(400, "tar 包中没有 .jmx 文件")
+            try:
+                self.queue.submit(job)
+            except QueueFull as e:
+                raise HTTPError(429, str(e))
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        self.jobs[job.id] = job
+        await send_json(writer, 202, self.describe(job), {"Location": f"/jobs/{job.id}"})
+
+    @staticmethod
+    def describe(job):
+        info = job.to_dict()
+        info["outputs"] = [name for name, _ in job.outputs()] if job.status == DONE else []
+        return info
+
+    async def send_output(self, job, name, writer):
+        outputs = dict(job.outputs()) if job.status == DONE else {}
+        if name not in outputs:
+            raise HTTPError(404, "输出文件不存在")
+        path = outputs[name]
+        writer.write(response_head(200, {"Content-Type": "application/xml", "Content-Length": os.path.getsize(path),
+                                         "Content-Disposition": attachment(name)}))
+        await writer.drain()
+        with open(path, "rb") as f:
+            await asyncio.get_running_loop().sendfile(writer.transport, f)
+
+    async def send_archive(self, job, writer):
+        if job.status != DONE:
+            raise HTTPError(409, "任务尚未完成")
+        # 不预先计算长度，以关闭连接表示结束；压缩在线程中进行，不阻塞事件循环
+        writer.write(response_head(200, {"Content-Type": "application/zip",
+                                         "Content-Disposition": attachment(f"jmx-{job.id[:8]}.zip")}))
+        chunks = iter_zip(job.outputs())
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            writer.write(chunk)
+            await writer.drain()
+
+    def discard(self, job):
+        """取消并移除任务；运行中的任务等当前文件转换结束后再删除文件"""
+        job.cancel()
+        self.jobs.pop(job.id, None)
+        asyncio.create_task(self._remove_files(job))
+
+    async def _remove_files(self, job):
+        while not job.finished:
+            await asyncio.sleep(0.1)
+        await asyncio.to_thread(shutil.rmtree, os.path.join(self.data_dir, job.id), True)
+
+    async def _expire_jobs(self):
+        while True:
+            await asyncio.sleep(EXPIRE_INTERVAL)
+            deadline = time.time() - self.job_ttl
+            for job in [job for job in self.jobs.values() if job.finished_at and job.finished_at < deadline]:
+                self.discard(job)
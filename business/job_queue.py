@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from business.batch import convert_file_task
+from business.writer import PRETTY
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class QueueFull(RuntimeError):
+    """排队中的任务已达上限"""
+
+
+def warm_up_worker():
+    """工作进程启动时提前导入解析相关模块并解析一个最小文档，任务不再承担这部分开销"""
+    from lxml import etree
+
+    import business.parser  # noqa: F401
+
+    etree.fromstring(b"<jmeterTestPlan><hashTree/></jmeterTestPlan>")
+
+
+class ServiceJob:
+    """一次批量转换：输入文件、解析选项、进度与每个文件的结果
+
+    字段只在事件循环线程中修改，界面可以直接读取。
+    """
+
+    def __init__(self, jmx_files, output_dir, length, remove_header, pattern, replacement_frames, mode=PRETTY):
+        self.id = uuid.uuid4().hex
+        self.jmx_files = list(jmx_files)
+        self.output_dir = output_dir
+        self.options = (length, remove_header, pattern, replacement_frames, mode)
+        self.status = QUEUED
+        self.done = 0
+        self.results = []
+        self.error = None
+        self.created = time.time()
+        self.elapsed = None
+        self.finished_at = None
+        self._cancelled = False
+
+    @property
+    def total(self):
+        return len(self.jmx_files)
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def failed(self):
+        return [(jmx_file, error) for jmx_file, _, error in self.results if error is not None]
+
+    def cancel(self):
+        self._cancelled = True
+        if self.status == QUEUED:
+            self.status = CANCELLED
+            self.finished_at = time.time()
+
+    def outputs(self):
+        """(压缩包内名称, 输出文件) 列表，只包含成功的文件"""
+        return [(os.path.basename(parsed.output_file), parsed.output_file)
+                for _, parsed, error in self.results if error is None]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "failed": [{"input": os.path.basename(jmx_file), "error": str(error)} for jmx_file, error in self.failed],
+            "error": self.error,
+            "elapsed": None if self.elapsed is None else round(self.elapsed, 3),
+        }
+
+
+class JobQueue:
+    """多个用户共享的异步任务队列
+
+    任务按提交顺序排队，最多 concurrency 个任务同时运行；文件在共享的进程池中转换，
+    事件循环只做等待，不会被解析阻塞。同时在进程池中的文件数有上限，多个任务交替取得
+    名额，大任务不会让后提交的小任务一直等待。工作进程在 start 时全部启动并预热，之后一直保留，
+    每个任务都不必再等待解释器启动和 lxml 导入。
+    """
+
+    def __init__(self, workers=None, concurrency=4, max_queued=100):
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.executor = None
+        self._queue = None
+        self._slots = None
+        self._consumers = []
+        self._ready = False
+
+    @property
+    def ready(self):
+        return self._ready
+
+    @property
+    def queued(self):
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def start(self, warm=True):
+        # 服务端进程里有事件循环和多个线程，工作进程统一用 spawn 启动，与 Windows 上的行为一致
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=warm_up_worker)
+        self._queue = asyncio.Queue(self.max_queued)
+        self._slots = asyncio.Semaphore(self.workers * 2)
+        if warm:
+            # 进程池按需启动进程；同时提交与进程数相同的空任务，让全部进程现在就启动
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid) for _ in range(self.workers)))
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.concurrency)]
+        self._ready = True
+
+    async def close(self):
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        self._ready = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, job):
+        if self._queue is None:
+            raise RuntimeError("任务队列尚未启动")
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"排队中的任务已达上限 {self.max_queued}，请稍后再试") from None
+        return job
+
+    async def _consume(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == QUEUED:
+                    await self.run(job)
+            except Exception as e:
+                logging.error(f"任务 {job.id} 出错: {e}")
+                job.status, job.error = FAILED, str(e)
+                job.finished_at = time.time()
+            finally:
+                self._queue.task_done()
+
+    async def run(self, job):
+        job.status = RUNNING
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        results = [None] * job.total
+
+        async def convert(index, jmx_file):
+            async with self._slots:
+                if job._cancelled:
+                    return
+                output_file = os.path.join(job.output_dir, os.path.basename(jmx_file))
+                try:
+                    parsed = await loop.run_in_executor(self.executor, convert_file_task, jmx_file, output_file,
+                                                        *job.options)
+                    results[index] = (jmx_file, parsed, None)
+                except Exception as e:
+                    results[index] = (jmx_file, None, e)
+                job.done += 1
+
+        await asyncio.gather(*(convert(index, jmx_file) for index, jmx_file in enumerate(job.jmx_files)))
+        job.results = [result for result in results if result is not None]
+        job.elapsed = time.perf_counter() - started
+        job.status = CANCELLED if job._cancelled else DONE
+        job.finished_at = time.time()
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+
+
+class JobCancelled(Exception):
+    """任务被用户取消"""
+
+
+class Job:
+    """一个后台任务的控制句柄：取消、暂停与继续
+
+    任务函数在适当的位置调用 checkpoint()：暂停时在此阻塞，取消后在此抛出 JobCancelled。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._done = threading.Event()
+        # 在界面线程中开始执行完成回调时置为 True：回调中可以提交下一个任务，而回调排队期间
+        # 仍算作运行中，新任务不会在旧结果交回之前开始
+        self.finished = False
+        self.result = None
+        self.error = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # 唤醒暂停中的任务，让它尽快退出
+        self._running.set()
+
+    def pause(self):
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def checkpoint(self):
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise JobCancelled(self.name)
+
+    def wait(self, timeout=None):
+        """等待任务结束，返回是否已结束"""
+        return self._done.wait(timeout)
+
+
+class JobEngine:
+    """在后台线程中运行耗时任务，进度和结果通过 dispatch 交回界面线程
+
+    dispatch(func) 由各界面实现，负责在其主循环中执行 func（如 Tk 的 after、wx.CallAfter）。
+    同一时间只运行一个任务，避免解析与保存同时修改结果集合。进度回调按 progress_interval
+    节流，大量小文件时不会塞满界面的事件队列。
+    """
+
+    def __init__(self, dispatch, progress_interval=0.05):
+        self.dispatch = dispatch
+        self.progress_interval = progress_interval
+        self.current = None
+
+    @property
+    def busy(self):
+        return self.current is not None and not self.current.finished
+
+    def submit(self, name, work, on_done=None, on_error=None, on_cancel=None, on_progress=None):
+        """在新线程中执行 work(job, progress)，progress(value, maximum) 可在任意线程中调用"""
+        if self.busy:
+            raise RuntimeError(f"任务 {self.current.name} 正在运行")
+        job = Job(name)
+        self.current = job
+        last_report = [0.0]
+
+        def progress(value, maximum):
+            if on_progress is None:
+                return
+            now = time.monotonic()
+            if value < maximum and now - last_report[0] < self.progress_interval:
+                return
+            last_report[0] = now
+            self.dispatch(lambda: on_progress(value, maximum))
+
+        def run():
+            try:
+                job.result = work(job, progress)
+            except JobCancelled:
+                job.error = JobCancelled(name)
+                callback = on_cancel and (lambda: on_cancel())
+            except Exception as e:
+                logging.error(f"任务 {name} 出错: {e}")
+                job.error = e
+                callback = on_error and (lambda: on_error(job.error))
+            else:
+                callback = on_done and (lambda: on_done(job.result))
+
+            def finish():
+                job.finished = True
+                if callback:
+                    callback()
+
+            try:
+                self.dispatch(finish)
+            except Exception:
+                # 界面已关闭等无法交回时不再执行回调，但不能让任务一直处于运行中
+                job.finished = True
+                raise
+            finally:
+                job._done.set()
+
+        threading.Thread(target=run, name=f"job-{name}", daemon=True).start()
+        return job
+
+    def cancel(self):
+        if self.busy:
+            self.current.cancel()
+
+    def wait(self, timeout=None):
+        return self.current is None or self.current.wait(timeout)
@@ -0,0 +1,310 @@
+"""流式分析 JMeter 的 CSV 结果文件（JTL），按标签汇总并按解析器生成的名称归入事务
+
+文件按块读取，每个标签只保留计数、合计与响应时间直方图，内存占用与文件大小无关。
+安装了 NumPy 时每块向量化计算，否则逐行累加，两种方式结果一致。
+"""
+import csv
+import gzip
+import math
+import re
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CHUNK_ROWS = 20000
+PERCENTILES = (50, 90, 95, 99)
+
+# 未写表头的 JTL 按 JMeter 默认的列顺序读取
+DEFAULT_COLUMNS = ("timeStamp", "elapsed", "label", "responseCode", "responseMessage", "threadName", "dataType",
+                   "success", "failureMessage", "bytes", "sentBytes", "grpThreads", "allThreads", "URL", "Latency",
+                   "IdleTime", "Connect")
+
+# 解析器生成的名称：事务为“事务_AA#原名称”，HTTP 请求为“AA_1#路径”，AA 相同的请求归入同一事务
+TRANSACTION_LABEL = re.compile(r"事务_([^#]+)#")
+SAMPLER_LABEL = re.compile(r"([^#_]+)_(\d+)#")
+
+# 响应时间直方图：小于 LINEAR_BUCKETS 毫秒的值精确记录，更大的值按 2 的幂分段，每段 HALF 个桶，
+# 百分位数的相对误差不超过 1/LINEAR_BUCKETS
+SUB_BITS = 8
+LINEAR_BUCKETS = 1 << SUB_BITS
+HALF = LINEAR_BUCKETS >> 1
+
+
+def bucket_index(value):
+    if value < LINEAR_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BITS
+    return LINEAR_BUCKETS + (shift - 1) * HALF + (value >> shift) - HALF
+
+
+def bucket_value(index):
+    """桶所代表的响应时间，取桶的中点"""
+    if index < LINEAR_BUCKETS:
+        return index
+    shift, offset = divmod(index - LINEAR_BUCKETS, HALF)
+    shift += 1
+    return ((offset + HALF) << shift) + (1 << shift >> 1)
+
+
+def bucket_indices(values):
+    """bucket_index 的向量化版本，values 为 int64 数组"""
+    values = numpy.maximum(values, 0)
+    large = values >= LINEAR_BUCKETS
+    # frexp 的指数即整数的二进制位数，int64 的毫秒数在 float64 中可以精确表示
+    shift = numpy.where(large, numpy.frexp(values)[1] - SUB_BITS, 0)
+    return numpy.where(large, LINEAR_BUCKETS + (shift - 1) * HALF + (values >> shift) - HALF, values)
+
+
+class LabelStats:
+    """一个标签的汇总：计数、失败数、响应时间合计与直方图、最早开始与最晚结束的时间戳"""
+
+    def __init__(self, label):
+        self.label = label
+        self.count = 0
+        self.errors = 0
+        self.total_elapsed = 0
+        self.min = None
+        self.max = None
+        self.first = None
+        self.last = None
+        self.histogram = {}
+        # 向量化计算时先累加在 NumPy 数组中（下标为桶），用到时再并入 histogram
+        self._dense = None
+
+    def add(self, timestamp, elapsed, success):
+        self.update(1, 0 if success else 1, elapsed, elapsed, elapsed, timestamp, timestamp + elapsed)
+        bucket = bucket_index(elapsed)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def update(self, count, errors, total_elapsed, minimum, maximum, first, last):
+        self.count += count
+        self.errors += errors
+        self.total_elapsed += total_elapsed
+        self.min = minimum if self.min is None else min(self.min, minimum)
+        self.max = maximum if self.max is None else max(self.max, maximum)
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+
+    def add_histogram(self, counts):
+        """累加 numpy.bincount 得到的桶计数"""
+        dense = self._dense
+        if dense is None or len(dense) < len(counts):
+            grown = numpy.zeros(len(counts), numpy.int64)
+            if dense is not None:
+                grown[:len(dense)] = dense
+            dense = self._dense = grown
+        dense[:len(counts)] += counts
+
+    def _fold(self):
+        dense = self._dense
+        if dense is None:
+            return
+        histogram = self.histogram
+        for bucket in numpy.flatnonzero(dense).tolist():
+            histogram[bucket] = histogram.get(bucket, 0) + int(dense[bucket])
+        self._dense = None
+
+    def merge(self, other):
+        if not other.count:
+            return
+        other._fold()
+        self.update(other.count, other.errors, other.total_elapsed, other.min, other.max, other.first, other.last)
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    def percentile(self, p):
+        """按最近秩取第 p 百分位的响应时间"""
+        if not self.count:
+            return None
+        self._fold()
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return min(max(bucket_value(bucket), self.min), self.max)
+        return self.max
+
+    @property
+    def throughput(self):
+        """每秒完成的请求数：计数除以最早开始到最晚结束的时长"""
+        if not self.count or self.last <= self.first:
+            return None
+        return self.count / ((self.last - self.first) / 1000)
+
+    def to_dict(self):
+        result = {
+            "label": self.label,
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else None,
+            "mean": round(self.total_elapsed / self.count, 1) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+        }
+        for p in PERCENTILES:
+            result[f"p{p}"] = self.percentile(p)
+        throughput = self.throughput
+        result["throughput"] = None if throughput is None else round(throughput, 3)
+        return result
+
+
+def _label_order(label):
+    match = SAMPLER_LABEL.match(label)
+    return (0, int(match.group(2)), label) if match else (1, 0, label)
+
+
+def _prefix_order(prefix):
+    # 事务名按 AA、AB、…、ZZ、AAA 的顺序，与解析时的分配顺序一致
+    return (prefix is None, len(prefix or ""), prefix or "")
+
+
+def open_results(path):
+    """以文本方式打开结果文件，.gz 结尾时边读边解压"""
+    if path.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8-sig", errors="replace", newline="")
+
+
+class JTLAnalyzer:
+    """按标签汇总一个或多个 JTL 文件
+
+    use_numpy 为 None 时已安装 NumPy 就使用；无法转换的行（如写了一半的最后一行）跳过并计入 skipped。
+    """
+
+    def __init__(self, chunk_rows=CHUNK_ROWS, use_numpy=None):
+        if use_numpy and numpy is None:
+            raise RuntimeError("未安装 NumPy")
+        self.chunk_rows = chunk_rows
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        self.labels = {}
+        self.rows = 0
+        self.skipped = 0
+
+    def add_file(self, path):
+        with open_results(path) as f:
+            self.feed(f)
+
+    def feed(self, stream):
+        reader = csv.reader(stream)
+        first = next(reader, None)
+        if first is None:
+            return
+        if first and first[0].strip().lstrip("-").isdigit():
+            columns, pending = DEFAULT_COLUMNS, [first]
+        else:
+            columns, pending = first, []
+        try:
+            positions = tuple(columns.index(name) for name in ("timeStamp", "elapsed", "label", "success"))
+        except ValueError:
+            raise ValueError("结果文件缺少 timeStamp、elapsed、label 或 success 列") from None
+
+        width = len(columns)
+        add_chunk = self._add_chunk_numpy if self.use_numpy else self._add_rows
+        while True:
+            rows = pending + list(islice(reader, self.chunk_rows - len(pending)))
+            if not rows:
+                break
+            add_chunk(rows, positions, width)
+            # 读取下一块之前释放这一块，内存中最多只有一块
+            pending = rows = []
+
+    def _stats(self, label):
+        stats = self.labels.get(label)
+        if stats is None:
+            stats = self.labels[label] = LabelStats(label)
+        return stats
+
+    def _add_rows(self, rows, positions, width=None):
+        ts_column, elapsed_column, label_column, success_column = positions
+        for row in rows:
+            try:
+                timestamp, elapsed = int(row[ts_column]), int(row[elapsed_column])
+                label, success = row[label_column], row[success_column] == "true"
+            except (ValueError, IndexError):
+                self.skipped += 1
+                continue
+            self._stats(label).add(timestamp, elapsed, success)
+            self.rows += 1
+
+    def _add_chunk_numpy(self, rows, positions, width):
+        # 列数不齐的行（如写了一半的最后一行）单独逐行处理；这一块有无法转换的值时整块逐行处理
+        if len(set(map(len, rows))) != 1 or len(rows[0]) != width:
+            self._add_rows([row for row in rows if len(row) != width], positions)
+            rows = [row for row in rows if len(row) == width]
+            if not rows:
+                return
+        # 只取出需要的四列；字符串转整数用 int 比 NumPy 的 astype 快
+        timestamps, elapsed, labels, successes = zip(*map(itemgetter(*positions), rows))
+        try:
+            timestamps = numpy.fromiter(map(int, timestamps), numpy.int64, len(rows))
+            elapsed = numpy.fromiter(map(int, elapsed), numpy.int64, len(rows))
+        except ValueError:
+            return self._add_rows(rows, positions)
+        failed = numpy.array(successes) != "true"
+        labels, codes = numpy.unique(numpy.array(labels), return_inverse=True)
+        size = len(labels)
+
+        counts = numpy.bincount(codes, minlength=size)
+        errors = numpy.bincount(codes, weights=failed, minlength=size)
+        totals = numpy.bincount(codes, weights=elapsed, minlength=size)
+        minimum = numpy.full(size, numpy.iinfo(numpy.int64).max)
+        maximum = numpy.full(size, numpy.iinfo(numpy.int64).min)
+        first = minimum.copy()
+        last = maximum.copy()
+        numpy.minimum.at(minimum, codes, elapsed)
+        numpy.maximum.at(maximum, codes, elapsed)
+        numpy.minimum.at(first, codes, timestamps)
+        numpy.maximum.at(last, codes, timestamps + elapsed)
+
+        all_stats = [self._stats(str(label)) for label in labels]
+        for index, stats in enumerate(all_stats):
+            stats.update(int(counts[index]), int(errors[index]), int(totals[index]), int(minimum[index]),
+                         int(maximum[index]), int(first[index]), int(last[index]))
+
+        # 按标签排好序后，每个标签的桶计数各做一次 bincount
+        sorted_buckets = bucket_indices(elapsed)[numpy.argsort(codes, kind="stable")]
+        start = 0
+        for stats, end in zip(all_stats, numpy.cumsum(counts).tolist()):
+            stats.add_histogram(numpy.bincount(sorted_buckets[start:end]))
+            start = end
+        self.rows += len(rows)
+
+    def total(self):
+        total = LabelStats("TOTAL")
+        for stats in self.labels.values():
+            total.merge(stats)
+        return total
+
+    def groups(self):
+        """按事务分组：[{"prefix", "transactions", "samplers"}]，不符合命名规则的标签归入 prefix 为 None 的组"""
+        groups = {}
+        for label, stats in self.labels.items():
+            match = TRANSACTION_LABEL.match(label)
+            if match:
+                group = groups.setdefault(match.group(1), {"transactions": [], "samplers": []})
+                group["transactions"].append(stats)
+                continue
+            match = SAMPLER_LABEL.match(label)
+            group = groups.setdefault(match.group(1) if match else None, {"transactions": [], "samplers": []})
+            group["samplers"].append(stats)
+
+        result = []
+        for prefix in sorted(groups, key=_prefix_order):
+            group = groups[prefix]
+            samplers = sorted(group["samplers"], key=lambda stats: _label_order(stats.label))
+            result.append({
+                "prefix": prefix,
+                # 同一前缀一般只有一个事务；计划修改过时可能有多个名称，按标签排序逐个列出
+                "transactions": [stats.to_dict() for stats in sorted(group["transactions"],
+                                                                     key=lambda stats: stats.label)],
+                "samplers": [stats.to_dict() for stats in samplers],
+            })
+        return result
+
+    def to_dict(self):
+        return {"rows": self.rows, "skipped": self.skipped, "groups": self.groups(), "total": self.total().to_dict()}
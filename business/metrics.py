@@ -0,0 +1,154 @@
+import json
+import logging
+import re
+
+from business.writer import atomic_path
+
+# 各阶段耗时：parse 为 XML 解析，transform 为整个转换过程，xpath、regex（名称规整与路径替换）、
+# headers（移除 HeaderManager）是 transform 的组成部分，serialize 为序列化，write 为批量写出
+PHASES = ("parse", "transform", "xpath", "regex", "headers", "serialize", "write")
+COUNTERS = ("files", "transactions", "samplers", "headers_removed", "bytes_in", "bytes_out")
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+class ParseMetrics:
+    """解析过程的分阶段计时与计数
+
+    解析器只在传入 metrics 时才计时，未启用时热路径上只多一次 None 判断。对象可以跨进程传递，
+    批量解析时每个工作进程各自统计，再用 merge 汇总。
+    """
+
+    def __init__(self):
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # 每个文件的总耗时，用于找出最慢的文件
+        self.file_times = {}
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] += seconds
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def add_file_time(self, jmx_file, seconds):
+        self.file_times[jmx_file] = self.file_times.get(jmx_file, 0.0) + seconds
+
+    @property
+    def slowest(self):
+        """(文件, 耗时) 或 None"""
+        return max(self.file_times.items(), key=lambda item: item[1], default=None)
+
+    def merge(self, other):
+        for phase, seconds in other.timings.items():
+            self.timings[phase] += seconds
+        for name, value in other.counters.items():
+            self.counters[name] += value
+        for jmx_file, seconds in other.file_times.items():
+            self.add_file_time(jmx_file, seconds)
+
+    def to_dict(self):
+        slowest = self.slowest
+        return {
+            "timings": {phase: round(seconds, 6) for phase, seconds in self.timings.items()},
+            "counters": dict(self.counters),
+            "slowest": None if slowest is None else {"file": slowest[0], "seconds": round(slowest[1], 6)},
+        }
+
+
+class JSONSink:
+    """把统计结果写成 JSON 报告"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, metrics):
+        with atomic_path(self.path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(metrics.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+class PrometheusSink:
+    """写成 Prometheus 文本格式，可交给 node_exporter 的 textfile collector 采集
+
+    文件先写到临时文件再替换，采集时不会读到写了一半的内容。
+    """
+
+    def __init__(self, path, prefix="jmx_parser"):
+        self.path = path
+        self.prefix = prefix
+
+    def write(self, metrics):
+        prefix = self.prefix
+        lines = [
+            f"# HELP {prefix}_phase_seconds_total 各阶段累计耗时（秒）",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        lines += [f'{prefix}_phase_seconds_total{{phase="{phase}"}} {seconds:.6f}'
+                  for phase, seconds in metrics.timings.items()]
+        for name, value in metrics.counters.items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        slowest = metrics.slowest
+        if slowest is not None:
+            lines.append(f"# HELP {prefix}_slowest_file_seconds 最慢的单个文件的耗时（秒）")
+            lines.append(f"# TYPE {prefix}_slowest_file_seconds gauge")
+            lines.append(f'{prefix}_slowest_file_seconds{{file="{_escape_label(slowest[0])}"}} {slowest[1]:.6f}')
+        with atomic_path(self.path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+
+class ProfileSink:
+    """对最慢的文件重新解析一遍并记录性能剖析
+
+    parse(jmx_file) 按批处理时的选项重新处理一个文件。cprofile 写出 pstats 文件，可用
+    snakeviz 等工具查看；pyinstrument 写出 HTML，未安装时退回 cprofile。
+    """
+
+    def __init__(self, path, parse, profiler="cprofile"):
+        if profiler not in PROFILERS:
+            raise ValueError(f"未知的剖析工具: {profiler}")
+        self.path = path
+        self.parse = parse
+        self.profiler = profiler
+
+    def write(self, metrics):
+        slowest = metrics.slowest
+        if slowest is None:
+            return
+        jmx_file = slowest[0]
+        if self.profiler == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logging.warning("未安装 pyinstrument，改用 cProfile")
+            else:
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    self.parse(jmx_file)
+                finally:
+                    profiler.stop()
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+                return
+
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.runcall(self.parse, jmx_file)
+        profile.dump_stats(self.path)
+
+
+def _escape_label(value):
+    return re.sub(r'(["\\])', r"\\\1", value).replace("\n", "\\n")
+
+
+def export_metrics(metrics, sinks):
+    """依次写出到各个 sink，单个 sink 失败只记录日志"""
+    for sink in sinks:
+        try:
+            sink.write(metrics)
+        except Exception as e:
+            logging.error(f"写出统计结果到 {sink.path} 时出错: {e}")
@@ -0,0 +1,121 @@
+import logging
+import string
+
+
+class NameAllocator:
+    """按序号直接计算事务名，不预先生成名称列表
+
+    子类实现 capacity 和 _format；序号从 0 开始。超出容量时，auto_grow=True 会自动
+    增加名称长度继续编号，否则记录一次警告并返回 None（调用方跳过重命名）。
+    """
+
+    def __init__(self, length, auto_grow=False):
+        if length < 1:
+            raise ValueError("名称长度必须大于0")
+        self.length = length
+        self.auto_grow = auto_grow
+        self._warned = False
+
+    def capacity(self, length):
+        raise NotImplementedError("capacity must be implemented in subclass")
+
+    def _format(self, index, length):
+        raise NotImplementedError("_format must be implemented in subclass")
+
+    def name(self, index):
+        length = self.length
+        capacity = self.capacity(length)
+        if index < capacity:
+            return self._format(index, length)
+
+        if not self.auto_grow:
+            self._warn(f"事务数量超过名称容量 {capacity}，其余事务将不会被重命名")
+            return None
+
+        self._warn(f"事务数量超过名称容量 {capacity}，自动增加名称长度")
+        return self._format_grown(index)
+
+    def _format_grown(self, index):
+        # 用完当前长度的全部名称后，从更长一级的第一个名称继续
+        length = self.length
+        capacity = self.capacity(length)
+        while index >= capacity:
+            index -= capacity
+            length += 1
+            capacity = self.capacity(length)
+        return self._format(index, length)
+
+    def __getitem__(self, index):
+        if index < 0:
+            raise IndexError(index)
+        name = self.name(index)
+        if name is None:
+            raise IndexError(index)
+        return name
+
+    def __len__(self):
+        return self.capacity(self.length)
+
+    def __iter__(self):
+        # 遍历只到当前长度的容量为止，不会在边界上触发超出容量的警告
+        length = self.length
+        return (self._format(index, length) for index in range(self.capacity(length)))
+
+    def _warn(self, message):
+        if not self._warned:
+            logging.warning(message)
+            self._warned = True
+
+
+class AlphabetNameAllocator(NameAllocator):
+    """定长字母组合：AA, AB, ..., ZZ，顺序与 itertools.product 相同"""
+
+    def __init__(self, length=2, alphabet=string.ascii_uppercase, auto_grow=False):
+        super().__init__(length, auto_grow)
+        if len(alphabet) < 2 or len(set(alphabet)) != len(alphabet):
+            raise ValueError("字母表至少包含两个不重复的字符")
+        self.alphabet = alphabet
+
+    def capacity(self, length):
+        return len(self.alphabet) ** length
+
+    def _format(self, index, length):
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(length):
+            index, digit = divmod(index, base)
+            chars.append(self.alphabet[digit])
+        return "".join(reversed(chars))
+
+
+class NumericNameAllocator(NameAllocator):
+    """补零数字：01, 02, ..., 99（默认从 1 开始编号）"""
+
+    def __init__(self, length=2, start=1, auto_grow=False):
+        super().__init__(length, auto_grow)
+        if not 0 <= start < 10 ** length:
+            raise ValueError(f"起始编号应在 0 到 {10 ** length - 1} 之间")
+        self.start = start
+
+    def capacity(self, length):
+        return 10 ** length - self.start
+
+    def _format(self, index, length):
+        return str(index + self.start).zfill(length)
+
+    def _format_grown(self, index):
+        return str(index + self.start)
+
+
+class PrefixNameAllocator(NumericNameAllocator):
+    """前缀加计数：T01, T02, ...；计数超出位数时自动加宽"""
+
+    def __init__(self, prefix="T", length=2, start=1):
+        super().__init__(length, start, auto_grow=True)
+        self.prefix = prefix
+
+    def _format(self, index, length):
+        return self.prefix + super()._format(index, length)
+
+    def _format_grown(self, index):
+        return self.prefix + super()._format_grown(index)
@@ -1,86 +1,309 @@
 import logging
-import string
-from itertools import product
+import os
+from time import perf_counter
 
 from lxml import etree
 
+from business.elements import ElementTable, HTTP_REQUEST, TRANSACTION_CONTROLLER
+from business.naming import AlphabetNameAllocator
+from business.rewriter import compile_rewriter
+from business.writer import PATCH, PRETTY, save_atomic, write_tree
 from utils.helpers import keep_after_regex, keep_before_question_mark, keep_after_hash
 
+# 预编译的选择器，避免 lxml 在循环中反复编译 XPath 字符串
+select_path_prop = etree.XPath("./stringProp[@name='HTTPSampler.path']")
+
+
+def following_hash_tree(element):
+    """JMX 中每个元素的子元素都放在紧随其后的 hashTree 里，返回该 hashTree"""
+    sibling = element.getnext()
+    while sibling is not None and sibling.tag != "hashTree":
+        sibling = sibling.getnext()
+    return sibling
+
+
+def owners(element):
+    """由近及远返回 element 所在的各层父元素；JMX 中父元素是其子元素所在 hashTree 的前一个兄弟"""
+    hash_tree = element.getparent()
+    while hash_tree is not None and hash_tree.tag == "hashTree":
+        owner = hash_tree.getprevious()
+        while owner is not None and not isinstance(owner.tag, str):
+            owner = owner.getprevious()
+        if owner is None or owner.tag == "hashTree":
+            return
+        yield owner
+        hash_tree = owner.getparent()
+
+
+def iter_element_pairs(container):
+    """深度优先遍历 (元素, 其后的 hashTree)，顺序与 .//* 的文档顺序一致
+
+    不属于任何元素的 hashTree（如根节点下的第一个）会直接展开。每一层在进入前先取出
+    子元素列表，遍历过程中删除元素不影响后续访问，已删除的元素及其子树不再访问。
+    """
+    stack = [iter(list(container))]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+        if not isinstance(child.tag, str) or child.getparent() is None:
+            continue
+        if child.tag == "hashTree":
+            stack.append(iter(list(child)))
+            continue
+        hash_tree = child.getnext()
+        if hash_tree is not None and hash_tree.tag != "hashTree":
+            hash_tree = None
+        yield child, hash_tree
+
+
+class TransactionContext:
+    """遍历时所在的事务：事务控制器、格式化后的事务名以及下一个 HTTP 请求的序号"""
+    __slots__ = ("controller", "name", "http_counter")
+
+    def __init__(self, controller, name):
+        self.controller = controller
+        self.name = name
+        self.http_counter = 1
+
 
 class JMeterParser:
-    def __init__(self, jmx_file, length, remove_header, pattern, replacement_frames):
+    def __init__(self, jmx_file, length, remove_header, pattern, replacement_frames, name_allocator=None,
+                 metrics=None, track_edits=False, rules=None):
         self.jmx_file = jmx_file
-        self.test_elements = []
+        # business.rules.RuleSet，在内置的转换之后对每个元素执行；rule_run 为这次解析的规则执行状态
+        self.rules = rules
+        self.rule_run = None
+        # 传入 business.metrics.ParseMetrics 时记录各阶段耗时与计数
+        self.metrics = metrics
+        # 为 True 时在转换前记下可能修改的元素，才能以 patch 格式保存
+        self.track_edits = track_edits
+        self.edits = None
+        self.test_elements = ElementTable()
         self.remove_header = remove_header
         self.pattern = pattern
         self.replacement_frames = replacement_frames
+        self.path_rewriter = compile_rewriter(replacement_frames)
+        self.name_allocator = name_allocator
+        self.root = None
+        self.error = None
         self.load_jmx(length)
 
     def load_jmx(self, length):
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter()
         try:
             tree = etree.parse(self.jmx_file)
             self.root = tree.getroot()
-            transaction_counter = 0
-
-            transaction_names = self.generate_transaction_names(length)
-
-            for transaction_controller in self.root.xpath(".//TransactionController"):
-                name = transaction_controller.get("testname")
-                transaction_counter += 1
-
-                if transaction_counter <= len(transaction_names):
-                    transaction_name = transaction_names[transaction_counter - 1]
-                    format_name = f"事务_{transaction_name}#{keep_after_hash(name)}"
-                    transaction_controller.set("testname", format_name)
-                    self.test_elements.append({
-                        "type": "Transaction Controller",
-                        "number": transaction_counter,
-                        "formatted_name": format_name,
-                    })
-
-                http_counter = 1
-
-                for http_element in transaction_controller.xpath("./following-sibling::hashTree[1]/HTTPSamplerProxy"):
-                    if self.remove_header:
-                        for hash_tree in http_element.xpath("./following-sibling::hashTree[1]"):
-                            for header in hash_tree.xpath("./HeaderManager"):
-                                if len(header):
-                                    hash_tree.remove(header.getnext())
-                                    hash_tree.remove(header)
-
-                    if "receiveHeartBeat.do" in http_element.xpath("./stringProp[@name='HTTPSampler.path']"):
-                        transaction_controller.remove(http_element)
-                    else:
-                        http_name = http_element.get("testname")
-                        if self.pattern:
-                            http_name = keep_after_regex(self.pattern, http_name)
-                        http_formatted_name = f"{transaction_name}_{http_counter}#{keep_before_question_mark(keep_after_hash(http_name))}"
-                        http_element.set("testname", http_formatted_name)
-                        self.test_elements.append({
-                            "type": "HTTP Request",
-                            "number": http_counter,
-                            "formatted_name": http_formatted_name,
-                        })
-
-                        url_prop_element = http_element.xpath("./stringProp[@name='HTTPSampler.path']")[0]
-                        for old_value, new_value in self.replacement_frames:
-                            url_prop_element.text = url_prop_element.text.replace(old_value, new_value)
-
-                    http_counter += 1
+            if self.track_edits and not self.rules:
+                from business.patcher import EditRecorder
+                self.edits = EditRecorder(self.root, tree.docinfo.encoding)
+            if metrics is not None:
+                parsed = perf_counter()
+                metrics.add_time("parse", parsed - started)
+            self.start_transform(length)
+            self.transform_tree(self.root)
+            if metrics is not None:
+                metrics.add_time("transform", perf_counter() - parsed)
 
         except Exception as e:
+            self.error = str(e)
             logging.error(f"Error parsing JMX file: {e}")
 
+        if metrics is not None:
+            self.record_file(perf_counter() - started)
+
+    def record_file(self, seconds):
+        metrics = self.metrics
+        metrics.count("files")
+        try:
+            metrics.count("bytes_in", os.path.getsize(self.jmx_file))
+        except OSError:
+            pass
+        metrics.add_file_time(self.jmx_file, seconds)
+
+    def start_transform(self, length):
+        """重置事务计数器，解析前调用一次"""
+        self.transaction_counter = 0
+        self.transaction_name = None
+        if self.name_allocator is None:
+            self.name_allocator = AlphabetNameAllocator(length)
+        self.rule_run = self.rules.start() if self.rules else None
+
+    def transform_tree(self, container, transaction=None):
+        """按文档顺序一次遍历 container 下的全部元素，转换事务控制器与 HTTP 请求并执行规则
+
+        进入事务控制器的 hashTree 时压入该事务的上下文，其下任意层逻辑控制器中的 HTTP 请求
+        都按最内层的事务编号，离开 hashTree 即回到外层事务。transaction 为 container 所在
+        事务的上下文，不在事务中的 HTTP 请求保持不变。
+        """
+        rules = self.rule_run
+        stack = [(iter(list(container)), transaction)]
+        entered = None
+        while stack:
+            children, context = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            if not isinstance(child.tag, str) or child.getparent() is None:
+                continue
+            if child.tag == "hashTree":
+                if entered is not None and entered[0] is child:
+                    context = entered[1]
+                stack.append((iter(list(child)), context))
+                continue
+            hash_tree = child.getnext()
+            if hash_tree is not None and hash_tree.tag != "hashTree":
+                hash_tree = None
+            if child.tag == "TransactionController":
+                entered = (hash_tree, self.transform_transaction(child, hash_tree))
+            elif child.tag == "HTTPSamplerProxy" and context is not None:
+                self.transform_sampler(child, context)
+            if rules is not None:
+                rules.visit(child, hash_tree)
+
+    def transform_transaction(self, transaction_controller, hash_tree):
+        """重命名一个事务控制器，返回其下 HTTP 请求使用的事务上下文"""
+        name = transaction_controller.get("testname")
+        self.transaction_counter += 1
+
+        transaction_name = self.name_allocator.name(self.transaction_counter - 1)
+        if transaction_name is not None:
+            self.transaction_name = transaction_name
+            format_name = f"事务_{self.transaction_name}#{keep_after_hash(name)}"
+            transaction_controller.set("testname", format_name)
+            self.test_elements.add(TRANSACTION_CONTROLLER, self.transaction_counter, format_name)
+            if self.metrics is not None:
+                self.metrics.count("transactions")
+        return TransactionContext(transaction_controller, self.transaction_name)
+
+    def transform_sampler(self, http_element, context):
+        """按所属事务重命名一个 HTTP 请求并改写其路径"""
+        http_counter = context.http_counter
+        context.http_counter += 1
+        metrics = self.metrics
+
+        if self.remove_header:
+            if metrics is None:
+                self.remove_headers(http_element)
+            else:
+                started = perf_counter()
+                metrics.count("headers_removed", self.remove_headers(http_element))
+                metrics.add_time("headers", perf_counter() - started)
+
+        if metrics is None:
+            path_elements = select_path_prop(http_element)
+        else:
+            started = perf_counter()
+            path_elements = select_path_prop(http_element)
+            metrics.add_time("xpath", perf_counter() - started)
+
+        if "receiveHeartBeat.do" in path_elements:
+            context.controller.remove(http_element)
+            return
+
+        if metrics is not None:
+            started = perf_counter()
+        http_name = http_element.get("testname")
+        if self.pattern:
+            http_name = keep_after_regex(self.pattern, http_name)
+        http_formatted_name = f"{context.name}_{http_counter}#{keep_before_question_mark(keep_after_hash(http_name))}"
+        http_element.set("testname", http_formatted_name)
+        self.test_elements.add(HTTP_REQUEST, http_counter, http_formatted_name)
+
+        # 没有路径属性的请求（如 Sampler.jmx 中的示例）只重命名
+        if path_elements and self.path_rewriter and path_elements[0].text is not None:
+            path_elements[0].text = self.path_rewriter.rewrite(path_elements[0].text)
+        if metrics is not None:
+            metrics.add_time("regex", perf_counter() - started)
+            metrics.count("samplers")
+
+    @staticmethod
+    def remove_headers(http_element):
+        """移除 HTTP 请求 hashTree 中的 HeaderManager，返回移除的个数"""
+        removed = 0
+        sampler_tree = following_hash_tree(http_element)
+        if sampler_tree is not None:
+            for header in sampler_tree.findall("HeaderManager"):
+                if len(header):
+                    sampler_tree.remove(header.getnext())
+                    sampler_tree.remove(header)
+                    removed += 1
+        return removed
+
     @staticmethod
     def generate_transaction_names(length=2):
-        letters = string.ascii_uppercase
-        return [''.join(combination) for combination in product(letters, repeat=length)]
+        # 兼容旧接口：返回按需计算名称的序列，不再一次性生成全部组合
+        return AlphabetNameAllocator(length)
+
+    def to_bytes(self, pretty=True):
+        """序列化后的内容；pretty 为 False 时保留原文件的空白，与 preserve 格式一致"""
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter()
+        content = etree.tostring(etree.ElementTree(self.root), pretty_print=pretty, xml_declaration=True,
+                                 encoding="UTF-8")
+        if metrics is not None:
+            self.record_output(perf_counter() - started, len(content))
+        return content
+
+    def to_patched_bytes(self):
+        """patch 格式的内容：原文件中只替换被修改的部分；无法定位修改处时退回 pretty 格式"""
+        from business.patcher import PatchError, patched_bytes
+
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter()
+        try:
+            content = patched_bytes(self.jmx_file, self._recorded_edits())
+        except PatchError as e:
+            logging.warning(f"无法按修改处写出 {self.jmx_file}，改为完整序列化: {e}")
+            return self.to_bytes()
+        if metrics is not None:
+            self.record_output(perf_counter() - started, len(content))
+        return content
+
+    def write_jmx(self, output_file, mode=PRETTY, verify=False, fsync=False):
+        """写到同目录的临时文件后再替换 output_file，mode 见 business.writer.SAVE_MODES；出错时抛出异常"""
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter()
+        if mode == PATCH:
+            save_atomic(self._write_patched, output_file, verify, fsync)
+        else:
+            save_atomic(lambda path: write_tree(self.root, path, mode), output_file, verify, fsync)
+        if metrics is not None:
+            self.record_output(perf_counter() - started, os.path.getsize(output_file))
+
+    def _write_patched(self, path):
+        from business.patcher import PatchError, write_patched
+
+        try:
+            write_patched(self.jmx_file, self._recorded_edits(), path)
+        except PatchError as e:
+            logging.warning(f"无法按修改处写出 {self.jmx_file}，改为完整序列化: {e}")
+            write_tree(self.root, path, PRETTY)
+
+    def _recorded_edits(self):
+        if self.rules:
+            from business.patcher import PatchError
+            raise PatchError("转换规则可能修改任意内容，不支持按修改处写出")
+        if self.edits is None:
+            raise ValueError("patch 格式需要在解析时指定 track_edits=True")
+        return self.edits
+
+    def record_output(self, seconds, size):
+        self.metrics.add_time("serialize", seconds)
+        self.metrics.count("bytes_out", size)
+        self.metrics.add_file_time(self.jmx_file, seconds)
 
-    def save_jmx(self, output_file):
+    def save_jmx(self, output_file, mode=PRETTY, verify=False, fsync=False):
         try:
-            tree = etree.ElementTree(self.root)
-            tree.write(output_file, pretty_print=True, xml_declaration=True, encoding="UTF-8")
+            self.write_jmx(output_file, mode, verify, fsync)
             return True
         except Exception as e:
             logging.error(f"Error saving JMX file: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,212 @@
+import html
+import mmap
+import re
+
+from business.parser import following_hash_tree, select_path_prop
+
+# 转换过程中可能被修改或删除的元素
+EDITABLE_TAGS = ("TransactionController", "HTTPSamplerProxy", "HeaderManager")
+
+START_TAG = re.compile(rb"<([^\s/>]+)((?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>")
+TESTNAME = re.compile(rb"\stestname\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+PATH_PROP = re.compile(rb"<stringProp\s[^>]*?name\s*=\s*([\"'])HTTPSampler\.path\1[^>]*?(/?)>")
+HASH_TREE_TAG = re.compile(rb"<(/?)hashTree\b[^>]*?(/?)>")
+
+# 跳过注释与 CDATA 中看起来像标签的内容
+SKIPPED_SECTIONS = ((b"<!--", b"-->"), (b"<![CDATA[", b"]]>"))
+
+
+class PatchError(ValueError):
+    """无法在原文件中定位要修改的内容"""
+
+
+class EditRecorder:
+    """转换前记下可能被修改的元素及其原始值，保存时与转换后的树比较得出修改
+
+    只保留这几类元素的引用（被删除的元素也因此不会被回收），内存与元素总数无关。
+    """
+
+    def __init__(self, root, encoding=None):
+        self.encoding = encoding or "UTF-8"
+        self.entries = []
+        for element in root.iter(*EDITABLE_TAGS):
+            path_prop = path_text = hash_tree = None
+            if element.tag == "HTTPSamplerProxy":
+                path_props = select_path_prop(element)
+                if path_props:
+                    path_prop = path_props[0]
+                    path_text = path_prop.text
+            elif element.tag == "HeaderManager":
+                hash_tree = following_hash_tree(element)
+            self.entries.append((element, element.get("testname"), path_prop, path_text, hash_tree))
+
+
+def escape_attribute(value, quote):
+    value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    value = value.replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;")
+    return value.replace(quote, "&quot;" if quote == '"' else "&apos;")
+
+
+def escape_text(value):
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#13;")
+
+
+def _attribute_value(match, encoding):
+    """按 XML 的属性值规范化规则还原原文件中的属性值，用于核对定位是否正确"""
+    raw = match.group(1) if match.group(1) is not None else match.group(2)
+    text = raw.decode(encoding, "replace")
+    if "&" not in text and "\n" not in text and "\r" not in text and "\t" not in text:
+        return text
+    return html.unescape(re.sub(r"[\t\r\n]", " ", text.replace("\r\n", " ")))
+
+
+class _Scanner:
+    """在原文件中按文档顺序查找元素的起始标签"""
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.skip = self._next_skip(0)
+
+    def _next_skip(self, pos):
+        nearest = (len(self.data), len(self.data))
+        for opening, closing in SKIPPED_SECTIONS:
+            start = self.data.find(opening, pos)
+            if 0 <= start < nearest[0]:
+                end = self.data.find(closing, start + len(opening))
+                nearest = (start, len(self.data) if end < 0 else end + len(closing))
+        return nearest
+
+    def find_start_tag(self, tag):
+        needle = b"<" + tag.encode("ascii")
+        while True:
+            hit = self.data.find(needle, self.pos)
+            if hit < 0:
+                raise PatchError(f"原文件中找不到 <{tag}>")
+            while self.skip[1] <= hit:
+                self.skip = self._next_skip(self.skip[1])
+            if self.skip[0] <= hit:
+                self.pos = self.skip[1]
+                continue
+            match = START_TAG.match(self.data, hit)
+            if match is None or match.group(1) != needle[1:]:
+                self.pos = hit + 1
+                continue
+            self.pos = match.end()
+            return match
+
+    def element_end(self, tag, start_tag):
+        if start_tag.group(3):
+            return start_tag.end()
+        closing = self.data.find(b"</" + tag.encode("ascii"), start_tag.end())
+        end = self.data.find(b">", closing)
+        if closing < 0 or end < 0:
+            raise PatchError(f"原文件中 <{tag}> 没有结束标签")
+        return end + 1
+
+    def hash_tree_end(self, start):
+        depth = 0
+        for match in HASH_TREE_TAG.finditer(self.data, start):
+            if match.group(1):
+                depth -= 1
+            elif not match.group(2):
+                depth += 1
+            if depth == 0:
+                return match.end()
+        raise PatchError("原文件中 hashTree 没有结束标签")
+
+    def line_span(self, start, end):
+        """删除整行时连同缩进和换行一起删除，不留下空行"""
+        data = self.data
+        line_start = start
+        while line_start > 0 and data[line_start - 1] in b" \t":
+            line_start -= 1
+        if line_start == 0 or data[line_start - 1] == ord("\n"):
+            start = line_start
+            if data[end:end + 2] == b"\r\n":
+                end += 2
+            elif data[end:end + 1] == b"\n":
+                end += 1
+        return start, end
+
+
+def collect_edits(data, recorder):
+    """比较转换前后的值，返回按位置排序且互不重叠的 (起始, 结束, 替换内容) 列表"""
+    encoding = recorder.encoding
+    scanner = _Scanner(data)
+    edits = []
+    deleted_until = 0
+
+    def encode(text):
+        return text.encode(encoding, "xmlcharrefreplace")
+
+    for element, testname, path_prop, path_text, hash_tree in recorder.entries:
+        start_tag = scanner.find_start_tag(element.tag)
+        if start_tag.start() < deleted_until:
+            continue
+        name_attribute = TESTNAME.search(data, start_tag.start(2), start_tag.end(2))
+        original = None if name_attribute is None else _attribute_value(name_attribute, encoding)
+        if original != testname:
+            raise PatchError(f"原文件中 <{element.tag}> 的位置与解析结果不一致")
+
+        if element.getparent() is None:
+            end = scanner.element_end(element.tag, start_tag)
+            if hash_tree is not None and hash_tree.getparent() is None:
+                tree_start = data.find(b"<hashTree", end)
+                if tree_start < 0:
+                    raise PatchError("原文件中找不到 HeaderManager 之后的 hashTree")
+                end = scanner.hash_tree_end(tree_start)
+            start, end = scanner.line_span(start_tag.start(), end)
+            edits.append((start, end, b""))
+            deleted_until = scanner.pos = end
+            continue
+
+        new_name = element.get("testname")
+        if new_name != testname and new_name is not None:
+            if name_attribute is None:
+                edits.append((start_tag.end(1), start_tag.end(1),
+                              b' testname="' + encode(escape_attribute(new_name, '"')) + b'"'))
+            else:
+                group = 1 if name_attribute.group(1) is not None else 2
+                quote = '"' if group == 1 else "'"
+                edits.append((name_attribute.start(group), name_attribute.end(group),
+                              encode(escape_attribute(new_name, quote))))
+
+        if path_prop is not None and path_prop.text != path_text:
+            prop = PATH_PROP.search(data, start_tag.end())
+            if prop is None or prop.group(2):
+                raise PatchError("原文件中找不到 HTTPSampler.path")
+            text_end = data.find(b"</stringProp", prop.end())
+            edits.append((prop.end(), text_end, encode(escape_text(path_prop.text or ""))))
+            scanner.pos = max(scanner.pos, text_end)
+    return edits
+
+
+def write_patched(original_file, recorder, path):
+    """把原文件中未修改的字节原样复制到 path，只在修改处写入新内容"""
+    with open(original_file, "rb") as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        edits = collect_edits(data, recorder)
+        view = memoryview(data)
+        try:
+            with open(path, "wb") as out:
+                cursor = 0
+                for start, end, replacement in edits:
+                    out.write(view[cursor:start])
+                    out.write(replacement)
+                    cursor = end
+                out.write(view[cursor:])
+        finally:
+            view.release()
+
+
+def patched_bytes(original_file, recorder):
+    with open(original_file, "rb") as source, mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        edits = collect_edits(data, recorder)
+        chunks = []
+        cursor = 0
+        for start, end, replacement in edits:
+            chunks.append(data[cursor:start])
+            chunks.append(replacement)
+            cursor = end
+        chunks.append(data[cursor:])
+        return b"".join(chunks)
@@ -0,0 +1,124 @@
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+SEQUENTIAL = "sequential"
+SINGLE_PASS = "single_pass"
+
+# 规则很少时直接逐条 str.replace 比多次正则扫描更快
+DIRECT_LOOP_MAX_RULES = 8
+
+
+def _trie_regex(words):
+    """把一组字面量编译成按前缀树展开的正则，同一位置优先匹配最长的词"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        is_end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # 能在此结束时把“继续匹配”放在前面，贪婪地取最长的词
+        return f"(?:{body})?" if is_end else body
+
+    return build(trie)
+
+
+class PathRewriter:
+    """把 replacement_frames 编译成多模式匹配器，一次扫描完成路径替换
+
+    sequential（默认）与逐条执行 str.replace 的结果完全一致：每次扫描找出当前字符串中出现的、
+    序号最小的规则并只执行这一条，规则未命中时不再逐条遍历。
+    single_pass 为显式开启的模式：在原始字符串上从左到右按最长匹配一次替换，替换结果不会再被
+    后续规则匹配；同一被替换内容出现多次时以第一条为准。规则互相串联或重叠时两种模式结果不同。
+    """
+
+    def __init__(self, replacement_frames, mode=SEQUENTIAL):
+        if mode not in (SEQUENTIAL, SINGLE_PASS):
+            raise ValueError(f"未知的替换模式: {mode}")
+        self.mode = mode
+        # 被替换内容与替换内容相同的规则不会改变任何字符串
+        self.rules = [(old, new) for old, new in replacement_frames if old != new]
+        self._empty_rules = [index for index, (old, _) in enumerate(self.rules) if not old]
+
+        words = {old for old, _ in self.rules if old}
+        self._first_rule = {}
+        rule_indexes = {}
+        for index, (old, new) in enumerate(self.rules):
+            if old:
+                self._first_rule.setdefault(old, new)
+                rule_indexes.setdefault(old, []).append(index)
+        # 最长匹配会遮住同一位置上作为其前缀的词，因此把前缀词的规则序号也并入
+        self._prefix_rules = {
+            word: sorted(index for end in range(1, len(word) + 1)
+                         for index in rule_indexes.get(word[:end], ()))
+            for word in words
+        }
+
+        pattern = _trie_regex(words) if words else None
+        self._matcher = re.compile(pattern) if pattern else None
+        self._scanner = re.compile(f"(?=({pattern}))") if pattern else None
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def rewrite(self, text):
+        if self.mode == SINGLE_PASS:
+            return self._rewrite_single_pass(text)
+        return self._rewrite_sequential(text)
+
+    def _rewrite_single_pass(self, text):
+        for index in self._empty_rules[:1]:
+            # 空的被替换内容与 str.replace 一致：在每个字符之间插入
+            return text.replace("", self.rules[index][1])
+        if self._matcher is None:
+            return text
+        return self._matcher.sub(lambda match: self._first_rule[match.group()], text)
+
+    def _rewrite_sequential(self, text):
+        if len(self.rules) <= DIRECT_LOOP_MAX_RULES:
+            for old, new in self.rules:
+                text = text.replace(old, new)
+            return text
+        applied = -1
+        while True:
+            index = self._next_rule(text, applied)
+            if index is None:
+                return text
+            old, new = self.rules[index]
+            text = text.replace(old, new)
+            applied = index
+
+    def _next_rule(self, text, applied):
+        """当前字符串中能命中的、序号大于 applied 的最小规则序号"""
+        best = None
+        position = bisect_right(self._empty_rules, applied)
+        if position < len(self._empty_rules):
+            best = self._empty_rules[position]
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text):
+                indexes = self._prefix_rules[match.group(1)]
+                position = bisect_right(indexes, applied)
+                if position < len(indexes) and (best is None or indexes[position] < best):
+                    best = indexes[position]
+                    if best == applied + 1:
+                        break
+        return best
+
+
+@lru_cache(maxsize=32)
+def _compile(replacement_frames, mode):
+    return PathRewriter(replacement_frames, mode)
+
+
+def compile_rewriter(replacement_frames, mode=SEQUENTIAL):
+    """返回编译好的 PathRewriter；相同的替换列表在同一进程内只编译一次"""
+    if isinstance(replacement_frames, PathRewriter):
+        return replacement_frames
+    return _compile(tuple(tuple(frame) for frame in replacement_frames), mode)
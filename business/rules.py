@@ -0,0 +1,307 @@
+"""声明式的转换规则：从 JSON/TOML 文件读取，编译后在解析器的单次遍历中执行
+
+规则文件示例（JSON）::
+
+    {"rules": [
+        {"tag": "HTTPSamplerProxy",
+         "when": {"property": {"HTTPSampler.path": {"contains": "receiveHeartBeat.do"}}},
+         "actions": [{"drop": true}]},
+        {"tag": "HTTPSamplerProxy",
+         "actions": [{"set_property": {"name": "HTTPSampler.domain", "value": "test.example.com"}},
+                     {"remove_child": {"tag": "HeaderManager"}},
+                     {"rewrite_text": {"property": "HTTPSampler.path", "replace": [["/app/", "/svc/"]]}}]},
+        {"tag": "ThreadGroup", "actions": [{"rename": "{name}（回归）"}]}
+    ]}
+
+tag 省略时匹配任意元素。when 中的条件全部满足才执行 actions：
+    testname / attribute / property  值为字符串时要求相等，也可以写成
+                                     {"equals"|"contains"|"startswith"|"regex": ...}
+    within                           位于该类元素之下（按 JMX 的 hashTree 层级）
+actions 按顺序执行：
+    rename          按模板设置 testname，可用 {name} {tag} {index} {transaction}
+    drop            删除元素及其 hashTree，之后的规则不再处理它
+    set_property    设置（不存在时添加）属性，type 默认为 stringProp
+    remove_child    删除 hashTree 中 tag（以及可选的 testname 条件）匹配的子元素
+    rewrite_text    改写属性或元素本身的文本：replace 为替换对列表，或 regex 加 replacement
+"""
+import json
+import os
+import re
+from functools import lru_cache
+
+from lxml import etree
+
+from business.parser import following_hash_tree, owners
+from business.rewriter import compile_rewriter
+
+MATCHERS = ("equals", "contains", "startswith", "regex")
+ACTIONS = ("rename", "drop", "set_property", "remove_child", "rewrite_text")
+PROPERTY_TAGS = ("stringProp", "boolProp", "intProp", "longProp", "doubleProp", "floatProp")
+
+
+class RuleError(ValueError):
+    """规则文件格式错误"""
+
+
+def compile_condition(spec, where):
+    """把条件编译成接收字符串（或 None）的判断函数"""
+    if isinstance(spec, str):
+        return lambda value: value == spec
+    if not isinstance(spec, dict) or len(spec) != 1 or next(iter(spec)) not in MATCHERS:
+        raise RuleError(f"{where}: 条件应为字符串或 {{{'|'.join(MATCHERS)}: 值}}")
+    kind, expected = next(iter(spec.items()))
+    if kind == "equals":
+        return lambda value: value == expected
+    if kind == "contains":
+        return lambda value: value is not None and expected in value
+    if kind == "startswith":
+        return lambda value: value is not None and value.startswith(expected)
+    try:
+        regex = re.compile(expected)
+    except re.error as e:
+        raise RuleError(f"{where}: 无效的正则表达式 {expected!r}: {e}") from e
+    return lambda value: value is not None and regex.search(value) is not None
+
+
+def find_property(element, name):
+    for child in element:
+        if child.tag in PROPERTY_TAGS and child.get("name") == name:
+            return child
+    return None
+
+
+def enclosing(element, tag):
+    for owner in owners(element):
+        if owner.tag == tag:
+            return owner
+    return None
+
+
+def drop_element(element):
+    parent = element.getparent()
+    if parent is None:
+        return
+    hash_tree = following_hash_tree(element)
+    parent.remove(element)
+    if hash_tree is not None and hash_tree.getparent() is parent:
+        parent.remove(hash_tree)
+
+
+class Rule:
+    """编译后的一条规则，只包含条件与动作，不保存执行状态，可在多次解析之间共享"""
+
+    def __init__(self, spec, position):
+        where = f"第 {position + 1} 条规则"
+        if not isinstance(spec, dict):
+            raise RuleError(f"{where}: 应为对象")
+        self.tag = spec.get("tag")
+        self.conditions = []
+        when = spec.get("when", {})
+        if not isinstance(when, dict):
+            raise RuleError(f"{where}: when 应为对象")
+        for key, value in when.items():
+            if key == "testname":
+                check = compile_condition(value, f"{where} testname")
+                self.conditions.append(lambda element, check=check: check(element.get("testname")))
+            elif key == "attribute":
+                for name, condition in value.items():
+                    check = compile_condition(condition, f"{where} attribute.{name}")
+                    self.conditions.append(lambda element, name=name, check=check: check(element.get(name)))
+            elif key == "property":
+                for name, condition in value.items():
+                    check = compile_condition(condition, f"{where} property.{name}")
+                    self.conditions.append(lambda element, name=name, check=check:
+                                           check(_property_text(element, name)))
+            elif key == "within":
+                self.conditions.append(lambda element, tag=value: enclosing(element, tag) is not None)
+            else:
+                raise RuleError(f"{where}: 未知的条件 {key}")
+
+        actions = spec.get("actions")
+        if not isinstance(actions, list) or not actions:
+            raise RuleError(f"{where}: actions 应为非空列表")
+        self.actions = [self._compile_action(action, f"{where} 第 {number + 1} 个动作")
+                        for number, action in enumerate(actions)]
+
+    def _compile_action(self, action, where):
+        if not isinstance(action, dict) or len(action) != 1 or next(iter(action)) not in ACTIONS:
+            raise RuleError(f"{where}: 应为 {{{'|'.join(ACTIONS)}: 参数}}")
+        kind, argument = next(iter(action.items()))
+        if kind == "rename":
+            template = str(argument)
+            try:
+                template.format(name="", tag="", index=0, transaction="")
+            except (KeyError, IndexError, ValueError) as e:
+                raise RuleError(f"{where}: 无效的名称模板 {template!r}: {e}") from e
+            needs_transaction = "{transaction}" in template
+            return lambda element, hash_tree, index: _rename(element, template, needs_transaction, index)
+        if kind == "drop":
+            return lambda element, hash_tree, index: drop_element(element) or True
+        if not isinstance(argument, dict):
+            raise RuleError(f"{where}: {kind} 的参数应为对象")
+        if kind == "set_property":
+            name, value = argument.get("name"), argument.get("value")
+            if not name or value is None:
+                raise RuleError(f"{where}: set_property 需要 name 与 value")
+            prop_type = argument.get("type", "stringProp")
+            if prop_type not in PROPERTY_TAGS:
+                raise RuleError(f"{where}: 不支持的属性类型 {prop_type}")
+            value = str(value).lower() if isinstance(value, bool) else str(value)
+            return lambda element, hash_tree, index: _set_property(element, name, value, prop_type)
+        if kind == "remove_child":
+            tag = argument.get("tag")
+            if not tag:
+                raise RuleError(f"{where}: remove_child 需要 tag")
+            check = compile_condition(argument["testname"], f"{where} testname") if "testname" in argument else None
+            return lambda element, hash_tree, index: _remove_children(hash_tree, tag, check)
+        # rewrite_text
+        prop_name = argument.get("property")
+        if "replace" in argument:
+            rewriter = compile_rewriter([tuple(pair) for pair in argument["replace"]])
+            rewrite = rewriter.rewrite
+        elif "regex" in argument:
+            try:
+                regex = re.compile(argument["regex"])
+            except re.error as e:
+                raise RuleError(f"{where}: 无效的正则表达式: {e}") from e
+            replacement = argument.get("replacement", "")
+            rewrite = lambda text: regex.sub(replacement, text)
+        else:
+            raise RuleError(f"{where}: rewrite_text 需要 replace 或 regex")
+        return lambda element, hash_tree, index: _rewrite_text(element, prop_name, rewrite)
+
+    def matches(self, element):
+        return all(condition(element) for condition in self.conditions)
+
+    def apply(self, element, hash_tree, index):
+        """执行全部动作，index 为本次解析中该规则匹配的序号（从 1 开始）；元素被删除时返回 True"""
+        for action in self.actions:
+            if action(element, hash_tree, index):
+                return True
+        return False
+
+
+def _rename(element, template, needs_transaction, index):
+    transaction = ""
+    if needs_transaction:
+        owner = enclosing(element, "TransactionController")
+        transaction = owner.get("testname", "") if owner is not None else ""
+    element.set("testname", template.format(name=element.get("testname", ""), tag=element.tag,
+                                            index=index, transaction=transaction))
+
+
+def _property_text(element, name):
+    prop = find_property(element, name)
+    return None if prop is None else prop.text
+
+
+def _set_property(element, name, value, prop_type):
+    prop = find_property(element, name)
+    if prop is None:
+        prop = etree.SubElement(element, prop_type, name=name)
+    prop.text = value
+
+
+def _remove_children(hash_tree, tag, check):
+    if hash_tree is None:
+        return
+    for child in hash_tree.findall(tag):
+        if check is None or check(child.get("testname")):
+            drop_element(child)
+
+
+def _rewrite_text(element, prop_name, rewrite):
+    target = element if prop_name is None else find_property(element, prop_name)
+    if target is not None and target.text is not None:
+        target.text = rewrite(target.text)
+
+
+class RuleSet:
+    """编译后的规则集合；每次解析调用 start() 取得独立的 RuleRun，在遍历中对每个元素调用其 visit
+
+    规则按 tag 建立索引，每个元素只检查 tag 相同的规则和未指定 tag 的规则，规则再多也不会
+    逐条比较。同一元素按规则在文件中的顺序执行。source 为规则的原始内容，用于缓存的键。
+    RuleSet 本身不保存执行状态，同一个实例可以被多个解析器（包括其他线程中的）同时使用。
+    """
+
+    def __init__(self, specs):
+        if not isinstance(specs, list):
+            raise RuleError("rules 应为列表")
+        self.rules = [Rule(spec, position) for position, spec in enumerate(specs)]
+        self.source = json.dumps(specs, ensure_ascii=False, sort_keys=True)
+        self._by_tag = {}
+        self._any_tag = []
+        for position, rule in enumerate(self.rules):
+            if rule.tag is None:
+                self._any_tag.append((position, rule))
+            else:
+                self._by_tag.setdefault(rule.tag, []).append((position, rule))
+        self._index = {}
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def __reduce__(self):
+        # 编译后的条件是闭包，无法直接传给工作进程；按原始内容传递，每个进程只编译一次
+        return _compiled_rules, (self.source,)
+
+    def rules_for(self, tag):
+        """tag 对应的 (规则序号, 规则) 列表"""
+        rules = self._index.get(tag)
+        if rules is None:
+            # 带 tag 与不带 tag 的规则合并后仍按文件中的顺序执行
+            rules = sorted(self._by_tag.get(tag, []) + self._any_tag, key=lambda item: item[0])
+            self._index[tag] = rules
+        return rules
+
+    def start(self):
+        """开始处理一个文件，返回只属于这次解析的执行状态"""
+        return RuleRun(self)
+
+
+class RuleRun:
+    """规则集合在一次解析中的执行状态：各规则已匹配的次数，即 rename 模板中的 {index}"""
+
+    def __init__(self, rule_set):
+        self.rule_set = rule_set
+        self.counts = [0] * len(rule_set.rules)
+
+    def visit(self, element, hash_tree):
+        counts = self.counts
+        for position, rule in self.rule_set.rules_for(element.tag):
+            if rule.matches(element):
+                counts[position] += 1
+                if rule.apply(element, hash_tree, counts[position]):
+                    return
+
+
+@lru_cache(maxsize=8)
+def _compiled_rules(source):
+    # 缓存的 RuleSet 不含执行状态，同一进程中的多次解析共享它是安全的
+    return RuleSet(json.loads(source))
+
+
+def load_rules(path):
+    """读取 JSON 或 TOML（按扩展名）规则文件，返回 RuleSet"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if os.path.splitext(path)[1].lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuleError("读取 TOML 规则需要 Python 3.11 或安装 tomli")
+        try:
+            spec = tomllib.loads(data.decode("utf-8"))
+        except tomllib.TOMLDecodeError as e:
+            raise RuleError(f"{path}: {e}") from e
+    else:
+        try:
+            spec = json.loads(data)
+        except ValueError as e:
+            raise RuleError(f"{path}: {e}") from e
+    if not isinstance(spec, dict) or "rules" not in spec:
+        raise RuleError(f"{path}: 顶层应为包含 rules 的对象")
+    return RuleSet(spec["rules"])
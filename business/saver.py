@@ -0,0 +1,188 @@
+import logging
+import os
+import posixpath
+import time
+
+from business.writer import PRETTY, fsync_directory, fsync_file
+
+# 刷盘方式
+FSYNC_NONE = "none"
+FSYNC_EACH = "each"
+FSYNC_END = "end"
+FSYNC_MODES = (FSYNC_NONE, FSYNC_EACH, FSYNC_END)
+
+# 同时写出的文件数；输出目录在网络盘上时，单个文件的写入大部分时间在等待往返
+SAVE_WORKERS = 8
+
+
+class SaveReport:
+    """批量保存的结果：成功写出的文件与失败的文件及原因"""
+
+    def __init__(self):
+        self.saved = []
+        self.failures = []
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def summary(self, limit=10):
+        """界面上一次性显示的文字说明，失败的文件最多列出 limit 个"""
+        lines = [f"已保存 {len(self.saved)} 个文件，失败 {len(self.failures)} 个"]
+        for jmx_file, error in self.failures[:limit]:
+            lines.append(f"{os.path.basename(jmx_file)}: {error}")
+        if len(self.failures) > limit:
+            lines.append(f"……其余 {len(self.failures) - limit} 个失败的文件见日志")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "saved": len(self.saved),
+            "failed": len(self.failures),
+            "elapsed": round(self.elapsed, 3),
+            "failures": [{"input": jmx_file, "error": error} for jmx_file, error in self.failures],
+        }
+
+
+class OutputConflict(ValueError):
+    """多个输入文件对应同一个输出文件"""
+
+
+def _source_path(jmx_file):
+    """界面中压缩包成员的名称为“压缩包路径!/成员名称”，按压缩包去掉扩展名后的目录对待"""
+    archive, sep, member = jmx_file.partition("!/")
+    if not sep:
+        return os.path.abspath(jmx_file)
+    # 成员名称来自压缩包，去掉开头的 / 与 .. 后才能拼到输出目录下
+    parts = [part for part in posixpath.normpath("/" + member).split("/") if part not in ("", "..")]
+    return os.path.join(os.path.splitext(os.path.abspath(archive))[0], *parts)
+
+
+def output_root(jmx_files):
+    """输入文件的公共目录，输出时保持相对于它的路径；Windows 上位于不同驱动器时返回 None"""
+    if not jmx_files:
+        return None
+    try:
+        return os.path.commonpath([os.path.dirname(_source_path(jmx_file)) for jmx_file in jmx_files])
+    except ValueError:
+        return None
+
+
+def output_path(jmx_file, root, output_dir):
+    """jmx_file 在 output_dir 下的输出路径；root 为 None 时只取文件名，不在 root 之下时抛出 ValueError"""
+    source = _source_path(jmx_file)
+    if root is None:
+        return os.path.join(output_dir, os.path.basename(source))
+    relative = os.path.relpath(source, root)
+    if relative.split(os.sep)[0] == os.pardir:
+        raise ValueError(f"{jmx_file} 不在 {root} 之下")
+    return os.path.join(output_dir, relative)
+
+
+def output_paths(jmx_files, output_dir):
+    """批量保存时每个输入文件的输出路径，不同目录下的同名文件不会写到同一个文件
+
+    仍有重复（如只能取文件名时）则抛出 OutputConflict，不会让后写的文件覆盖先写的。
+    """
+    root = output_root(jmx_files)
+    paths = [output_path(jmx_file, root, output_dir) for jmx_file in jmx_files]
+    owners = {}
+    for jmx_file, path in zip(jmx_files, paths):
+        key = os.path.normcase(path)
+        if key in owners:
+            raise OutputConflict(f"{owners[key]} 与 {jmx_file} 的输出文件相同: {path}")
+        owners[key] = jmx_file
+    return paths
+
+
+def save_files(entries, mode=PRETTY, verify=False, fsync=FSYNC_NONE, workers=SAVE_WORKERS, progress=None,
+               checkpoint=None):
+    """在线程池中并发保存多个解析结果，返回 SaveReport
+
+    entries 为 (jmx_file, 解析结果, output_file) 列表，解析结果需提供 write_jmx。ParsedJMX 的
+    内容已在解析进程中序列化好，保存时主要是等待 I/O（不占用 GIL），因此用线程即可让多个文件
+    的写入重叠；同时在途的文件不超过 workers 个。单个文件失败只记入报告，不影响其他文件。
+
+    fsync 为 each 时每个文件替换前后各刷一次盘；为 end 时全部写完后再逐个刷盘，并且每个
+    目录只刷新一次。progress、checkpoint 与 business.batch.run_tasks 相同。
+    """
+    if fsync not in FSYNC_MODES:
+        raise ValueError(f"未知的刷盘方式: {fsync}")
+    start = time.perf_counter()
+    report = SaveReport()
+    total = len(entries)
+
+    def save(jmx_file, parser, output_file):
+        # 输出保持相对路径时可能落在尚不存在的子目录中
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        parser.write_jmx(output_file, mode, verify, fsync == FSYNC_EACH)
+        return output_file
+
+    def record(jmx_file, output_file, error):
+        if error is None:
+            report.saved.append(output_file)
+        else:
+            logging.error(f"保存 {jmx_file} 时出错: {error}")
+            report.failures.append((jmx_file, str(error)))
+        if progress:
+            progress(len(report.saved) + len(report.failures), total)
+
+    if workers == 1 or total <= 1:
+        for jmx_file, parser, output_file in entries:
+            if checkpoint:
+                checkpoint()
+            try:
+                save(jmx_file, parser, output_file)
+                record(jmx_file, output_file, None)
+            except Exception as e:
+                record(jmx_file, output_file, e)
+    else:
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        with ThreadPoolExecutor(max_workers=min(workers, total), thread_name_prefix="save") as executor:
+            futures = {}
+            pending = iter(entries)
+            submitted = 0
+            while futures or submitted < total:
+                while submitted < total and len(futures) < workers:
+                    if checkpoint:
+                        try:
+                            checkpoint()
+                        except BaseException:
+                            for future in futures:
+                                future.cancel()
+                            raise
+                    entry = next(pending)
+                    futures[executor.submit(save, *entry)] = entry
+                    submitted += 1
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    jmx_file, _, output_file = futures.pop(future)
+                    record(jmx_file, output_file, future.exception())
+
+    if fsync == FSYNC_END:
+        _fsync_all(report)
+    # 并发写完成的顺序不固定，按输出路径排序，报告内容与保存顺序无关
+    report.saved.sort()
+    report.failures.sort()
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _fsync_all(report):
+    """全部写完后统一刷盘，已写出但刷盘失败的文件同样记为失败"""
+    saved = []
+    for output_file in report.saved:
+        try:
+            fsync_file(output_file)
+            saved.append(output_file)
+        except OSError as e:
+            logging.error(f"刷新 {output_file} 到磁盘时出错: {e}")
+            report.failures.append((output_file, str(e)))
+    report.saved = saved
+    for directory in {os.path.dirname(os.path.abspath(output_file)) for output_file in saved}:
+        try:
+            fsync_directory(directory)
+        except OSError as e:
+            logging.error(f"刷新目录 {directory} 到磁盘时出错: {e}")
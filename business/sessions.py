@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+# 单个上传文件的默认上限
+DEFAULT_MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# 会话超过这么久没有访问且没有运行中的任务时清理
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+class UploadTooLarge(ValueError):
+    """上传的文件超过大小上限"""
+
+
+def safe_name(name):
+    """去掉客户端文件名中的目录部分和不适合作为文件名的字符"""
+    name = os.path.basename(name.replace("\\", "/")).strip()
+    name = re.sub(r'[\x00-\x1f<>:"|?*]', "_", name)
+    return name if name not in ("", ".", "..") else "upload.jmx"
+
+
+def unique_path(directory, name):
+    """在 directory 中为 name 分配不重名的路径并先创建空文件占位；同名文件依次加上 -1、-2 后缀"""
+    stem, ext = os.path.splitext(safe_name(name))
+    candidate, number = stem + ext, 0
+    while True:
+        path = os.path.join(directory, candidate)
+        try:
+            # 以独占方式创建，并发分配同名文件时不会拿到同一个路径
+            open(path, "xb").close()
+            return path
+        except FileExistsError:
+            number += 1
+            candidate = f"{stem}-{number}{ext}"
+
+
+def _too_large(limit):
+    return UploadTooLarge(f"文件超过 {limit / 1024 / 1024:g} MB 的上限")
+
+
+def _discard(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+async def receive_stream(chunks, path, limit=None):
+    """把异步产出的数据块（如 HTTP 请求体）边收边写入 path，内存中只保留一个块
+
+    返回写入的字节数；超过 limit 时删除已写入的部分并抛出 UploadTooLarge。
+    """
+    written = 0
+    try:
+        with open(path, "wb") as target:
+            async for chunk in chunks:
+                written += len(chunk)
+                if limit is not None and written > limit:
+                    raise _too_large(limit)
+                target.write(chunk)
+    except BaseException:
+        _discard(path)
+        raise
+    return written
+
+
+class Session:
+    """一个用户的工作区：上传的文件、提交的任务及其输出都在 root 目录下"""
+
+    def __init__(self, session_id, root):
+        self.id = session_id
+        self.root = root
+        self.upload_dir = os.path.join(root, "uploads")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self.uploads = []
+        self.jobs = []
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    @property
+    def busy(self):
+        return any(not job.finished for job in self.jobs)
+
+    def upload_path(self, name):
+        return unique_path(self.upload_dir, name)
+
+    def add_upload(self, path):
+        self.uploads.append(path)
+
+    def clear_uploads(self):
+        for path in self.uploads:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.uploads = []
+
+    def find_job(self, job_id):
+        """只在本会话的任务中查找，其他用户的任务 ID 找不到"""
+        for job in self.jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def job_dir(self, job_id):
+        path = os.path.join(self.root, "jobs", job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+
+class SessionManager:
+    """按会话 ID 管理各用户的工作区，空闲超时的会话连同文件一起删除"""
+
+    def __init__(self, root=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self._own_root = root is None
+        self.root = root or tempfile.mkdtemp(prefix="pyjmeter-service-")
+        os.makedirs(self.root, exist_ok=True)
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id=None):
+        """取得会话，不存在时创建；session_id 为空时生成新的 ID"""
+        session_id = re.sub(r"[^0-9A-Za-z_-]", "", session_id or "") or uuid.uuid4().hex
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, os.path.join(self.root, session_id))
+                self._sessions[session_id] = session
+        session.touch()
+        return session
+
+    def find(self, session_id):
+        """取得已存在的会话，不会创建"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.touch()
+        return session
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def expire(self):
+        """删除空闲超时且没有未完成任务的会话，返回删除的个数"""
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [session for session in self._sessions.values()
+                       if session.last_seen < deadline and not session.busy]
+            for session in expired:
+                del self._sessions[session.id]
+        for session in expired:
+            shutil.rmtree(session.root, ignore_errors=True)
+        if expired:
+            logging.info(f"已清理 {len(expired)} 个空闲会话")
+        return len(expired)
+
+    def close(self):
+        with self._lock:
+            self._sessions.clear()
+        if self._own_root:
+            shutil.rmtree(self.root, ignore_errors=True)
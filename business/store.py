@@ -0,0 +1,176 @@
+import logging
+import os
+import shutil
+import tempfile
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from business.batch import ParsedJMX
+
+# 常驻内存中的解析结果默认上限
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# 仍持有 lxml 树的解析器按源文件大小的倍数估算内存
+TREE_SIZE_FACTOR = 4
+
+
+def resident_size(parser):
+    """估算一个解析结果占用的内存；已写到磁盘的结果为 0"""
+    content = getattr(parser, "content", None)
+    if content is not None:
+        return len(content)
+    if getattr(parser, "root", None) is not None:
+        try:
+            return os.path.getsize(parser.jmx_file) * TREE_SIZE_FACTOR
+        except OSError:
+            return 0
+    return 0
+
+
+class ResultStore(MutableMapping):
+    """文件路径 -> 解析结果，常驻内存的内容超过 max_bytes 时按最近使用顺序写到临时目录
+
+    被换出的结果变成以临时文件为内容的 ParsedJMX：test_elements 仍在内存中，详情区可以照常
+    显示；to_bytes() 时从磁盘读回，save_jmx() 直接复制文件，不会重新载入内存。临时文件在
+    结果被移除或替换时才删除，载回内存后也保留：后台保存任务可能仍持有换出时的 ParsedJMX，
+    再次换出时也不必重新写入。
+    通过下标读取会把结果重新载入内存并标记为最近使用；items()/values() 只遍历不改变顺序，
+    批量保存时不会把所有结果依次载回。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._own_spill_dir = spill_dir is None
+        self._entries = OrderedDict()
+        self._sizes = {}
+        # 文件路径 -> 换出时写的临时文件
+        self._spill_files = {}
+        self.resident_bytes = 0
+
+    def __getitem__(self, jmx_file):
+        parser = self._entries[jmx_file]
+        self._entries.move_to_end(jmx_file)
+        if self.is_spilled(jmx_file):
+            parser = self._rehydrate(jmx_file, parser)
+        return parser
+
+    def __setitem__(self, jmx_file, parser):
+        if jmx_file in self._entries:
+            self._discard(jmx_file)
+        self._entries[jmx_file] = parser
+        self._account(jmx_file, parser)
+        self._enforce_budget(keep=jmx_file)
+
+    def __delitem__(self, jmx_file):
+        self._discard(jmx_file)
+
+    def __contains__(self, jmx_file):
+        return jmx_file in self._entries
+
+    def pop(self, jmx_file, *default):
+        if jmx_file not in self._entries:
+            if default:
+                return default[0]
+            raise KeyError(jmx_file)
+        return self._discard(jmx_file)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def items(self):
+        return list(self._entries.items())
+
+    def values(self):
+        return list(self._entries.values())
+
+    def peek(self, jmx_file):
+        """取结果但不载回内存、不改变使用顺序；只需要 test_elements 时使用"""
+        return self._entries[jmx_file]
+
+    def is_spilled(self, jmx_file):
+        spill_file = self._spill_files.get(jmx_file)
+        return spill_file is not None and getattr(self._entries[jmx_file], "output_file", None) == spill_file
+
+    def clear(self):
+        for jmx_file in list(self._entries):
+            self._discard(jmx_file)
+
+    def close(self):
+        """清空并删除临时目录"""
+        self.clear()
+        if self._own_spill_dir and self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+    def _account(self, jmx_file, parser):
+        size = resident_size(parser)
+        self._sizes[jmx_file] = size
+        self.resident_bytes += size
+
+    def _discard(self, jmx_file):
+        parser = self._entries.pop(jmx_file)
+        self.resident_bytes -= self._sizes.pop(jmx_file)
+        spill_file = self._spill_files.pop(jmx_file, None)
+        if spill_file is not None:
+            _remove(spill_file)
+        return parser
+
+    def _enforce_budget(self, keep=None):
+        for jmx_file in list(self._entries):
+            if self.resident_bytes <= self.max_bytes:
+                return
+            if jmx_file != keep and self._sizes[jmx_file]:
+                self._spill(jmx_file)
+
+    def _spill(self, jmx_file):
+        parser = self._entries[jmx_file]
+        spill_file = self._spill_files.get(jmx_file)
+        if spill_file is None:
+            spill_file = self._write_spill_file(jmx_file, parser)
+            if spill_file is None:
+                return
+            self._spill_files[jmx_file] = spill_file
+        spilled = ParsedJMX(jmx_file, parser.test_elements, output_file=spill_file, error=parser.error)
+        self._entries[jmx_file] = spilled
+        self.resident_bytes -= self._sizes[jmx_file]
+        self._sizes[jmx_file] = 0
+
+    def _write_spill_file(self, jmx_file, parser):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="pyjmeter-spill-")
+            # 进程退出时删除残留的临时文件
+            weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+        fd, spill_file = tempfile.mkstemp(dir=self.spill_dir, suffix=".jmx")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(parser.to_bytes())
+        except OSError as e:
+            _remove(spill_file)
+            logging.warning(f"换出 {jmx_file} 失败: {e}")
+            return None
+        return spill_file
+
+    def _rehydrate(self, jmx_file, parser):
+        try:
+            content = parser.to_bytes()
+        except OSError as e:
+            logging.warning(f"载入 {jmx_file} 失败: {e}")
+            return parser
+        # 临时文件保留到结果被移除，正在保存的任务仍可能读取它
+        restored = ParsedJMX(jmx_file, parser.test_elements, content=content, error=parser.error)
+        self._entries[jmx_file] = restored
+        self._account(jmx_file, restored)
+        self._enforce_budget(keep=jmx_file)
+        return restored
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
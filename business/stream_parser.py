@@ -0,0 +1,206 @@
+import logging
+import os
+from time import perf_counter
+
+from lxml import etree
+
+from business.parser import JMeterParser
+from business.writer import PATCH, PRETTY, PRESERVE, fsync_file, save_atomic, verify_jmx, write_serialized
+
+
+def _start_tag(element):
+    shell = etree.Element(element.tag, attrib=dict(element.attrib), nsmap=element.nsmap)
+    shell.text = ""
+    serialized = etree.tostring(shell, encoding="unicode")
+    return serialized[:serialized.rindex("</")]
+
+
+def _escape_text(text):
+    if not text:
+        return ""
+    if not text.strip(" \t\n"):
+        return text
+    shell = etree.Element("x")
+    shell.text = text
+    return etree.tostring(shell, encoding="unicode")[3:-4]
+
+
+class _OpenElement:
+    __slots__ = ("element", "opened")
+
+    def __init__(self, element):
+        self.element = element
+        self.opened = False
+
+
+class StreamingJMeterParser(JMeterParser):
+    """边解析边写出的 JMX 解析器
+
+    使用 iterparse 增量解析，每当一个 TransactionController 及其后的 hashTree 完整读入后
+    立即转换并写入 output_file，随后释放该子树。内存占用以最大的单个事务子树为上限。
+    原文件已按 JMeter 保存时的格式缩进时，输出与 JMeterParser.save_jmx 的结果逐字节一致；
+    紧凑或另行排版的文件，save_jmx 会重新缩进而这里保留原有的空白，两者只在元素间的空白上
+    不同。启用 metrics 时，边解析边写出的时间都记在 parse 阶段，转换部分仍单独计入 transform。
+    """
+
+    def __init__(self, jmx_file, length, remove_header, pattern, replacement_frames, output_file,
+                 name_allocator=None, metrics=None):
+        self.output_file = output_file
+        super().__init__(jmx_file, length, remove_header, pattern, replacement_frames, name_allocator, metrics)
+
+    def load_jmx(self, length):
+        metrics = self.metrics
+        if metrics is not None:
+            started = perf_counter()
+            transform_before = metrics.timings["transform"]
+        try:
+            return self._load(length)
+        finally:
+            if metrics is not None:
+                elapsed = perf_counter() - started
+                metrics.add_time("parse", elapsed - (metrics.timings["transform"] - transform_before))
+                if os.path.exists(self.output_file):
+                    metrics.count("bytes_out", os.path.getsize(self.output_file))
+                self.record_file(elapsed)
+
+    def _load(self, length):
+        self.start_transform(length)
+        self._failed = False
+        try:
+            with open(self.output_file, "wb") as out:
+                self._out = out
+                out.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+                self._stream()
+                out.write(b"\n")
+        except Exception as e:
+            self.error = str(e)
+            logging.error(f"Error parsing JMX file: {e}")
+            # 文档本身无法解析时输出不完整，不保留半截文件
+            if os.path.exists(self.output_file):
+                os.remove(self.output_file)
+        finally:
+            self._out = None
+
+    def to_bytes(self):
+        with open(self.output_file, "rb") as f:
+            return f.read()
+
+    def write_jmx(self, output_file, mode=PRETTY, verify=False, fsync=False):
+        if mode == PATCH:
+            raise ValueError("流式模式不支持 patch 格式")
+        if mode in (PRETTY, PRESERVE) and os.path.abspath(output_file) == os.path.abspath(self.output_file):
+            if verify:
+                verify_jmx(output_file)
+            if fsync:
+                fsync_file(output_file)
+        else:
+            save_atomic(lambda path: write_serialized(self.output_file, path, mode), output_file, verify, fsync)
+
+    def save_jmx(self, output_file, mode=PRETTY, verify=False, fsync=False):
+        try:
+            self.write_jmx(output_file, mode, verify, fsync)
+            return True
+        except Exception as e:
+            logging.error(f"Error saving JMX file: {e}")
+            return False
+
+    def _write(self, text):
+        if text:
+            self._out.write(text.encode("utf-8"))
+
+    def _stream(self):
+        stack = []
+        self._pending = None
+        unit = []
+        unit_depth = 0
+        awaiting_hash_tree = False
+
+        events = etree.iterparse(self.jmx_file, events=("start", "end", "comment", "pi"), huge_tree=True)
+        for event, element in events:
+            if awaiting_hash_tree:
+                awaiting_hash_tree = False
+                if event == "start" and element.tag == "hashTree" \
+                        and element.getparent() is unit[0].getparent():
+                    unit.append(element)
+                    unit_depth = 1
+                    continue
+                self._flush_unit(unit)
+                unit = []
+
+            if unit_depth:
+                if event == "start":
+                    unit_depth += 1
+                elif event == "end":
+                    unit_depth -= 1
+                    if not unit_depth:
+                        if element.tag == "TransactionController":
+                            awaiting_hash_tree = True
+                        else:
+                            self._flush_unit(unit)
+                            unit = []
+                continue
+
+            if event == "start":
+                if stack:
+                    self._begin_child(stack[-1])
+                if element.tag == "TransactionController":
+                    unit = [element]
+                    unit_depth = 1
+                else:
+                    stack.append(_OpenElement(element))
+            elif event == "end":
+                entry = stack.pop()
+                if entry.opened:
+                    self._flush_pending()
+                    self._write(f"</{element.tag}>")
+                else:
+                    self._write(etree.tostring(element, encoding="unicode", with_tail=False))
+                self._pending = element
+            elif stack:
+                # 注释与处理指令按叶子节点原样输出
+                self._begin_child(stack[-1])
+                self._write(etree.tostring(element, encoding="unicode", with_tail=False))
+                self._pending = element
+
+    def _begin_child(self, parent):
+        if not parent.opened:
+            self._write(_start_tag(parent.element))
+            self._write(_escape_text(parent.element.text))
+            parent.opened = True
+        self._flush_pending()
+
+    def _flush_pending(self):
+        pending = self._pending
+        if pending is None:
+            return
+        self._write(_escape_text(pending.tail))
+        parent = pending.getparent()
+        if parent is not None:
+            parent.remove(pending)
+        self._pending = None
+
+    def _flush_unit(self, unit):
+        if not self._failed:
+            if self.metrics is not None:
+                started = perf_counter()
+            try:
+                hash_tree = unit[1] if len(unit) > 1 else None
+                transaction = self.transform_transaction(unit[0], hash_tree)
+                if hash_tree is not None:
+                    self.transform_tree(hash_tree, transaction)
+            except Exception as e:
+                # 与内存模式保持一致：出错后其余事务原样输出
+                self.error = str(e)
+                logging.error(f"Error parsing JMX file: {e}")
+                self._failed = True
+            finally:
+                if self.metrics is not None:
+                    self.metrics.add_time("transform", perf_counter() - started)
+
+        transaction_controller = unit[0]
+        self._write(etree.tostring(transaction_controller, encoding="unicode", with_tail=False))
+        if len(unit) > 1:
+            self._write(_escape_text(transaction_controller.tail))
+            transaction_controller.getparent().remove(transaction_controller)
+            self._write(etree.tostring(unit[1], encoding="unicode", with_tail=False))
+        self._pending = unit[-1]
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+
+
+def _is_jmx(path):
+    return path.endswith(".jmx")
+
+
+class JMXWatcher:
+    """监听目录中 JMX 文件的新增、修改和删除
+
+    安装了 watchfiles 时使用系统通知（Linux 下为 inotify），否则退回到定时比较文件的
+    修改时间与大小。连续写入会被合并：文件在 debounce 秒内没有再变化才会回调
+    on_change(changed, removed)，两个参数都是排好序的路径列表。回调在监听线程中执行。
+    """
+
+    def __init__(self, directory, on_change, debounce=0.5, poll_interval=0.5, recursive=True,
+                 force_polling=False, ignore_dirs=()):
+        self.directory = os.path.abspath(directory)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.recursive = recursive
+        self.force_polling = force_polling
+        self.ignore_dirs = [os.path.abspath(path) + os.sep for path in ignore_dirs]
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="jmx-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def run(self):
+        """阻塞监听，直到 stop() 被调用"""
+        if not self.force_polling:
+            try:
+                import watchfiles
+            except ImportError:
+                watchfiles = None
+            if watchfiles is not None:
+                self._run_notify(watchfiles)
+                return
+        self._run_polling()
+
+    def _accept(self, path):
+        if not _is_jmx(path):
+            return False
+        if not self.recursive and os.path.dirname(path) != self.directory:
+            return False
+        return not any(path.startswith(ignored) for ignored in self.ignore_dirs)
+
+    def _emit(self, changed, removed):
+        if not changed and not removed:
+            return
+        try:
+            self.on_change(sorted(changed), sorted(removed))
+        except Exception as e:
+            logging.error(f"处理文件变化时出错: {e}")
+
+    def _run_notify(self, watchfiles):
+        for changes in watchfiles.watch(self.directory, watch_filter=lambda _, path: self._accept(path),
+                                        debounce=int(self.debounce * 1000), stop_event=self._stop,
+                                        recursive=self.recursive, raise_interrupt=False):
+            changed, removed = set(), set()
+            for change, path in changes:
+                if change == watchfiles.Change.deleted:
+                    removed.add(path)
+                    changed.discard(path)
+                else:
+                    changed.add(path)
+                    removed.discard(path)
+            self._emit(changed, removed)
+
+    def snapshot(self):
+        """当前所有 JMX 文件的 路径 -> (修改时间, 大小)"""
+        result = {}
+        pending = [self.directory]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                pending.append(entry.path)
+                        elif self._accept(entry.path):
+                            stat = entry.stat()
+                            result[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+        return result
+
+    def _run_polling(self):
+        known = self.snapshot()
+        # 路径 -> (最近一次看到的状态, 该状态首次出现的时间)
+        settling = {}
+        while not self._stop.wait(self.poll_interval):
+            current = self.snapshot()
+            now = time.monotonic()
+
+            for path, state in current.items():
+                if known.get(path) != state:
+                    previous = settling.get(path)
+                    if previous is None or previous[0] != state:
+                        settling[path] = (state, now)
+            for path in known.keys() - current.keys():
+                if path not in settling or settling[path][0] is not None:
+                    settling[path] = (None, now)
+
+            changed, removed = [], []
+            for path, (state, since) in list(settling.items()):
+                if now - since < self.debounce:
+                    continue
+                del settling[path]
+                if state is None:
+                    if path not in current:
+                        removed.append(path)
+                elif path in current:
+                    changed.append(path)
+            for path in removed:
+                known.pop(path, None)
+            for path in changed:
+                known[path] = current[path]
+            self._emit(changed, removed)
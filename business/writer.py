@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from lxml import etree
+
+# 写出格式
+PRETTY = "pretty"
+PRESERVE = "preserve"
+COMPACT = "compact"
+# 只改写原文件中被修改的部分，其余字节原样保留，见 business.patcher
+PATCH = "patch"
+SAVE_MODES = (PRETTY, PRESERVE, COMPACT, PATCH)
+
+ROOT_TAG = "jmeterTestPlan"
+
+# os.umask 只能先设置再读回，会短暂改变整个进程的 umask；导入时读一次，并发保存时不再修改
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def fsync_file(path):
+    """把已写出文件的内容刷到磁盘"""
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_directory(directory):
+    """刷新目录项，确保替换（rename）本身落盘；Windows 不支持对目录 fsync，直接跳过"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_path(output_file, fsync=False):
+    """返回与 output_file 同目录的临时路径，写完后原子地替换目标文件
+
+    写入过程中出错或进程中断时，目标文件保持原样，不会留下半截的 JMX。fsync 为 True 时
+    替换前先把临时文件刷到磁盘，替换后再刷新所在目录，断电后也不会出现空文件。
+    """
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        if os.path.exists(output_file):
+            shutil.copymode(output_file, tmp_path)
+        else:
+            # mkstemp 创建的文件权限为 0600，改回按 umask 创建普通文件时的权限
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        if fsync:
+            fsync_file(tmp_path)
+        os.replace(tmp_path, output_file)
+        if fsync:
+            fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def strip_whitespace(root):
+    """去掉元素之间只含空白的文本，JMX 中这些空白没有意义；叶子元素的值即使是空白也保留
+
+    返回被去掉的 (元素, text, tail) 列表，可交给 restore_whitespace 恢复。相同的空白字符串只保留一份，
+    列表占用的内存远小于整棵树。
+    """
+    removed = []
+    strings = {}
+    for element in root.iter():
+        text = element.text
+        if text is not None and len(element) and not text.strip():
+            element.text = None
+        else:
+            text = None
+        tail = element.tail
+        if tail is not None and not tail.strip():
+            element.tail = None
+        else:
+            tail = None
+        if text is not None or tail is not None:
+            text = text and strings.setdefault(text, text)
+            tail = tail and strings.setdefault(tail, tail)
+            removed.append((element, text, tail))
+    return removed
+
+
+def restore_whitespace(removed):
+    for element, text, tail in removed:
+        if text is not None:
+            element.text = text
+        if tail is not None:
+            element.tail = tail
+
+
+def write_tree(root, path, mode=PRETTY):
+    """把 lxml 树按指定格式写到 path
+
+    由 libxml2 直接写入文件，不会先在内存中生成完整的字符串。pretty 与原来的
+    save_jmx 输出逐字节一致；preserve 保留原文件的空白；compact 先在树上去掉空白，写完后
+    再原样恢复，不复制整棵树，调用方的 root 最终保持不变。
+    """
+    if mode not in SAVE_MODES or mode == PATCH:
+        raise ValueError(f"未知的写出格式: {mode}")
+    removed = strip_whitespace(root) if mode == COMPACT else None
+    try:
+        _write_tree(root, path, mode)
+    finally:
+        if removed:
+            restore_whitespace(removed)
+
+
+def _write_tree(root, path, mode):
+    etree.ElementTree(root).write(path, pretty_print=mode == PRETTY, xml_declaration=True, encoding="UTF-8")
+
+
+def write_serialized(source, path, mode=PRETTY):
+    """写出已序列化的 JMX（bytes 或文件路径）；内容本身须已是所需格式（pretty、preserve 或 patch，
+    见 business.batch.parse_file_task），只有 compact 需要重新解析"""
+    if mode not in SAVE_MODES:
+        raise ValueError(f"未知的写出格式: {mode}")
+    if mode == COMPACT:
+        parser = etree.XMLParser(remove_blank_text=True, huge_tree=True)
+        if isinstance(source, bytes):
+            root = etree.fromstring(source, parser)
+        else:
+            root = etree.parse(source, parser).getroot()
+        # 树是这里新解析的，去掉空白后不必恢复
+        strip_whitespace(root)
+        _write_tree(root, path, COMPACT)
+    elif isinstance(source, bytes):
+        with open(path, "wb") as f:
+            f.write(source)
+    else:
+        shutil.copyfile(source, path)
+
+
+def verify_jmx(path):
+    """增量解析一遍写出的文件，确认它是完整的 JMX；不通过时抛出 ValueError"""
+    root_tag = None
+    try:
+        for event, element in etree.iterparse(path, events=("start", "end"), huge_tree=True):
+            if root_tag is None:
+                root_tag = element.tag
+            elif event == "end":
+                element.clear(keep_tail=True)
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"写出的 JMX 无法解析: {e}") from e
+    if root_tag != ROOT_TAG:
+        raise ValueError(f"写出的文件不是 JMX 测试计划，根元素为 {root_tag}")
+
+
+def save_atomic(write, output_file, verify=False, fsync=False):
+    """调用 write(临时路径) 写出内容，校验通过后替换 output_file"""
+    with atomic_path(output_file, fsync) as tmp_path:
+        write(tmp_path)
+        if verify:
+            verify_jmx(tmp_path)
@@ -0,0 +1,102 @@
+"""JMX 文件集合的索引与查询，不导入任何 GUI 框架
+
+用法示例:
+    python -m catalog build plans/ --db plans.sqlite
+    python -m catalog path /api/order/submit --db plans.sqlite
+    python -m catalog regex "^/api/order/" --db plans.sqlite --json
+    python -m catalog name 下单 --db plans.sqlite
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+from business.catalog import RESULT_COLUMNS, default_catalog_path
+
+
+def collect_jmx_files(inputs):
+    """目录递归查找全部 .jmx 文件，其余输入按文件或通配符处理"""
+    jmx_files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for directory, _, files in os.walk(item):
+                jmx_files.extend(os.path.join(directory, f) for f in sorted(files) if f.endswith(".jmx"))
+        elif glob.has_magic(item):
+            jmx_files.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            jmx_files.append(item)
+    return jmx_files
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="python -m catalog", description="JMX 文件索引与查询")
+    db_help = f"索引库路径（默认 {default_catalog_path()}）"
+    parser.add_argument("--db", default=None, help=db_help)
+    # 子命令也接受 --db，写在子命令前后都可以；不设默认值，避免覆盖写在前面的值
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=argparse.SUPPRESS, help=db_help)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", parents=[common], help="建立或增量更新索引")
+    build.add_argument("inputs", nargs="+", help="JMX 文件、目录（递归）或通配符")
+    build.add_argument("-l", "--length", type=int, default=2, help="字母组合长度（默认 2），影响格式化后的名称")
+    build.add_argument("-r", "--regex", default="", help="从 HTTP 请求名称中移除的正则表达式")
+    build.add_argument("-j", "--workers", type=int, default=None, help="工作进程数（默认使用全部 CPU 核心）")
+
+    for name, help_text in (("path", "按请求路径查找（忽略查询字符串）"), ("regex", "按正则表达式匹配请求路径"),
+                            ("host", "按主机查找"), ("name", "按请求或事务名称（原始或格式化后）查找")):
+        query = commands.add_parser(name, parents=[common], help=help_text)
+        query.add_argument("value")
+        query.add_argument("--json", action="store_true", help="以 JSON 输出")
+
+    commands.add_parser("stats", parents=[common], help="显示索引中的记录数")
+    return parser
+
+
+def print_results(results, as_json):
+    if as_json:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        return
+    for result in results:
+        print("\t".join("" if result[column] is None else str(result[column]) for column in RESULT_COLUMNS))
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    from business.catalog import Catalog
+
+    with Catalog(args.db) as catalog:
+        if args.command == "build":
+            start = time.perf_counter()
+            indexed, unchanged, failed = catalog.refresh(collect_jmx_files(args.inputs), args.length, args.regex,
+                                                         args.workers)
+            print(f"重新索引 {indexed} 个文件，未变化 {unchanged}，失败 {failed}，"
+                  f"耗时 {time.perf_counter() - start:.3f}s", file=sys.stderr)
+            return 1 if failed else 0
+        if args.command == "stats":
+            print(json.dumps(catalog.stats(), ensure_ascii=False))
+            return 0
+
+        start = time.perf_counter()
+        find = {"path": catalog.find_path, "regex": catalog.find_path_regex, "host": catalog.find_host,
+                "name": catalog.find_name}[args.command]
+        try:
+            results = find(args.value)
+        except re.error as e:
+            print(f"错误：无效的正则表达式: {e}", file=sys.stderr)
+            return 2
+        elapsed = time.perf_counter() - start
+        print_results(results, args.json)
+        print(f"共 {len(results)} 条，查询耗时 {elapsed * 1000:.1f}ms", file=sys.stderr)
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
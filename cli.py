@@ -0,0 +1,301 @@
+"""无界面批处理入口，不导入任何 GUI 框架
+
+用法示例:
+    python -m cli plans/ extra/*.jmx -o out/ --length 2 --remove-header \
+        --replace 10.0.0.1 test.example.com --summary summary.json
+    python -m cli bundle.zip -o out/    # 生成 out/bundle.zip，不解压到磁盘
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+from business.archive import archive_format
+from business.metrics import PROFILERS
+from business.rewriter import SEQUENTIAL, SINGLE_PASS
+from business.saver import FSYNC_MODES, FSYNC_NONE, SAVE_WORKERS
+from business.writer import PATCH, PRETTY, SAVE_MODES
+
+
+def expand_inputs(inputs):
+    """把文件、目录和通配符展开为去重且有序的 JMX 文件列表；目录只取第一层，与界面行为一致"""
+    jmx_files = []
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = sorted(os.path.join(item, f) for f in os.listdir(item) if f.endswith('.jmx'))
+        elif glob.has_magic(item):
+            candidates = sorted(glob.glob(item, recursive=True))
+        else:
+            candidates = [item]
+        for candidate in candidates:
+            key = os.path.abspath(candidate)
+            if key not in seen:
+                seen.add(key)
+                jmx_files.append(candidate)
+    return jmx_files
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="JMeter JMX Parser（命令行批处理）")
+    parser.add_argument("inputs", nargs="+",
+                        help="JMX 文件、目录或通配符；zip/tar 压缩包直接读取其中的 .jmx，输出为同名的新压缩包")
+    parser.add_argument("-o", "--output-dir", required=True, help="输出目录")
+    parser.add_argument("-l", "--length", type=int, default=2, help="字母组合长度（默认 2）")
+    parser.add_argument("-r", "--regex", default="", help="从 HTTP 请求名称中移除的正则表达式")
+    parser.add_argument("--remove-header", action="store_true", help="移除请求的 HeaderManager")
+    parser.add_argument("--replace", nargs=2, action="append", default=[], metavar=("OLD", "NEW"),
+                        help="替换 HTTP 请求路径中的内容，可重复指定")
+    parser.add_argument("--replace-mode", choices=[SEQUENTIAL, SINGLE_PASS], default=SEQUENTIAL,
+                        help="sequential 与逐条替换结果一致（默认）；single_pass 在原始路径上按最长匹配一次替换")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="工作进程数（默认使用全部 CPU 核心）")
+    parser.add_argument("--stream", action="store_true", help="流式解析，适合数百 MB 的大文件")
+    parser.add_argument("--cache-dir", default=None, help="解析结果缓存目录，未变化的文件直接使用缓存")
+    parser.add_argument("--summary", default=None, help="JSON 摘要输出路径，'-' 表示标准输出")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="监听目录树，只重新处理新增或修改的文件（输出保持相对路径）")
+    parser.add_argument("--debounce", type=float, default=0.5, help="监听模式下合并连续写入的等待秒数")
+    parser.add_argument("--poll", action="store_true", help="监听模式下强制使用定时轮询")
+    parser.add_argument("--format", choices=SAVE_MODES, default=PRETTY,
+                        help="输出格式：pretty 与原来一致，preserve 保留原文件空白，compact 去掉所有空白，"
+                             "patch 只改写原文件中被修改的部分（不支持 --stream）")
+    parser.add_argument("--rules", default=None,
+                        help="JSON 或 TOML 转换规则文件，在内置转换之后执行（不支持 --stream 与 --format patch）")
+    parser.add_argument("--verify", action="store_true", help="替换输出文件前重新解析一遍，确认可以载入")
+    parser.add_argument("--io-workers", type=int, default=SAVE_WORKERS,
+                        help=f"同时写出的文件数（默认 {SAVE_WORKERS}），输出目录在网络盘上时可调大")
+    parser.add_argument("--fsync", choices=FSYNC_MODES, default=FSYNC_NONE,
+                        help="刷盘方式：none 不刷盘（默认），each 每个文件写完即刷盘，end 全部写完后统一刷盘")
+    parser.add_argument("--export-elements", choices=["csv", "jsonl"], default=None,
+                        help="将每个文件的元素列表导出到 <输出文件>.csv 或 .jsonl")
+    parser.add_argument("--metrics-json", default=None, help="将分阶段耗时与计数写成 JSON 报告")
+    parser.add_argument("--metrics-prom", default=None, help="将分阶段耗时与计数写成 Prometheus 文本格式")
+    parser.add_argument("--profile-slowest", default=None,
+                        help="处理完后对最慢的文件重新解析一遍，并把性能剖析结果写到该路径")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile",
+                        help="cprofile 写出 pstats 文件（默认）；pyinstrument 写出 HTML，需要另行安装")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只输出错误")
+    return parser
+
+
+def run(args, jmx_files=None, output_files=None):
+    from business.batch import convert_archive, parse_files, stream_files
+    from business.cache import ResultCache
+    from business.metrics import ParseMetrics
+    from business.rewriter import compile_rewriter
+    from business.saver import output_paths, save_files
+
+    start = time.perf_counter()
+    archives = []
+    archive_outputs = []
+    if jmx_files is None:
+        jmx_files = expand_inputs(args.inputs)
+        archives = [jmx_file for jmx_file in jmx_files if archive_format(jmx_file)]
+        jmx_files = [jmx_file for jmx_file in jmx_files if not archive_format(jmx_file)]
+        # 普通文件与压缩包一起按公共目录确定输出路径，不同目录下的同名文件不会互相覆盖
+        output_files = output_paths(jmx_files + archives, args.output_dir)
+        archive_outputs = output_files[len(jmx_files):]
+        output_files = output_files[:len(jmx_files)]
+    for directory in {os.path.dirname(output_file) for output_file in output_files + archive_outputs}:
+        os.makedirs(directory or ".", exist_ok=True)
+    replacement_frames = compile_rewriter([tuple(pair) for pair in args.replace], args.replace_mode)
+    sinks = metrics_sinks(args, replacement_frames)
+    metrics = ParseMetrics() if sinks else None
+
+    if args.stream:
+        results = stream_files(jmx_files, output_files, args.length, args.remove_header, args.regex,
+                               replacement_frames, workers=args.workers, metrics=metrics)
+    else:
+        cache = ResultCache(args.cache_dir) if args.cache_dir else None
+        results = parse_files(jmx_files, args.length, args.remove_header, args.regex, replacement_frames,
+                              workers=args.workers, cache=cache, metrics=metrics, mode=args.format,
+                              rules=args.rule_set)
+
+    save_report = save_files([(jmx_file, parser, output_file)
+                              for (jmx_file, parser, error), output_file in zip(results, output_files)
+                              if error is None],
+                             args.format, args.verify, args.fsync, args.io_workers)
+    save_errors = dict(save_report.failures)
+    if metrics is not None:
+        metrics.add_time("write", save_report.elapsed)
+
+    files = []
+    for (jmx_file, parser, error), output_file in zip(results, output_files):
+        if error is None:
+            error = save_errors.get(jmx_file, save_errors.get(output_file))
+        files.append(file_entry(args, {"input": jmx_file}, parser, error, output_file, output_file))
+
+    for archive, output_file in zip(archives, archive_outputs):
+        try:
+            members = convert_archive(archive, output_file, args.length, args.remove_header, args.regex,
+                                      replacement_frames, args.format, args.rule_set)
+        except Exception as e:
+            files.append(file_entry(args, {"input": archive}, None, e, output_file))
+            continue
+        for name, parser, error in members:
+            export_base = f"{output_file}-{name.replace('/', '_')}"
+            files.append(file_entry(args, {"input": archive, "member": name}, parser, error, output_file,
+                                    export_base))
+
+    failed = sum(1 for entry in files if entry["status"] == "failed")
+    summary = {
+        "total": len(files),
+        "succeeded": len(files) - failed,
+        "failed": failed,
+        "elapsed": round(time.perf_counter() - start, 3),
+        "files": files,
+    }
+    if metrics is not None:
+        from business.metrics import export_metrics
+
+        export_metrics(metrics, sinks)
+        summary["metrics"] = metrics.to_dict()
+    return summary
+
+
+def file_entry(args, entry, parser, error, output_file, export_base=None):
+    """摘要中一个文件（或压缩包成员）的结果；导出元素列表时写到 export_base 加扩展名"""
+    from business.elements import HTTP_REQUEST, TRANSACTION_CONTROLLER
+
+    entry.update({"output": None if error is not None else output_file,
+                  "status": "failed" if error is not None else "ok"})
+    if error is not None:
+        entry["error"] = str(error)
+        return entry
+    entry["warning"] = parser.error
+    entry["transactions"] = parser.test_elements.count(TRANSACTION_CONTROLLER)
+    entry["samplers"] = parser.test_elements.count(HTTP_REQUEST)
+    entry["elements"] = parser.test_elements.to_dicts()
+    if args.export_elements:
+        export_file = f"{export_base}.{args.export_elements}"
+        getattr(parser.test_elements, f"to_{args.export_elements}")(export_file)
+        entry["elements_file"] = export_file
+    return entry
+
+
+def metrics_sinks(args, replacement_frames):
+    """按命令行参数创建统计结果的输出目标，一个都没有时不启用统计"""
+    from business.metrics import JSONSink, ProfileSink, PrometheusSink
+
+    sinks = []
+    if args.metrics_json:
+        sinks.append(JSONSink(args.metrics_json))
+    if args.metrics_prom:
+        sinks.append(PrometheusSink(args.metrics_prom))
+    if args.profile_slowest:
+        from business.parser import JMeterParser
+
+        def parse(jmx_file):
+            JMeterParser(jmx_file, args.length, args.remove_header, args.regex, replacement_frames,
+                         rules=args.rule_set).to_bytes()
+
+        sinks.append(ProfileSink(args.profile_slowest, parse, args.profiler))
+    return sinks
+
+
+def write_summary(summary, path):
+    if path == "-":
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def report(summary, args):
+    if args.summary:
+        write_summary(summary, args.summary)
+    if not args.quiet and args.summary != "-":
+        print(f"已处理 {summary['total']} 个文件，成功 {summary['succeeded']}，失败 {summary['failed']}，"
+              f"耗时 {summary['elapsed']}s", file=sys.stderr)
+    for entry in summary["files"]:
+        if entry["status"] == "failed":
+            name = f"{entry['input']} 中的 {entry['member']}" if "member" in entry else entry["input"]
+            print(f"处理 {name} 时出错: {entry['error']}", file=sys.stderr)
+
+
+def watch(args):
+    """先完整处理一遍目录树，然后只重新处理新增或修改的文件；输出保持相对路径"""
+    from business.watcher import JMXWatcher
+
+    if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+        print("错误：--watch 需要且只能指定一个目录", file=sys.stderr)
+        return 2
+    directory = args.inputs[0]
+
+    def output_for(jmx_file):
+        return os.path.join(args.output_dir, os.path.relpath(jmx_file, directory))
+
+    def process(jmx_files):
+        if jmx_files:
+            report(run(args, jmx_files, [output_for(jmx_file) for jmx_file in jmx_files]), args)
+
+    def on_change(changed, removed):
+        process(changed)
+        for jmx_file in removed:
+            output_file = output_for(jmx_file)
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            if not args.quiet:
+                print(f"已删除 {output_file}", file=sys.stderr)
+
+    watcher = JMXWatcher(directory, on_change, debounce=args.debounce, force_polling=args.poll,
+                         ignore_dirs=[args.output_dir])
+    process(sorted(watcher.snapshot()))
+    if not args.quiet:
+        print(f"正在监听 {directory}，按 Ctrl+C 退出", file=sys.stderr)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    logging.basicConfig(level=logging.ERROR if args.quiet else logging.WARNING,
+                        format="%(levelname)s: %(message)s")
+    if args.length < 1:
+        print("错误：请输入有效的字母组合长度（大于0的整数）", file=sys.stderr)
+        return 2
+
+    if args.stream and args.format == PATCH:
+        print("错误：--stream 不支持 --format patch", file=sys.stderr)
+        return 2
+
+    if any(archive_format(item) for item in args.inputs) and (args.stream or args.format == PATCH):
+        print("错误：压缩包输入不支持 --stream 与 --format patch", file=sys.stderr)
+        return 2
+
+    args.rule_set = None
+    if args.rules:
+        if args.stream or args.format == PATCH:
+            print("错误：--rules 不支持 --stream 与 --format patch", file=sys.stderr)
+            return 2
+        from business.rules import RuleError, load_rules
+
+        try:
+            args.rule_set = load_rules(args.rules)
+        except (OSError, RuleError) as e:
+            print(f"错误：无法读取规则文件: {e}", file=sys.stderr)
+            return 2
+
+    if args.watch:
+        return watch(args)
+
+    from business.saver import OutputConflict
+
+    try:
+        summary = run(args)
+    except OutputConflict as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    report(summary, args)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
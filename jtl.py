@@ -0,0 +1,66 @@
+"""JMeter 结果文件（CSV 格式的 JTL）的汇总报告，按解析器格式化后的事务与请求名称分组
+
+用法示例:
+    python -m jtl results.jtl
+    python -m jtl run1.jtl run2.jtl.gz --json > report.json
+"""
+import argparse
+import json
+import sys
+import time
+
+from business.jtl import CHUNK_ROWS, PERCENTILES, JTLAnalyzer
+
+COLUMNS = ("count", "error_rate", "mean", "min", "max", *(f"p{p}" for p in PERCENTILES), "throughput")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="python -m jtl", description="JMeter 结果文件汇总")
+    parser.add_argument("inputs", nargs="+", help="CSV 格式的 JTL 文件，可以是 .gz 压缩文件；多个文件合并统计")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help=f"每块读取的行数（默认 {CHUNK_ROWS}）")
+    parser.add_argument("--no-numpy", action="store_true", help="即使安装了 NumPy 也逐行计算")
+    return parser
+
+
+def format_row(name, stats):
+    values = ["" if stats[column] is None else str(stats[column]) for column in COLUMNS]
+    return "\t".join([name, *values])
+
+
+def print_report(report):
+    print("\t".join(["label", *COLUMNS]))
+    for group in report["groups"]:
+        for stats in group["transactions"]:
+            print(format_row(stats["label"], stats))
+        # 事务下的请求缩进显示；没有对应事务的请求（如未格式化的标签）不缩进
+        indent = "  " if group["transactions"] else ""
+        for stats in group["samplers"]:
+            print(format_row(indent + stats["label"], stats))
+    print(format_row("TOTAL", report["total"]))
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    analyzer = JTLAnalyzer(args.chunk_rows, use_numpy=False if args.no_numpy else None)
+    start = time.perf_counter()
+    for path in args.inputs:
+        try:
+            analyzer.add_file(path)
+        except (OSError, ValueError) as e:
+            print(f"错误：无法读取 {path}: {e}", file=sys.stderr)
+            return 2
+    report = analyzer.to_dict()
+
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print_report(report)
+    print(f"共 {analyzer.rows} 行，跳过 {analyzer.skipped} 行，{len(analyzer.labels)} 个标签，"
+          f"耗时 {time.perf_counter() - start:.3f}s{'（NumPy）' if analyzer.use_numpy else ''}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,30 @@
 # 初始化文件保证 Python 包结构
-from .main_window import *  # 保证包初始化时自动加载核心模块
-from .pyside6_main_window import *  # 保证包初始化时自动加载核心模块
-from .wx_main_window import *  # 保证包初始化时自动加载核心模块
-from .nicegui_main_window import *  # 保证包初始化时自动加载核心模块
-from .flet_main_window import *  # 保证包初始化时自动加载核心模块
\ No newline at end of file
+# UI 后端按需加载：导入 ui 包本身不会导入任何 GUI 框架
+import importlib
+
+# 后端名称 -> (界面模块, 框架模块, 框架入口对象)
+BACKENDS = {
+    'tk': ('ui.main_window', 'tkinter', 'Tk'),
+    'pyside6': ('ui.pyside6_main_window', 'PySide6.QtWidgets', 'QApplication'),
+    'wx': ('ui.wx_main_window', 'wx', 'App'),
+    'nicegui': ('ui.nicegui_main_window', 'nicegui', 'ui'),
+    'flet': ('ui.flet_main_window', 'flet', 'app'),
+}
+
+# 选择窗口中显示的名称
+BACKEND_ALIASES = {
+    'tkinter': 'tk',
+    'wxpython': 'wx',
+}
+
+
+def resolve_backend_name(name: str) -> str:
+    name = BACKEND_ALIASES.get(name, name)
+    return name if name in BACKENDS else 'tk'
+
+
+def load_backend(name: str):
+    """导入并返回 (界面模块, 框架入口对象)；框架未安装时抛出 ImportError"""
+    module_name, toolkit_module, entry = BACKENDS[resolve_backend_name(name)]
+    toolkit = importlib.import_module(toolkit_module)
+    return importlib.import_module(module_name), getattr(toolkit, entry)
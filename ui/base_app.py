@@ -1,12 +1,42 @@
 import os
 
-from business.parser import JMeterParser
+from business.archive import archive_format, count_members
+from business.batch import parse_archive, parse_files
+from business.cache import ResultCache
+from business.jobs import JobEngine
+from business.saver import (FSYNC_NONE, SAVE_WORKERS, OutputConflict, output_path, output_paths, output_root,
+                            save_files)
+from business.store import ResultStore
+from business.watcher import JMXWatcher
+from ui.result_model import PAGE_SIZE, RowSource
 
 
 class BaseApp:
     def __init__(self):
-        self.parsers = {}
+        # 解析结果；常驻内存超过 self.parsers.max_bytes 时把最久未用的结果换出到临时目录
+        self.parsers = ResultStore()
         self.replacement_frames = []
+        # 批量解析的工作进程数，None 表示使用全部 CPU 核心
+        self.workers = None
+        # 解析结果磁盘缓存，未变化的文件不再重复解析；默认关闭，设置了 PYJMETER_CACHE_DIR（app.py --cache-dir）时启用
+        self.result_cache = ResultCache() if os.environ.get("PYJMETER_CACHE_DIR") else None
+        self.watcher = None
+        # 监听到但尚未处理的变化：文件 -> (解析选项, 路径替换项)，以及被删除的文件；有任务运行时先合并在这里
+        self._watch_changed = {}
+        self._watch_removed = set()
+        # 最近一次批量保存的目录及输入文件的公共目录，监听模式下变化的文件会自动重新保存到对应位置
+        self.output_dir = None
+        self.output_root = None
+        # 批量保存时同时写出的文件数，以及刷盘方式（见 business.saver.FSYNC_MODES）
+        self.save_workers = SAVE_WORKERS
+        self.fsync_mode = FSYNC_NONE
+        # 解析、保存在后台线程中执行，进度与结果经 run_on_ui_thread 回到界面线程
+        self.jobs = JobEngine(self.run_on_ui_thread)
+        # 详情区：当前选中的文件及其分页行数据
+        self.current_file = None
+        self.row_source = None
+        self.current_page = 0
+        self.page_size = PAGE_SIZE
 
     def get_file_path(self) -> str:
         raise NotImplementedError("get_file_path must be implemented in subclass")
@@ -20,14 +50,20 @@ class BaseApp:
     def get_replacement_entries(self) -> list[tuple[str, str]]:
         raise NotImplementedError("get_replacement_entries must be implemented in subclass")
 
-    def clear_tabs(self):
-        raise NotImplementedError("clear_tabs must be implemented in subclass")
+    def clear_results(self):
+        raise NotImplementedError("clear_results must be implemented in subclass")
 
-    def add_tab(self, title: str, content: str):
-        raise NotImplementedError("add_tab must be implemented in subclass")
+    def add_result_item(self, jmx_file: str, title: str):
+        raise NotImplementedError("add_result_item must be implemented in subclass")
+
+    def remove_result_item(self, jmx_file: str):
+        raise NotImplementedError("remove_result_item must be implemented in subclass")
+
+    def show_rows(self, rows: RowSource, page: int):
+        raise NotImplementedError("show_rows must be implemented in subclass")
 
     def get_selected_file(self) -> str:
-        raise NotImplementedError("get_selected_file must be implemented in subclass")
+        return self.current_file
 
     def update_status(self, message: str):
         raise NotImplementedError("update_status must be implemented in subclass")
@@ -44,30 +80,42 @@ class BaseApp:
     def set_progress(self, value: int, maximum: int):
         raise NotImplementedError("set_progress must be implemented in subclass")
 
+    def read_parse_options(self):
+        """读取并校验界面上的解析选项，无效时提示错误并返回 None"""
+        try:
+            length = int(self.get_length_entry())
+            if length < 1:
+                raise ValueError
+        except ValueError:
+            self.show_error("请输入有效的字母组合长度（大于0的整数）")
+            return None
+
+        return length, self.is_remove_header_checked(), self.get_regex_entry()
+
     def parse_jmx(self):
         path = self.get_file_path()
-        length_str = self.get_length_entry()
         if not path:
             self.show_error("请先选择一个 JMX 文件或文件夹")
             return
 
-        try:
-            length = int(length_str)
-            if length < 1:
-                raise ValueError
-        except ValueError:
-            self.show_error("请输入有效的字母组合长度（大于0的整数）")
+        options = self.read_parse_options()
+        if options is None:
             return
+        length, remove_header, pattern = options
 
-        pattern = self.get_regex_entry()
-        remove_header = self.is_remove_header_checked()
+        if self.jobs.busy:
+            self.show_error("已有任务正在运行，请等待完成或取消")
+            return
 
-        self.clear_tabs()
+        self.clear_results()
         self.parsers.clear()
+        self.current_file = None
 
         try:
             if os.path.isdir(path):
                 self.parse_directory(path, length, remove_header, pattern)
+            elif archive_format(path):
+                self.parse_archive(path, length, remove_header, pattern)
             else:
                 self.parse_single_file(path, length, remove_header, pattern)
         except Exception as e:
@@ -75,26 +123,92 @@ class BaseApp:
 
     def parse_single_file(self, jmx_file, length, remove_header, pattern):
         replacement_frames = self.get_replacement_entries()
-        parser = JMeterParser(jmx_file, length, remove_header, pattern, replacement_frames)
-        output = "\n".join(f"{element['type']} #{element['number']}: {element['formatted_name']}"
-                           for element in parser.test_elements)
-        
-        file_name = os.path.basename(jmx_file)
-        tab_name = f"解析结果 - {file_name}"
-        self.add_tab(tab_name, output)
+
+        def work(job, progress):
+            [(_, parser, error)] = parse_files([jmx_file], length, remove_header, pattern, replacement_frames,
+                                               cache=self.result_cache, checkpoint=job.checkpoint)
+            if error is not None:
+                raise error
+            return parser
+
+        self.start_job("解析", work, lambda parser: self.add_result(jmx_file, parser),
+                       error_message="解析 JMX 时出错")
+
+    def add_result(self, jmx_file, parser):
+        """把解析结果加入文件列表；已存在的文件只替换结果，第一个结果自动显示在详情区"""
+        replaced = jmx_file in self.parsers
         self.parsers[jmx_file] = parser
+        if not replaced:
+            self.add_result_item(jmx_file, self.result_title(jmx_file))
+        if self.current_file is None or self.current_file == jmx_file:
+            self.select_result(jmx_file)
+
+    def remove_result(self, jmx_file):
+        if self.parsers.pop(jmx_file, None) is None:
+            return
+        self.remove_result_item(jmx_file)
+        if self.current_file == jmx_file:
+            self.current_file = None
+            self.row_source = None
+            self.show_rows(None, 0)
+
+    @staticmethod
+    def result_title(jmx_file):
+        return os.path.basename(jmx_file)
+
+    def select_result(self, jmx_file):
+        """在详情区显示某个文件的元素，从第一页开始"""
+        if jmx_file not in self.parsers:
+            return
+        self.current_file = jmx_file
+        self.row_source = RowSource(self.parsers.peek(jmx_file).test_elements, self.page_size)
+        self.current_page = 0
+        self.show_rows(self.row_source, 0)
+
+    def show_page(self, page):
+        if self.row_source is None:
+            return
+        self.current_page = max(0, min(page, self.row_source.page_count - 1))
+        self.show_rows(self.row_source, self.current_page)
+
+    def next_page(self):
+        self.show_page(self.current_page + 1)
+
+    def previous_page(self):
+        self.show_page(self.current_page - 1)
 
     def parse_directory(self, directory, length, remove_header, pattern):
-        jmx_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.jmx')]
-        total_files = len(jmx_files)
-        self.set_progress(0, total_files)
+        jmx_files = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.jmx'))
+        replacement_frames = self.get_replacement_entries()
+        self.set_progress(0, len(jmx_files))
+
+        def work(job, progress):
+            return parse_files(jmx_files, length, remove_header, pattern, replacement_frames,
+                               workers=self.workers, progress=progress, cache=self.result_cache,
+                               checkpoint=job.checkpoint)
 
-        for file in jmx_files:
-            try:
-                self.parse_single_file(file, length, remove_header, pattern)
-                self.set_progress(self.get_progress_value() + 1, total_files)
-            except Exception as e:
-                self.show_error(f"处理 {file} 时出错: {e}")
+        self.start_job("解析", work, self.add_results)
+
+    def parse_archive(self, archive_file, length, remove_header, pattern):
+        """直接读取 zip/tar 压缩包中的 .jmx 成员，不解压到磁盘；结果以“压缩包路径!/成员名称”区分"""
+        replacement_frames = self.get_replacement_entries()
+        self.set_progress(0, count_members(archive_file, ".jmx"))
+
+        def work(job, progress):
+            return [(f"{archive_file}!/{name}", parser, error)
+                    for name, parser, error in parse_archive(archive_file, length, remove_header, pattern,
+                                                             replacement_frames, progress=progress,
+                                                             checkpoint=job.checkpoint)]
+
+        self.start_job("解析", work, self.add_results)
+
+    def add_results(self, results):
+        for file, parser, error in results:
+            if error is not None:
+                self.show_error(f"处理 {file} 时出错: {error}")
+            else:
+                self.add_result(file, parser)
+        self.show_info("所有文件解析完成")
 
     def save_jmx(self):
         if not self.parsers:
@@ -103,7 +217,7 @@ class BaseApp:
 
         selected_file = self.get_selected_file()
         if not selected_file:
-            self.show_error("请选择一个标签页")
+            self.show_error("请在文件列表中选择一个文件")
             return
 
         parser = self.parsers.get(selected_file)
@@ -112,37 +226,193 @@ class BaseApp:
             return
 
         output_file = self.ask_save_file()
-        if output_file:
-            success = parser.save_jmx(output_file)
+        if not output_file:
+            return
+
+        def done(success):
             if success:
                 self.show_info(f"JMX 文件已保存到 {output_file}")
             else:
                 self.show_error("保存 JMX 文件时出错")
 
+        self.start_job("保存", lambda job, progress: parser.save_jmx(output_file), done)
+
     def save_all_jmx(self):
         if not self.parsers:
             self.show_error("请先解析一个 JMX 文件")
             return
+        if self.jobs.busy:
+            self.show_error("已有任务正在运行，请等待完成或取消")
+            return
 
         output_dir = self.ask_save_directory()
         if not output_dir:
             return
+        # 保持相对于公共目录的路径，不同目录或不同压缩包中的同名文件不会互相覆盖
+        try:
+            output_files = output_paths(list(self.parsers), output_dir)
+        except OutputConflict as e:
+            self.show_error(str(e))
+            return
+        self.output_dir = output_dir
+        self.output_root = output_root(list(self.parsers))
 
-        total_files = len(self.parsers)
-        self.set_progress(0, total_files)
+        entries = [(jmx_file, parser, output_file)
+                   for (jmx_file, parser), output_file in zip(self.parsers.items(), output_files)]
+        self.set_progress(0, len(entries))
 
-        for jmx_file, parser in self.parsers.items():
-            try:
-                output_file = os.path.join(output_dir, os.path.basename(jmx_file))
-                success = parser.save_jmx(output_file)
-                if success:
-                    self.set_progress(self.get_progress_value() + 1, total_files)
-                else:
-                    self.show_error(f"保存 {jmx_file} 时出错")
-            except Exception as e:
-                self.show_error(f"保存 {jmx_file} 时出错: {e}")
+        def work(job, progress):
+            return save_files(entries, fsync=self.fsync_mode, workers=self.save_workers, progress=progress,
+                              checkpoint=job.checkpoint)
 
-        self.show_info("所有 JMX 文件已保存")
+        def done(report):
+            # 失败的文件汇总成一条提示，不再逐个弹窗
+            if report.ok:
+                self.show_info("所有 JMX 文件已保存")
+            else:
+                self.show_error(report.summary())
+
+        self.start_job("批量保存", work, done)
+
+    def start_job(self, name, work, on_done, error_message=None):
+        """在后台运行 work(job, progress)，完成后在界面线程中调用 on_done(结果)"""
+        if self.jobs.busy:
+            self.show_error("已有任务正在运行，请等待完成或取消")
+            return None
+
+        def finished(result):
+            self.update_status("就绪")
+            on_done(result)
+            self.process_watch_changes()
+
+        def failed(error):
+            self.update_status("就绪")
+            self.show_error(f"{error_message or name + '时出错'}: {error}")
+            self.process_watch_changes()
+
+        def cancelled():
+            self.update_status(f"{name}已取消")
+            self.process_watch_changes()
+
+        self.update_status(f"正在{name}…")
+        return self.jobs.submit(name, work, on_done=finished, on_error=failed, on_cancel=cancelled,
+                                on_progress=self.set_progress)
+
+    def cancel_job(self):
+        if self.jobs.busy:
+            self.jobs.cancel()
+            self.update_status("正在取消…")
+
+    def toggle_pause_job(self):
+        job = self.jobs.current
+        if job is None or job.done:
+            return
+        if job.paused:
+            job.resume()
+            self.update_status(f"正在{job.name}…")
+        else:
+            job.pause()
+            self.update_status(f"{job.name}已暂停")
+
+    def toggle_watch(self):
+        """开始或停止监听当前文件夹，文件变化时只重新解析变化的文件"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+            self._watch_changed.clear()
+            self._watch_removed.clear()
+            self.update_status("已停止监听")
+            return
+
+        path = self.get_file_path()
+        if not path or not os.path.isdir(path):
+            self.show_error("请先选择一个文件夹")
+            return
+
+        options = self.read_parse_options()
+        if options is None:
+            return
+        replacement_frames = self.get_replacement_entries()
+
+        def on_change(changed, removed):
+            self.run_on_ui_thread(lambda: self.on_files_changed(changed, removed, options, replacement_frames))
+
+        self.watcher = JMXWatcher(path, on_change, recursive=False)
+        self.watcher.start()
+        self.update_status(f"正在监听 {path}")
+
+    def on_files_changed(self, changed, removed, options, replacement_frames):
+        """记下监听到的变化；没有任务运行时立即在后台处理，否则等当前任务结束后合并处理"""
+        for file in changed:
+            self._watch_removed.discard(file)
+            self._watch_changed[file] = (options, replacement_frames)
+        for file in removed:
+            self._watch_changed.pop(file, None)
+            self._watch_removed.add(file)
+        self.process_watch_changes()
+
+    def process_watch_changes(self):
+        """在后台任务中重新解析变化的文件，并按批量保存的方式写到最近一次保存的目录"""
+        if self.jobs.busy or not (self._watch_changed or self._watch_removed):
+            return
+
+        # 没有任务运行时才修改结果集合，不会与后台任务同时读写
+        removed, self._watch_removed = self._watch_removed, set()
+        for file in removed:
+            self.remove_result(file)
+        changed, self._watch_changed = self._watch_changed, {}
+        if not changed:
+            self.update_status(f"已移除 {len(removed)} 个文件")
+            return
+
+        # 同一批变化按各自的解析选项分组，通常只有一组
+        batches = {}
+        for file, (options, replacement_frames) in changed.items():
+            key = (options, tuple(map(tuple, replacement_frames)))
+            batches.setdefault(key, (options, replacement_frames, []))[2].append(file)
+        output_dir, root = self.output_dir, self.output_root
+        fsync_mode, save_workers = self.fsync_mode, self.save_workers
+
+        unsaved = []
+
+        def work(job, progress):
+            results = []
+            for (length, remove_header, pattern), replacement_frames, files in batches.values():
+                results.extend(parse_files(files, length, remove_header, pattern, replacement_frames,
+                                           workers=self.workers, cache=self.result_cache,
+                                           checkpoint=job.checkpoint))
+            report = None
+            if output_dir:
+                # 与批量保存使用同一个公共目录，变化的文件写回它上次保存的位置
+                entries = []
+                for file, parser, error in results:
+                    if error is not None:
+                        continue
+                    try:
+                        entries.append((file, parser, output_path(file, root, output_dir)))
+                    except ValueError as e:
+                        unsaved.append((file, e))
+                report = save_files(entries, fsync=fsync_mode, workers=save_workers, checkpoint=job.checkpoint)
+            return results, report
+
+        def done(outcome):
+            results, report = outcome
+            for file, parser, error in results:
+                if error is not None:
+                    self.show_error(f"处理 {file} 时出错: {error}")
+                else:
+                    self.add_result(file, parser)
+            for file, error in unsaved:
+                self.show_error(f"无法自动保存 {file}: {error}")
+            if report is not None and not report.ok:
+                self.show_error(report.summary())
+            self.update_status(f"已更新 {len(changed)} 个文件，移除 {len(removed)} 个文件")
+
+        self.start_job("更新变化的文件", work, done)
+
+    def run_on_ui_thread(self, func):
+        # 后台任务与监听线程通过此方法回到界面线程，子类按各自框架实现
+        func()
 
     def add_replacement_frame(self):
         # 子类实现
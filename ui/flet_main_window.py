@@ -1,6 +1,6 @@
 import flet as ft
 from ui.base_app import BaseApp
-import os
+from ui.result_model import COLUMNS
 
 class App(BaseApp):
     def __init__(self, page: ft.Page):
@@ -66,13 +66,19 @@ class App(BaseApp):
         self.parse_button = ft.ElevatedButton("解析 JMX", on_click=self.parse_jmx)
         self.save_button = ft.ElevatedButton("保存 JMX", on_click=self.save_jmx)
         self.save_all_button = ft.ElevatedButton("批量保存 JMX", on_click=self.save_all_jmx)
+        self.watch_button = ft.ElevatedButton("监听文件夹", on_click=self.toggle_watch)
+        self.pause_button = ft.ElevatedButton("暂停/继续", on_click=lambda _: self.toggle_pause_job())
+        self.cancel_button = ft.ElevatedButton("取消任务", on_click=lambda _: self.cancel_job())
         
         button_row = ft.Row([
             self.add_replacement_button,
             self.remove_replacement_button,
             self.parse_button,
             self.save_button,
-            self.save_all_button
+            self.save_all_button,
+            self.watch_button,
+            self.pause_button,
+            self.cancel_button
         ], spacing=10)
         
         # 替换项容器
@@ -89,7 +95,21 @@ class App(BaseApp):
         )
         
         # Notebook（使用TabView代替）
-        self.notebook = ft.Tabs()
+        # 结果区域：左侧文件列表，右侧分页显示选中文件的元素
+        self.file_list = ft.ListView(width=250, height=400)
+        self.detail_table = ft.DataTable(columns=[ft.DataColumn(ft.Text(column)) for column in COLUMNS])
+        self.page_label = ft.Text("")
+        result_row = ft.Row([
+            self.file_list,
+            ft.Column([
+                ft.Column([self.detail_table], height=400, scroll=ft.ScrollMode.AUTO),
+                ft.Row([
+                    ft.ElevatedButton("上一页", on_click=lambda _: self.previous_page()),
+                    self.page_label,
+                    ft.ElevatedButton("下一页", on_click=lambda _: self.next_page())
+                ], spacing=10)
+            ], expand=True)
+        ], vertical_alignment=ft.CrossAxisAlignment.START)
         
         # 主内容
         main_content = ft.Column([
@@ -102,7 +122,7 @@ class App(BaseApp):
             progress_container,
             ft.Divider(),
             ft.Text("解析结果:", size=16, weight=ft.FontWeight.BOLD),
-            self.notebook
+            result_row
         ], spacing=20, scroll=ft.ScrollMode.AUTO)
         
         # 将文件选择器回调绑定到页面
@@ -143,22 +163,29 @@ class App(BaseApp):
     def get_replacement_entries(self) -> list[tuple[str, str]]:
         return [(entry1.value, entry2.value) for _, entry1, entry2 in self.replacement_frames]
 
-    def add_tab(self, title: str, content: str):
-        self.notebook.tabs.append(ft.Tab(text=title, content=ft.Markdown(content)))
+    def clear_results(self):
+        self.file_list.controls.clear()
+        self.show_rows(None, 0)
+
+    def add_result_item(self, jmx_file: str, title: str):
+        self.file_list.controls.append(ft.ListTile(title=ft.Text(title), data=jmx_file,
+                                                   on_click=lambda _: self.select_result(jmx_file)))
         self.page.update()
 
-    def clear_tabs(self):
-        self.notebook.tabs.clear()
+    def remove_result_item(self, jmx_file: str):
+        self.file_list.controls = [item for item in self.file_list.controls if item.data != jmx_file]
         self.page.update()
 
-    def get_selected_file(self) -> str:
-        if not self.notebook.tabs or not self.notebook.tabs:
-            return None
-        selected_index = self.notebook.selected_index
-        if selected_index < 0:
-            return None
-        tab_text = self.notebook.tabs[selected_index].text
-        return next((file for file in self.parsers if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
+    def show_rows(self, rows, page: int):
+        # DataTable 没有虚拟滚动，每次只放入一页
+        if rows is None:
+            self.detail_table.rows = []
+            self.page_label.value = ""
+        else:
+            self.detail_table.rows = [ft.DataRow(cells=[ft.DataCell(ft.Text(value)) for value in row])
+                                      for row in rows.page(page)]
+            self.page_label.value = f"第 {page + 1}/{rows.page_count} 页，共 {len(rows)} 项"
+        self.page.update()
 
     def update_status(self, message: str):
         self.status_bar.value = message
@@ -218,54 +245,13 @@ class App(BaseApp):
         super().parse_jmx()
 
     def save_jmx(self, e):
-        if not self.parsers:
-            self.show_error("请先解析一个 JMX 文件")
-            return
-
-        selected_tab = self.notebook.selected_index
-        if selected_tab < 0:
-            self.show_error("请选择要保存的文件")
-            return
-
-        tab_text = self.notebook.tabs[selected_tab].text
-        jmx_file = next((file for file, parser in self.parsers.items() if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
-        
-        if not jmx_file:
-            self.show_error("无法确定要保存的 JMX 文件")
-            return
-
-        # 简化保存逻辑
-        output_file = "output.jmx"
-        parser = self.parsers[jmx_file]
-        success = parser.save_jmx(output_file)
-        if success:
-            self.show_info(f"JMX 文件已保存到 {output_file}")
-        else:
-            self.show_error("保存 JMX 文件时出错")
+        super().save_jmx()
 
     def save_all_jmx(self, e):
-        if not self.parsers:
-            self.show_error("请先解析一个 JMX 文件")
-            return
+        super().save_all_jmx()
 
-        output_dir = "."  # 实际应使用文件选择器
-        total_files = len(self.parsers)
-        self.progress.value = 0
-        self.progress.max = total_files
-        
-        for i, (jmx_file, parser) in enumerate(self.parsers.items()):
-            try:
-                output_file = os.path.join(output_dir, os.path.basename(jmx_file))
-                success = parser.save_jmx(output_file)
-                if success:
-                    self.progress.value += 1
-                    self.page.update()
-                else:
-                    self.show_error(f"保存 {jmx_file} 时出错")
-            except Exception as e:
-                self.show_error(f"保存 {jmx_file} 时出错: {e}")
-        
-        self.show_info(f"所有 JMX 文件已保存到 {output_dir}")
+    def toggle_watch(self, e=None):
+        super().toggle_watch()
 
     def browse_file(self, e):
         # 简化文件选择
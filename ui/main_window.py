@@ -1,11 +1,10 @@
-import logging
-import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 import pywinstyles
 
 from ui.base_app import BaseApp
+from ui.result_model import COLUMNS
 
 
 class App(BaseApp):
@@ -102,9 +101,39 @@ class App(BaseApp):
         self.save_all_button = ttk.Button(button_container, text="批量保存 JMX", command=self.save_all_jmx)
         self.save_all_button.pack(side=tk.LEFT, padx=(0, 5))
         
-        # Notebook组件
-        self.notebook = ttk.Notebook(main_frame)
-        self.notebook.grid(row=4, column=0, sticky="nsew")
+        self.watch_button = ttk.Button(button_container, text="监听文件夹", command=self.toggle_watch)
+        self.watch_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.pause_button = ttk.Button(button_container, text="暂停/继续", command=self.toggle_pause_job)
+        self.pause_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.cancel_button = ttk.Button(button_container, text="取消任务", command=self.cancel_job)
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 结果区域：左侧文件列表，右侧分页显示选中文件的元素
+        result_pane = ttk.PanedWindow(main_frame, orient=tk.HORIZONTAL)
+        result_pane.grid(row=4, column=0, sticky="nsew")
+
+        self.file_list = tk.Listbox(result_pane, exportselection=False, width=30)
+        self.file_list.bind("<<ListboxSelect>>", self.on_file_selected)
+        result_pane.add(self.file_list, weight=1)
+        self.result_files = []
+
+        detail_frame = ttk.Frame(result_pane)
+        result_pane.add(detail_frame, weight=3)
+
+        self.detail_view = ttk.Treeview(detail_frame, columns=COLUMNS, show="headings")
+        for column, width in zip(COLUMNS, (150, 60, 400)):
+            self.detail_view.heading(column, text=column)
+            self.detail_view.column(column, width=width, stretch=column == COLUMNS[-1])
+        self.detail_view.pack(fill=tk.BOTH, expand=True)
+
+        pager = ttk.Frame(detail_frame)
+        pager.pack(fill=tk.X)
+        ttk.Button(pager, text="上一页", command=self.previous_page).pack(side=tk.LEFT)
+        self.page_label = ttk.Label(pager, text="")
+        self.page_label.pack(side=tk.LEFT, padx=10)
+        ttk.Button(pager, text="下一页", command=self.next_page).pack(side=tk.LEFT)
 
         # 进度条
         progress_frame = ttk.Frame(main_frame)
@@ -130,20 +159,37 @@ class App(BaseApp):
     def get_replacement_entries(self) -> list[tuple[str, str]]:
         return [(entry1.get(), entry2.get()) for _, entry1, entry2 in self.replacement_frames]
 
-    def add_tab(self, title: str, content: str):
-        new_tab = tk.Text(self.notebook, height=15, width=60)
-        new_tab.insert(tk.END, content)
-        new_tab.pack(fill=tk.BOTH, expand=True)
-        self.notebook.add(new_tab, text=title)
+    def clear_results(self):
+        self.file_list.delete(0, tk.END)
+        self.result_files.clear()
+        self.show_rows(None, 0)
+
+    def add_result_item(self, jmx_file: str, title: str):
+        self.file_list.insert(tk.END, title)
+        self.result_files.append(jmx_file)
+
+    def remove_result_item(self, jmx_file: str):
+        index = self.result_files.index(jmx_file)
+        self.file_list.delete(index)
+        del self.result_files[index]
 
-    def clear_tabs(self):
-        while self.notebook.index("end") > 0:
-            self.notebook.forget(0)
+    def on_file_selected(self, event):
+        selection = self.file_list.curselection()
+        if selection:
+            self.select_result(self.result_files[selection[0]])
+
+    def show_rows(self, rows, page: int):
+        # 只插入当前页的行，元素再多 Treeview 中也最多有一页
+        self.detail_view.delete(*self.detail_view.get_children())
+        if rows is None:
+            self.page_label.config(text="")
+            return
+        for row in rows.page(page):
+            self.detail_view.insert("", tk.END, values=row)
+        self.page_label.config(text=f"第 {page + 1}/{rows.page_count} 页，共 {len(rows)} 项")
 
-    def get_selected_file(self) -> str:
-        selected_tab = self.notebook.select()
-        tab_text = self.notebook.tab(selected_tab, "text")
-        return next((file for file in self.parsers if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
+    def run_on_ui_thread(self, func):
+        self.master.after(0, func)
 
     def update_status(self, message: str):
         self.status_bar.config(text=message)
@@ -213,83 +259,3 @@ class App(BaseApp):
         folder_path = filedialog.askdirectory()
         if folder_path:
             self.set_file_path(folder_path)
-    
-    def parse_jmx(self):
-        super().parse_jmx()
-
-    # 解析单个文件
-    def parse_single_file(self, jmx_file, length, remove_header, pattern):
-        super().parse_single_file(jmx_file, length, remove_header, pattern)
-        replacement_frames = [(entry1.get(), entry2.get()) for _, entry1, entry2 in self.replacement_frames]
-
-    # 解析目录中的所有JMX文件
-    def parse_directory(self, directory, length, remove_header, pattern):
-        jmx_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.jmx')]
-        total_files = len(jmx_files)
-        self.progress["maximum"] = total_files
-        self.progress["value"] = 0  # 初始化进度条
-        
-        for file in jmx_files:
-            try:
-                self.parse_single_file(file, length, remove_header, pattern)
-                self.progress["value"] += 1  # 更新进度条
-                self.master.update_idletasks()  # 确保界面更新
-            except Exception as e:
-                logging.error(f"处理 {file} 时出错: {e}")
-                messagebox.showerror("错误", f"处理 {file} 时出错: {e}")
-        
-        messagebox.showinfo("完成", "所有文件解析完成")
-        
-    # 批量保存所有解析后的JMX文件
-    def save_all_jmx(self):
-        if not self.parsers:
-            messagebox.showerror("错误", "请先解析一个 JMX 文件")
-            return
-        
-        output_dir = filedialog.askdirectory()
-        if not output_dir:
-            return
-        
-        total_files = len(self.parsers)
-        self.progress["maximum"] = total_files
-        self.progress["value"] = 0  # 初始化进度条
-        
-        for jmx_file, parser in self.parsers.items():
-            try:
-                output_file = os.path.join(output_dir, os.path.basename(jmx_file))
-                success = parser.save_jmx(output_file)
-                if success:
-                    self.progress["value"] += 1  # 更新进度条
-                    self.master.update_idletasks()  # 确保界面更新
-                else:
-                    logging.error(f"保存 {jmx_file} 时出错")
-                    messagebox.showerror("错误", f"保存 {jmx_file} 时出错")
-            except Exception as e:
-                logging.error(f"保存 {jmx_file} 时出错: {e}")
-                messagebox.showerror("错误", f"保存 {jmx_file} 时出错")
-        
-        messagebox.showinfo("成功", f"所有 JMX 文件已保存到 {output_dir}")
-        
-    # 保存JMX文件
-    def save_jmx(self):
-        if not self.parsers:
-            messagebox.showerror("错误", "请先解析一个 JMX 文件")
-            return
-        
-        selected_tab = self.notebook.select()
-        tab_text = self.notebook.tab(selected_tab, "text")
-        jmx_file = next((file for file, parser in self.parsers.items() if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
-        
-        if not jmx_file:
-            messagebox.showerror("错误", "无法确定要保存的 JMX 文件")
-            return
-        
-        output_file = filedialog.asksaveasfilename(defaultextension=".jmx", filetypes=[("JMX files", "*.jmx")])
-        if output_file:
-            parser = self.parsers[jmx_file]
-            success = parser.save_jmx(output_file)
-            if success:
-                messagebox.showinfo("成功", f"JMX 文件已保存到 {output_file}")
-            else:
-                logging.error("保存 JMX 文件时出错")
-                messagebox.showerror("错误", "保存 JMX 文件时出错")
@@ -1,6 +1,7 @@
 from nicegui import ui
-import os
+import queue
 from .base_app import BaseApp
+from .result_model import COLUMNS
 import logging
 
 # 在__init__方法中初始化日志
@@ -46,6 +47,9 @@ class App(BaseApp):
             ui.button('解析 JMX', on_click=self.parse_jmx).classes('ml-2')
             ui.button('保存 JMX', on_click=self.save_jmx).classes('ml-2')
             ui.button('批量保存 JMX', on_click=self.save_all_jmx).classes('ml-2')
+            ui.button('监听文件夹', on_click=self.toggle_watch).classes('ml-2')
+            ui.button('暂停/继续', on_click=self.toggle_pause_job).classes('ml-2')
+            ui.button('取消任务', on_click=self.cancel_job).classes('ml-2')
 
         # 替换项容器
         self.replacement_container = ui.column().classes('w-full gap-4')
@@ -55,10 +59,24 @@ class App(BaseApp):
             ui.label('进度:').classes('w-20 text-sm font-medium')
             self.progress = ui.linear_progress(value=0).classes('flex-grow')
 
-        # Notebook（使用Tab组件）
-        self.notebook = ui.tabs().classes('w-full')
-        self.notebook_content = ui.tab_panels().classes('w-full')
-        
+        # 结果区域：左侧文件列表，右侧分页显示选中文件的元素
+        with ui.row().classes('w-full no-wrap gap-4'):
+            self.file_list = ui.column().classes('w-64 gap-1')
+            with ui.column().classes('flex-grow'):
+                self.detail_table = ui.table(
+                    columns=[{'name': str(index), 'label': column, 'field': str(index), 'align': 'left'}
+                             for index, column in enumerate(COLUMNS)],
+                    rows=[], pagination=0).classes('w-full')
+                with ui.row().classes('items-center gap-4'):
+                    ui.button('上一页', on_click=self.previous_page)
+                    self.page_label = ui.label('')
+                    ui.button('下一页', on_click=self.next_page)
+        self.file_items = {}
+
+        # 后台线程不能直接修改页面元素，回调先放入队列，由页面上的定时器在界面线程中执行
+        self._ui_calls = queue.SimpleQueue()
+        ui.timer(0.1, self._drain_ui_calls)
+
         # 初始化替换项
         self.replacement_frames = []
         self.add_replacement_frame()
@@ -72,19 +90,42 @@ class App(BaseApp):
     def get_replacement_entries(self) -> list[tuple[str, str]]:
         return [(entry1.value, entry2.value) for _, entry1, entry2 in self.replacement_frames]
 
-    def add_tab(self, title: str, content: str):
-        with self.notebook_content:
-            with ui.tab_panel(title):
-                ui.markdown(content).classes('w-full')
-        self.notebook.update()
-
-    def clear_tabs(self):
-        self.notebook_content.clear()
-        self.notebook.update()
-
-    def get_selected_file(self) -> str:
-        # NiceGUI暂不支持直接获取选中标签页
-        return next(iter(self.parsers), None) if self.parsers else None
+    def clear_results(self):
+        self.file_list.clear()
+        self.file_items.clear()
+        self.show_rows(None, 0)
+
+    def add_result_item(self, jmx_file: str, title: str):
+        with self.file_list:
+            item = ui.button(title, on_click=lambda: self.select_result(jmx_file)).props('flat no-caps align=left')
+        self.file_items[jmx_file] = item
+
+    def remove_result_item(self, jmx_file: str):
+        item = self.file_items.pop(jmx_file, None)
+        if item is not None:
+            item.delete()
+
+    def show_rows(self, rows, page: int):
+        # 只把当前页发送到浏览器
+        if rows is None:
+            self.detail_table.rows = []
+            self.page_label.set_text('')
+        else:
+            self.detail_table.rows = [{str(index): value for index, value in enumerate(row)}
+                                      for row in rows.page(page)]
+            self.page_label.set_text(f'第 {page + 1}/{rows.page_count} 页，共 {len(rows)} 项')
+        self.detail_table.update()
+
+    def run_on_ui_thread(self, func):
+        self._ui_calls.put(func)
+
+    def _drain_ui_calls(self):
+        while True:
+            try:
+                func = self._ui_calls.get_nowait()
+            except queue.Empty:
+                return
+            func()
 
     def update_status(self, message: str):
         self.status_bar.set_text(message)
@@ -135,52 +176,6 @@ class App(BaseApp):
     def parse_jmx(self):
         super().parse_jmx()
 
-    def save_jmx(self):
-        if not self.parsers:
-            self.show_error('请先解析一个 JMX 文件')
-            return
-
-        selected_tab = self.notebook.selected_index
-        if selected_tab < 0:
-            self.show_error('请选择要保存的文件')
-            return
-
-        jmx_file = next(iter(self.parsers))
-        
-        output_file = self.ask_save_file()
-        if output_file:
-            parser = self.parsers[jmx_file]
-            success = parser.save_jmx(output_file)
-            if success:
-                self.show_info(f'JMX 文件已保存到 {output_file}')
-            else:
-                self.show_error('保存 JMX 文件时出错')
-
-    def save_all_jmx(self):
-        if not self.parsers:
-            self.show_error('请先解析一个 JMX 文件')
-            return
-
-        output_dir = self.ask_save_directory()
-        if not output_dir:
-            return
-
-        total_files = len(self.parsers)
-        self.progress.set_value(0)
-        
-        for i, (jmx_file, parser) in enumerate(self.parsers.items()):
-            try:
-                output_file = os.path.join(output_dir, os.path.basename(jmx_file))
-                success = parser.save_jmx(output_file)
-                if success:
-                    self.progress.set_value((i+1)/total_files)
-                else:
-                    self.show_error(f'保存 {jmx_file} 时出错')
-            except Exception as e:
-                self.show_error(f'保存 {jmx_file} 时出错: {e}')
-        
-        self.show_info(f'所有 JMX 文件已保存到 {output_dir}')
-
     def browse_file(self):
         # 创建文件选择对话框
         with ui.dialog() as dialog, ui.card():
@@ -0,0 +1,197 @@
+"""NiceGUI 多用户服务模式：供团队通过浏览器共同使用，不创建桌面窗口
+
+每个浏览器有独立的会话（上传的文件、任务与结果），文件边上传边写到磁盘，解析在共享的进程池中
+执行，结果以流式 ZIP 下载。启动: python app.py --serve --host 0.0.0.0 --port 8080
+"""
+import asyncio
+import os
+import secrets
+from urllib.parse import unquote
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from nicegui import app, run, ui
+
+from business.archive import iter_zip
+from business.job_queue import CANCELLED, DONE, FAILED, RUNNING, JobQueue, QueueFull, ServiceJob
+from business.sessions import (DEFAULT_IDLE_TIMEOUT, DEFAULT_MAX_UPLOAD_BYTES, SessionManager, UploadTooLarge,
+                               receive_stream)
+from business.writer import SAVE_MODES, PRETTY
+from utils.helpers import parse_replacements
+
+STATUS_TEXT = {"queued": "排队中", RUNNING: "运行中", DONE: "已完成", FAILED: "失败", CANCELLED: "已取消"}
+
+# 多久检查一次空闲会话
+EXPIRE_INTERVAL = 60
+
+
+class JMXService:
+    """服务端共享的状态：会话、任务队列以及上传、下载与健康检查接口"""
+
+    def __init__(self, data_dir=None, workers=None, concurrency=4, max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.sessions = SessionManager(data_dir, idle_timeout)
+        self.jobs = JobQueue(workers, concurrency)
+        self.max_upload_bytes = max_upload_bytes
+        self._janitor = None
+
+    async def start(self):
+        await self.jobs.start()
+        self._janitor = asyncio.create_task(self._expire_sessions())
+
+    async def stop(self):
+        if self._janitor is not None:
+            self._janitor.cancel()
+        await self.jobs.close()
+        self.sessions.close()
+
+    async def _expire_sessions(self):
+        while True:
+            await asyncio.sleep(EXPIRE_INTERVAL)
+            await run.io_bound(self.sessions.expire)
+
+    def register(self):
+        app.on_startup(self.start)
+        app.on_shutdown(self.stop)
+
+        @app.get("/healthz")
+        def healthz():
+            # 任务队列启动后才算就绪，供启动探测与负载均衡使用
+            if not self.jobs.ready:
+                return PlainTextResponse("starting", status_code=503)
+            return PlainTextResponse("ok")
+
+        @app.put("/upload/{session_id}")
+        async def upload(session_id: str, request: Request):
+            session = self.sessions.find(session_id)
+            if session is None:
+                return PlainTextResponse("会话不存在", status_code=404)
+            path = session.upload_path(unquote(request.headers.get("x-file-name", "")))
+            try:
+                await receive_stream(request.stream(), path, self.max_upload_bytes)
+            except UploadTooLarge as e:
+                return PlainTextResponse(str(e), status_code=413)
+            session.add_upload(path)
+            return JSONResponse({"name": os.path.basename(path)})
+
+        @app.get("/download/{job_id}")
+        def download(job_id: str):
+            # 按浏览器 cookie 中的会话查找，知道任务 ID 也下载不到别人的结果
+            session = self.sessions.find(app.storage.browser.get("id", ""))
+            job = session.find_job(job_id) if session is not None else None
+            if job is None or job.status != DONE:
+                return PlainTextResponse("结果不存在", status_code=404)
+            return StreamingResponse(iter_zip(job.outputs()), media_type="application/zip",
+                                     headers={"Content-Disposition": f'attachment; filename="jmx-{job_id[:8]}.zip"'})
+
+        @ui.page("/")
+        def index():
+            ServicePage(self, self.sessions.get(app.storage.browser["id"]))
+
+
+class ServicePage:
+    """一个浏览器标签页；同一浏览器的多个标签页共享会话"""
+
+    def __init__(self, service, session):
+        self.service = service
+        self.session = session
+        self._shown = None
+
+        with ui.row().classes('w-full items-center gap-4 py-4'):
+            ui.label('上传 JMX 文件:').classes('w-40 text-sm font-medium')
+            limit_mb = service.max_upload_bytes / 1024 / 1024
+            # 文件以请求体原样发送到 /upload，服务端边收边写到磁盘，不经过表单解析
+            ui.upload(multiple=True, auto_upload=True, max_file_size=service.max_upload_bytes,
+                      on_rejected=lambda: ui.notify(f'文件超过 {limit_mb:g} MB 的上限', type='error')) \
+                .props(f'accept=.jmx url=/upload/{session.id} method=PUT send-raw '
+                       ':headers="files => [{name: \'X-File-Name\', value: encodeURIComponent(files[0].name)}]"') \
+                .classes('flex-grow')
+            ui.button('清空已上传', on_click=self.clear_uploads)
+        self.upload_label = ui.label('').classes('text-sm')
+
+        with ui.row().classes('w-full items-center gap-4 py-4'):
+            ui.label('输入字母组合长度:').classes('w-40 text-sm font-medium')
+            self.length_entry = ui.input(value='2').classes('w-20')
+            ui.label('输入正则表达式:').classes('w-40 text-sm font-medium')
+            self.regex_entry = ui.input(value=r'http://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}').classes('flex-grow')
+        with ui.row().classes('w-full items-center gap-4 py-4'):
+            self.remove_header_checkbox = ui.checkbox('是否移除请求的Header')
+            self.format_select = ui.select(list(SAVE_MODES), value=PRETTY, label='输出格式').classes('w-40')
+        self.replacements = ui.textarea('路径替换项，每行一条：被替换内容 => 替换内容').classes('w-full')
+
+        ui.button('解析并打包下载', on_click=self.submit).classes('my-2')
+        self.job_list = ui.column().classes('w-full gap-2')
+
+        # 任务状态只在本页的定时器中读取，不占用事件循环等待解析
+        ui.timer(0.5, self.refresh)
+        self.refresh()
+
+    def read_options(self):
+        try:
+            length = int(self.length_entry.value)
+            if length < 1:
+                raise ValueError
+        except ValueError:
+            raise ValueError('请输入有效的字母组合长度（大于0的整数）')
+        return (length, self.remove_header_checkbox.value, self.regex_entry.value,
+                parse_replacements(self.replacements.value or ''), self.format_select.value)
+
+    def submit(self):
+        if not self.session.uploads:
+            ui.notify('请先上传 JMX 文件', type='error')
+            return
+        try:
+            options = self.read_options()
+        except ValueError as e:
+            ui.notify(str(e), type='error')
+            return
+        job = ServiceJob(self.session.uploads, None, *options)
+        job.output_dir = self.session.job_dir(job.id)
+        try:
+            self.service.jobs.submit(job)
+        except QueueFull as e:
+            ui.notify(str(e), type='error')
+            return
+        self.session.jobs.append(job)
+        self.refresh()
+
+    def clear_uploads(self):
+        if self.session.busy:
+            ui.notify('任务运行中，完成后才能清空', type='error')
+            return
+        self.session.clear_uploads()
+        self.refresh()
+
+    def refresh(self):
+        session = self.session
+        session.touch()
+        state = (len(session.uploads), tuple((job.id, job.status, job.done) for job in session.jobs))
+        if state == self._shown:
+            return
+        self._shown = state
+        self.upload_label.set_text(f'已上传 {len(session.uploads)} 个文件：'
+                                   + '、'.join(os.path.basename(path) for path in session.uploads[-10:]))
+        self.job_list.clear()
+        with self.job_list:
+            for job in reversed(session.jobs):
+                with ui.row().classes('w-full items-center gap-4'):
+                    text = f'{STATUS_TEXT[job.status]} {job.done}/{job.total}'
+                    if job.failed:
+                        text += f'，失败 {len(job.failed)}'
+                    ui.label(text).classes('w-48 text-sm')
+                    ui.linear_progress(value=job.done / job.total if job.total else 0,
+                                       show_value=False).classes('flex-grow')
+                    if job.status == DONE and job.outputs():
+                        ui.button('下载 ZIP', on_click=lambda job=job: ui.download(f'/download/{job.id}'))
+                    elif not job.finished:
+                        ui.button('取消', on_click=lambda job=job: job.cancel())
+                for jmx_file, error in job.failed[:5]:
+                    ui.label(f'{os.path.basename(jmx_file)}: {error}').classes('text-xs text-negative')
+
+
+def run_service(host="0.0.0.0", port=8080, data_dir=None, workers=None, concurrency=4,
+                max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES):
+    JMXService(data_dir, workers, concurrency, max_upload_bytes).register()
+    # 会话 ID 保存在签名的浏览器 cookie 中；多实例部署时通过环境变量共用同一个密钥
+    storage_secret = os.environ.get("PYJMETER_STORAGE_SECRET") or secrets.token_hex(16)
+    ui.run(host=host, port=port, show=False, reload=False, title="PyJMeter", storage_secret=storage_secret)
@@ -1,20 +1,62 @@
-import os
-
 import pywinstyles
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, Signal, Slot
 from PySide6.QtGui import Qt
-from PySide6.QtWidgets import (QWidget, QMainWindow, QVBoxLayout, QPushButton, QLineEdit, QFileDialog, QApplication,
-                               QTextEdit,
-                               QTabWidget, QProgressBar, QLabel, QFrame, QHBoxLayout, QCheckBox, QFormLayout,
+from PySide6.QtWidgets import (QWidget, QMainWindow, QVBoxLayout, QPushButton, QLineEdit, QFileDialog,
+                               QListWidget, QSplitter, QTableView,
+                               QProgressBar, QLabel, QFrame, QHBoxLayout, QCheckBox, QFormLayout,
                                QMessageBox, QSizePolicy)
 
 from ui.base_app import BaseApp
+from ui.result_model import COLUMNS
+
+
+class _UiInvoker(QObject):
+    # 从后台线程发出信号，槽函数在界面线程中执行
+    invoke = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.invoke.connect(self._run)
+
+    @Slot(object)
+    def _run(self, func):
+        func()
+
+
+class _RowSourceModel(QAbstractTableModel):
+    """把 RowSource 暴露给 QTableView，只在显示某一行时才从 ElementTable 中取数"""
+
+    def __init__(self):
+        super().__init__()
+        self.rows = None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if self.rows is None or parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self.rows.row(index.row())[index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
 
 
 class App(BaseApp, QMainWindow):
     def __init__(self, master=None):
         QMainWindow.__init__(self, master)
         BaseApp.__init__(self)
-        self.parsers = {}
+        self._invoker = _UiInvoker()
         self.setWindowTitle("JMeter JMX Parser")
         self.setGeometry(100, 100, 800, 600)
         
@@ -138,11 +180,38 @@ class App(BaseApp, QMainWindow):
         self.save_all_button.clicked.connect(self.save_all_jmx)
         button_layout.addWidget(self.save_all_button)
         
+        self.watch_button = QPushButton("监听文件夹")
+        self.watch_button.setFixedWidth(100)
+        self.watch_button.clicked.connect(self.toggle_watch)
+        button_layout.addWidget(self.watch_button)
+        
+        self.pause_button = QPushButton("暂停/继续")
+        self.pause_button.setFixedWidth(100)
+        self.pause_button.clicked.connect(self.toggle_pause_job)
+        button_layout.addWidget(self.pause_button)
+        
+        self.cancel_button = QPushButton("取消任务")
+        self.cancel_button.setFixedWidth(100)
+        self.cancel_button.clicked.connect(self.cancel_job)
+        button_layout.addWidget(self.cancel_button)
+        
         main_layout.addWidget(button_frame)
         
-        # Notebook组件
-        self.notebook = QTabWidget()
-        main_layout.addWidget(self.notebook)
+        # 结果区域：左侧文件列表，右侧为按需取行的虚拟表格
+        result_splitter = QSplitter(Qt.Horizontal)
+        self.file_list = QListWidget()
+        self.file_list.currentRowChanged.connect(self.on_file_selected)
+        result_splitter.addWidget(self.file_list)
+        self.result_files = []
+
+        self.detail_model = _RowSourceModel()
+        self.detail_view = QTableView()
+        self.detail_view.setModel(self.detail_model)
+        self.detail_view.horizontalHeader().setStretchLastSection(True)
+        self.detail_view.verticalHeader().setVisible(False)
+        result_splitter.addWidget(self.detail_view)
+        result_splitter.setStretchFactor(1, 3)
+        main_layout.addWidget(result_splitter)
 
         # 进度条
         self.progress = QProgressBar()
@@ -167,20 +236,30 @@ class App(BaseApp, QMainWindow):
     def get_replacement_entries(self) -> list[tuple[str, str]]:
         return [(entry1.text(), entry2.text()) for _, entry1, entry2 in self.replacement_frames]
 
-    def clear_tabs(self):
-        self.notebook.clear()
+    def clear_results(self):
+        self.file_list.clear()
+        self.result_files.clear()
+        self.detail_model.set_rows(None)
+
+    def add_result_item(self, jmx_file: str, title: str):
+        self.result_files.append(jmx_file)
+        self.file_list.addItem(title)
+
+    def remove_result_item(self, jmx_file: str):
+        index = self.result_files.index(jmx_file)
+        del self.result_files[index]
+        self.file_list.takeItem(index)
 
-    def add_tab(self, title: str, content: str):
-        new_tab = QWidget()
-        layout = QVBoxLayout(new_tab)
-        text_edit = QTextEdit()
-        text_edit.setPlainText(content)
-        layout.addWidget(text_edit)
-        self.notebook.addTab(new_tab, title)
+    def on_file_selected(self, index):
+        if 0 <= index < len(self.result_files):
+            self.select_result(self.result_files[index])
 
-    def get_selected_file(self) -> str:
-        tab_text = self.notebook.tabText(self.notebook.currentIndex())
-        return next((file for file in self.parsers if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
+    def show_rows(self, rows, page: int):
+        # QTableView 只向模型请求可见的行，不需要分页
+        self.detail_model.set_rows(rows)
+
+    def run_on_ui_thread(self, func):
+        self._invoker.invoke.emit(func)
 
     def update_status(self, message: str):
         self.statusBar().showMessage(message)
@@ -255,78 +334,3 @@ class App(BaseApp, QMainWindow):
         folder_path = QFileDialog.getExistingDirectory(self, "选择文件夹")
         if folder_path:
             self.file_path.setText(folder_path)
-        
-    def parse_jmx(self):
-        super().parse_jmx()
-
-    def parse_single_file(self, jmx_file, length, remove_header, pattern):
-        super().parse_single_file(jmx_file, length, remove_header, pattern)
-        
-    def parse_directory(self, directory, length, remove_header, pattern):
-        jmx_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.jmx')]
-        total_files = len(jmx_files)
-        self.progress.setMaximum(total_files)
-        self.progress.setValue(0)
-        
-        for file in jmx_files:
-            try:
-                self.parse_single_file(file, length, remove_header, pattern)
-                self.progress.setValue(self.progress.value() + 1)
-                QApplication.processEvents()
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"处理 {file} 时出错: {e}")
-        
-        QMessageBox.information(self, "完成", "所有文件解析完成")
-        
-    def save_jmx(self):
-        if not self.parsers:
-            QMessageBox.critical(self, "错误", "请先解析一个 JMX 文件")
-            return
-        
-        selected_index = self.notebook.currentIndex()
-        if selected_index == -1:
-            QMessageBox.critical(self, "错误", "请选择一个标签页")
-            return
-        
-        tab_text = self.notebook.tabText(selected_index)
-        jmx_file = next((file for file, parser in self.parsers.items() if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
-        
-        if not jmx_file:
-            QMessageBox.critical(self, "错误", "无法确定要保存的 JMX 文件")
-            return
-        
-        output_file, _ = QFileDialog.getSaveFileName(self, "保存 JMX 文件", "", "JMX files (*.jmx)")
-        if output_file:
-            parser = self.parsers[jmx_file]
-            success = parser.save_jmx(output_file)
-            if success:
-                QMessageBox.information(self, "成功", f"JMX 文件已保存到 {output_file}")
-            else:
-                QMessageBox.critical(self, "错误", "保存 JMX 文件时出错")
-        
-    def save_all_jmx(self):
-        if not self.parsers:
-            QMessageBox.critical(self, "错误", "请先解析一个 JMX 文件")
-            return
-        
-        output_dir = QFileDialog.getExistingDirectory(self, "选择输出文件夹")
-        if not output_dir:
-            return
-        
-        total_files = len(self.parsers)
-        self.progress.setMaximum(total_files)
-        self.progress.setValue(0)
-        
-        for jmx_file, parser in self.parsers.items():
-            try:
-                output_file = os.path.join(output_dir, os.path.basename(jmx_file))
-                success = parser.save_jmx(output_file)
-                if success:
-                    self.progress.setValue(self.progress.value() + 1)
-                    QApplication.processEvents()
-                else:
-                    QMessageBox.critical(self, "错误", f"保存 {jmx_file} 时出错")
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"保存 {jmx_file} 时出错: {e}")
-        
-        QMessageBox.information(self, "成功", f"所有 JMX 文件已保存到 {output_dir}")
\ No newline at end of file
@@ -0,0 +1,40 @@
+import math
+
+# 分页显示时每页的行数
+PAGE_SIZE = 200
+
+COLUMNS = ("类型", "序号", "名称")
+
+
+class RowSource:
+    """界面的行数据来源：按下标或按页从 ElementTable 中取行，界面只渲染可见的部分
+
+    行是 (类型, 序号, 名称) 三个字符串组成的元组。支持虚拟列表的控件（QTableView、
+    wx.ListCtrl 的 LC_VIRTUAL）直接按行取数；其余控件按页显示，内存占用与元素总数无关。
+    """
+
+    def __init__(self, elements, page_size=PAGE_SIZE):
+        self.elements = elements
+        self.page_size = page_size
+        # 虚拟列表滚动时会反复读取相邻的行，缓存最近一页
+        self._cached_page = None
+        self._cached_rows = None
+
+    def __len__(self):
+        return len(self.elements)
+
+    @property
+    def page_count(self):
+        return max(1, math.ceil(len(self.elements) / self.page_size))
+
+    def row(self, index):
+        page, offset = divmod(index, self.page_size)
+        return self.page(page)[offset]
+
+    def page(self, page):
+        if page != self._cached_page:
+            start = page * self.page_size
+            self._cached_rows = [(element.type, str(element.number), element.formatted_name)
+                                 for element in self.elements[start:start + self.page_size]]
+            self._cached_page = page
+        return self._cached_rows
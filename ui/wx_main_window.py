@@ -1,11 +1,28 @@
-import os
 import re
 
 import pywinstyles
 import wx
-import wx.lib.agw.flatnotebook as fnb
 
 from ui.base_app import BaseApp
+from ui.result_model import COLUMNS
+
+
+class _RowSourceListCtrl(wx.ListCtrl):
+    """LC_VIRTUAL 列表，显示某一行时才从 RowSource 中取数"""
+
+    def __init__(self, parent):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        for index, (column, width) in enumerate(zip(COLUMNS, (150, 60, 400))):
+            self.InsertColumn(index, column, width=width)
+        self.rows = None
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.SetItemCount(0 if rows is None else len(rows))
+        self.Refresh()
+
+    def OnGetItemText(self, item, column):
+        return self.rows.row(item)[column]
 
 
 class App(BaseApp, wx.Frame):
@@ -103,11 +120,30 @@ class App(BaseApp, wx.Frame):
         self.save_all_btn.Bind(wx.EVT_BUTTON, self.save_all_jmx)
         button_frame.Add(self.save_all_btn, 0, wx.ALL, 5)
         
+        self.watch_btn = wx.Button(panel, label="监听文件夹", size=btn_def_size)
+        self.watch_btn.Bind(wx.EVT_BUTTON, self.toggle_watch)
+        button_frame.Add(self.watch_btn, 0, wx.ALL, 5)
+        
+        self.pause_btn = wx.Button(panel, label="暂停/继续", size=btn_def_size)
+        self.pause_btn.Bind(wx.EVT_BUTTON, self.toggle_pause_job)
+        button_frame.Add(self.pause_btn, 0, wx.ALL, 5)
+        
+        self.cancel_btn = wx.Button(panel, label="取消任务", size=btn_def_size)
+        self.cancel_btn.Bind(wx.EVT_BUTTON, self.cancel_job)
+        button_frame.Add(self.cancel_btn, 0, wx.ALL, 5)
+        
         main_sizer.Add(button_frame, 0, wx.EXPAND | wx.ALL, 5)
         
-        # Notebook组件
-        self.notebook = fnb.FlatNotebook(panel, style=fnb.FNB_NO_X_BUTTON)
-        main_sizer.Add(self.notebook, 1, wx.EXPAND | wx.ALL, 5)
+        # 结果区域：左侧文件列表，右侧为按需取行的虚拟列表
+        result_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.file_list = wx.ListBox(panel, size=(200, -1))
+        self.file_list.Bind(wx.EVT_LISTBOX, self.on_file_selected)
+        result_sizer.Add(self.file_list, 1, wx.EXPAND | wx.ALL, 5)
+        self.result_files = []
+
+        self.detail_view = _RowSourceListCtrl(panel)
+        result_sizer.Add(self.detail_view, 3, wx.EXPAND | wx.ALL, 5)
+        main_sizer.Add(result_sizer, 1, wx.EXPAND | wx.ALL, 5)
 
         # 进度条
         self.progress = wx.Gauge(panel, range=100, size=(-1, 25))
@@ -123,8 +159,6 @@ class App(BaseApp, wx.Frame):
         panel.Layout()  # {{ 新增：确保面板布局正确更新 }}
         self.Layout()
         self.Show()
-        
-        self.parsers = {}
 
     def get_file_path(self) -> str:
         return self.file_path.GetValue()
@@ -138,20 +172,31 @@ class App(BaseApp, wx.Frame):
     def get_replacement_entries(self) -> list[tuple[str, str]]:
         return [(entry1.GetValue(), entry2.GetValue()) for _, entry1, entry2 in self.replacement_frames]
 
-    def clear_tabs(self):
-        self.notebook.DeleteAllPages()
+    def clear_results(self):
+        self.file_list.Clear()
+        self.result_files.clear()
+        self.detail_view.set_rows(None)
+
+    def add_result_item(self, jmx_file: str, title: str):
+        self.result_files.append(jmx_file)
+        self.file_list.Append(title)
+
+    def remove_result_item(self, jmx_file: str):
+        index = self.result_files.index(jmx_file)
+        del self.result_files[index]
+        self.file_list.Delete(index)
 
-    def add_tab(self, title: str, content: str):
-        text_ctrl = wx.TextCtrl(self.notebook, style=wx.TE_MULTILINE | wx.TE_READONLY)
-        text_ctrl.SetValue(content)
-        self.notebook.AddPage(text_ctrl, title)
+    def on_file_selected(self, event):
+        index = self.file_list.GetSelection()
+        if 0 <= index < len(self.result_files):
+            self.select_result(self.result_files[index])
 
-    def get_selected_file(self) -> str:
-        selected_index = self.notebook.GetSelection()
-        if selected_index == -1:
-            return None
-        tab_text = self.notebook.GetPageText(selected_index)
-        return next((file for file in self.parsers if f"解析结果 - {os.path.basename(file)}" == tab_text), None)
+    def show_rows(self, rows, page: int):
+        # 虚拟列表只为可见的行调用 OnGetItemText，不需要分页
+        self.detail_view.set_rows(rows)
+
+    def run_on_ui_thread(self, func):
+        wx.CallAfter(func)
 
     def update_status(self, message: str):
         self.SetStatusText(message, 0)
@@ -281,3 +326,12 @@ class App(BaseApp, wx.Frame):
 
     def save_all_jmx(self, event):
         super().save_all_jmx()
+
+    def toggle_watch(self, event=None):
+        super().toggle_watch()
+
+    def toggle_pause_job(self, event=None):
+        super().toggle_pause_job()
+
+    def cancel_job(self, event=None):
+        super().cancel_job()
@@ -7,4 +7,33 @@ def keep_before_question_mark(string):
     return string.split('?')[0] if '?' in string else string
 
 def keep_after_regex(pattern, string):
-    return re.sub(pattern, '', string) if re.search(pattern, string) else string
\ No newline at end of file
+    return re.sub(pattern, '', string) if re.search(pattern, string) else string
+
+def parse_replacements(text):
+    """每行一条“被替换内容 => 替换内容”，空行忽略"""
+    replacements = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        if "=>" not in line:
+            raise ValueError(f"替换项第 {number} 行缺少 =>")
+        old, new = line.split("=>", 1)
+        replacements.append((old.strip(), new.strip()))
+    return replacements
+
+def wait_for_server(url, timeout=30.0, interval=0.05, alive=None):
+    """轮询 url 直到服务器返回 2xx 响应；超时或 alive() 返回 False（如服务线程已退出）时返回 False"""
+    import time
+    import urllib.error
+    import urllib.request
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return True
+        except (urllib.error.URLError, OSError):
+            pass
+        if time.monotonic() >= deadline or (alive is not None and not alive()):
+            return False
+        time.sleep(interval)